@@ -0,0 +1,197 @@
+# battle_logic/ai.py
+"""
+NPC 对战 AI：在限定时间内对接下来的若干回合做期望最大化 (expectimax) 搜索，选出期望局面最好的技能。
+
+- 搜索树中 NPC 的节点取最大值；玩家的行动未知，视为在其所有可用技能中等概率选择 (取平均)；
+- 命中、暴击、伤害浮动、状态判定等随机事件不做解析推导，而是用真实的引擎在克隆出的对战上模拟，
+  每个分支模拟 samples 次取平均。各分支使用相同的一组随机种子 (公共随机数)，比较技能优劣时噪声更小；
+- 每个分支在 Battle.fork() 分叉出的对战上模拟，只复制宝可梦的可变状态，开销远小于完整的编码/解码；
+- 置换表以局面键 (position_key：只包含影响后续对战的状态，如HP、PP、能力等级、状态及其剩余回合，
+  不含回合数与伤害明细) 缓存 (搜索深度, 估值)，迭代加深时浅层已算过的局面、
+  以及经不同行动顺序或不同伤害组合到达的相同局面都不会重复模拟；
+- 搜索按 1, 2, ... 层迭代加深，超出时间预算时立即停止，采用最后一个完整完成的深度的结果。
+
+AI 不会使用对战自身的随机源，挂载与否不影响同一场对战中其他随机判定的结果；
+由 AI 决定的技能会写入对战录像 (见 replay.BattleRecorder)，重放时无需重新搜索。
+"""
+from __future__ import annotations
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TYPE_CHECKING
+
+from .components import StatStageComponent, StatusEffectComponent, VolatileFlagComponent, CriticalBoostComponent, PPConsumptionComponent
+from .constants import BattleState
+from .move import Move
+
+if TYPE_CHECKING:
+    from .battle import Battle
+    from .pokemon import Pokemon
+
+# 终局的估值，远大于任何非终局局面
+WIN_SCORE = 100.0
+
+class _SearchTimeout(Exception):
+    pass
+
+def usable_moves(pokemon: Optional["Pokemon"]) -> List[Move]:
+    """宝可梦当前有PP可用的技能，按技能槽顺序排列。"""
+    if pokemon is None: return []
+    return [s.move for s in pokemon.skill_slots if s.move.max_pp is None or pokemon.get_current_pp(s.move.name) > 0]
+
+def evaluate(battle: "Battle") -> float:
+    """
+    局面估值 (NPC 视角，越大越有利)：双方队伍剩余 HP 比例之差，
+    辅以场上宝可梦的能力等级与异常状态的小幅修正；一方全灭时为 ±WIN_SCORE。
+    只有异常状态 (category 为 status) 计入修正，自身的追击序列、闪避架势等有利效果不算。
+    """
+    if battle.is_over():
+        return WIN_SCORE if battle.get_winner() == "NPC" else -WIN_SCORE
+    score = sum(p.current_hp / p.max_hp for p in battle.npc_team) - sum(p.current_hp / p.max_hp for p in battle.player_team)
+    for pokemon, sign in ((battle.npc_active_pokemon, 1.0), (battle.player_active_pokemon, -1.0)):
+        if pokemon is None or pokemon.is_fainted(): continue
+        stages = sum(pokemon.aura.get_totals_by_key(StatStageComponent).values())
+        statuses = len(pokemon.get_effects_by_category("status"))
+        score += sign * (0.02 * stages - 0.05 * statuses)
+    return score
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict): return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)): return tuple(_freeze(v) for v in value)
+    return value
+
+def _pokemon_key(pokemon: "Pokemon") -> Tuple:
+    aura = pokemon.aura
+    return (
+        pokemon.current_hp,
+        tuple(aura.get_total(PPConsumptionComponent, s.move.name) for s in pokemon.skill_slots),
+        frozenset(aura.get_totals_by_key(StatStageComponent).items()),
+        aura.has_components(CriticalBoostComponent),
+        tuple((c.effect_id, _freeze(c.data)) for c in aura.get_components(StatusEffectComponent)),
+        tuple(c.flag_id for c in aura.get_components(VolatileFlagComponent)),
+    )
+
+def position_key(battle: "Battle") -> Tuple:
+    """局面键：两场对战的局面键相同，则双方此后面对的局面完全相同 (与已经过的回合数、伤害明细无关)。"""
+    def last_move(pokemon: Optional["Pokemon"]) -> Optional[str]:
+        history = battle.get_action_history_for(pokemon) if pokemon else None
+        return history[0].name if history else None
+    return (
+        battle.state,
+        battle.player_team.index(battle.player_active_pokemon) if battle.player_active_pokemon else -1,
+        battle.npc_team.index(battle.npc_active_pokemon) if battle.npc_active_pokemon else -1,
+        last_move(battle.player_active_pokemon), last_move(battle.npc_active_pokemon),
+        tuple(_pokemon_key(p) for p in battle.player_team), tuple(_pokemon_key(p) for p in battle.npc_team),
+    )
+
+class ExpectimaxAI:
+    """
+    NPC 的期望最大化搜索 AI。实例本身无状态 (置换表只在单次决策内有效)，可被多个对战、多个线程共享。
+
+    Args:
+        max_depth: 最大搜索回合数。
+        time_budget: 每次决策的时间预算 (秒)，保证聊天的响应延迟有上限。
+        samples: 每个 (NPC技能, 玩家技能) 分支的模拟次数。
+        table_size: 置换表与子局面缓存各自的最大条目数 (均按 LRU 淘汰)，决定单次决策占用内存的上限。
+        clock: 计时函数，默认为 time.perf_counter，便于测试注入。
+    """
+    def __init__(
+        self, max_depth: int = 3, time_budget: float = 0.2, samples: int = 2,
+        table_size: int = 50000, clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.max_depth = max(1, max_depth)
+        self.time_budget = time_budget
+        self.samples = max(1, samples)
+        self.table_size = table_size
+        self.clock = clock
+
+    def choose_move(self, battle: "Battle") -> Optional[Move]:
+        """为 NPC 当前出场的宝可梦选择技能；没有可用技能时返回 None。"""
+        npc = battle.npc_active_pokemon
+        moves = usable_moves(npc)
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        search = _Search(self, self.clock() + self.time_budget)
+        root = battle.fork(rng=random.Random(0), log_enabled=False)
+        root_key = position_key(root)
+        player_moves = _move_names(root.player_active_pokemon)
+        # 超时时至少给出一个合理的技能：对玩家当前宝可梦期望伤害最高者
+        target = battle.player_active_pokemon
+        best = max(moves, key=lambda m: battle.damage_distribution(npc, target, m).expected) if target else moves[0]
+        order = [m.name for m in moves]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                values = {name: search.npc_move_value(root, root_key, name, player_moves, depth) for name in order}
+            except _SearchTimeout:
+                break
+            # 下一层优先搜索当前最好的技能
+            order.sort(key=lambda name: values[name], reverse=True)
+            best = npc.get_move_by_name(order[0])
+        return best
+
+def _move_names(pokemon: Optional["Pokemon"]) -> List[Optional[str]]:
+    """玩家可选的技能名；没有可用技能时只能无法行动 (None)。"""
+    return [m.name for m in usable_moves(pokemon)] or [None]
+
+class _Search:
+    """单次决策的搜索状态：截止时间与置换表。"""
+    def __init__(self, ai: ExpectimaxAI, deadline: float):
+        self.ai = ai
+        self.deadline = deadline
+        # 局面键 -> (已搜索的深度, 估值)，按 LRU 淘汰
+        self.table: "OrderedDict[Tuple, Tuple[int, float]]" = OrderedDict()
+        # (局面键, NPC技能, 玩家技能, 样本) -> (子局面, 子局面键)，迭代加深时复用同一次模拟的结果；同样按 LRU 淘汰
+        self.children: "OrderedDict[Tuple, Tuple[Battle, Tuple]]" = OrderedDict()
+
+    def value(self, battle: "Battle", key: Tuple, depth: int) -> float:
+        cached = self.table.get(key)
+        if cached is not None and cached[0] >= depth:
+            self.table.move_to_end(key)
+            return cached[1]
+        moves = usable_moves(battle.npc_active_pokemon)
+        if depth <= 0 or battle.is_over() or not moves:
+            result = evaluate(battle)
+        else:
+            player_moves = _move_names(battle.player_active_pokemon)
+            result = max(self.npc_move_value(battle, key, m.name, player_moves, depth) for m in moves)
+        self._store(key, depth, result)
+        return result
+
+    def npc_move_value(self, battle: "Battle", key: Tuple, npc_move: str, player_moves: List[Optional[str]], depth: int) -> float:
+        """NPC 在局面 battle 中使用 npc_move 的期望估值：对玩家的每个可用技能与每个随机样本取平均。"""
+        total, count = 0.0, 0
+        for player_move in player_moves:
+            for sample in range(self.ai.samples):
+                child = self._child(battle, key, npc_move, player_move, sample)
+                total += self.value(child[0], child[1], depth - 1); count += 1
+        return total / count
+
+    def _child(self, battle: "Battle", key: Tuple, npc_move: str, player_move: Optional[str], sample: int) -> Tuple["Battle", Tuple]:
+        child_id = (key, npc_move, player_move, sample)
+        child = self.children.get(child_id)
+        if child is not None:
+            self.children.move_to_end(child_id)
+            return child
+        child = self.children[child_id] = self._simulate(battle, npc_move, player_move, sample)
+        if len(self.children) > self.ai.table_size:
+            self.children.popitem(last=False)
+        return child
+
+    def _simulate(self, battle: "Battle", npc_move: str, player_move: Optional[str], sample: int) -> Tuple["Battle", Tuple]:
+        if self.ai.clock() > self.deadline:
+            raise _SearchTimeout()
+        child = battle.fork(rng=random.Random(sample))
+        player, npc = child.player_active_pokemon, child.npc_active_pokemon
+        player_intent = {"type": "attack", "data": player.get_move_by_name(player_move)} if player_move else {"type": "force_immobilized_turn", "data": None}
+        child.process_turn(player_intent, {"type": "attack", "data": npc.get_move_by_name(npc_move)})
+        if child.state == BattleState.AWAITING_SWITCH:
+            # 玩家的濒死替换：假定换上队伍中第一只存活的宝可梦
+            child.process_faint_switch(child.get_player_survivors()[0])
+        return child, position_key(child)
+
+    def _store(self, key: Tuple, depth: int, value: float):
+        self.table[key] = (depth, value)
+        self.table.move_to_end(key)
+        if len(self.table) > self.ai.table_size:
+            self.table.popitem(last=False)
\ No newline at end of file
@@ -1,7 +1,8 @@
 # battle_logic/aura.py
 
 from abc import ABC
-from typing import List, Type, TypeVar, Optional, TYPE_CHECKING
+from copy import copy
+from typing import Dict, Hashable, List, Tuple, Type, TypeVar, Optional, ClassVar, TYPE_CHECKING
 import weakref
 from enum import Enum, auto
 
@@ -20,7 +21,17 @@ class AuraComponent(ABC):
     """
     状态偏差组件的抽象基类。
     每个组件代表对宝可梦原始状态的一种修改。
+    长对战中会创建成千上万个组件，因此整个组件体系都使用 __slots__ 以节省内存。
     """
+    __slots__ = ("source_move", "lifespan")
+
+    # 子类可声明一个属性名，Aura 会按该属性的值为组件建立二级索引 (如 effect_id、stat)。
+    index_key: ClassVar[Optional[str]] = None
+    # 子类可声明一个数值属性名，Aura 会为其维护按类型及按索引键的累计值 (如伤害量、等级变化)。
+    aggregate_field: ClassVar[Optional[str]] = None
+    # 子类可声明一组属性名，日志压缩时同组 (属性值相同) 的永久数值记录会被折叠为一条汇总记录。
+    fold_fields: ClassVar[Optional[Tuple[str, ...]]] = None
+
     def __init__(self, source_move: Optional[str] = None, lifespan: ComponentLifespan = ComponentLifespan.PERMANENT):
         """
         初始化组件。
@@ -32,14 +43,34 @@ class AuraComponent(ABC):
         self.source_move = source_move
         self.lifespan = lifespan
 
+    def fork(self) -> "AuraComponent":
+        """
+        返回供分叉出的气场使用的组件。组件创建后不再被修改，因此默认直接共享同一实例；
+        带有运行时可变数据的组件需重写此方法返回副本。
+        """
+        return self
+
+_INDEX_TYPES_CACHE: Dict[type, Tuple[type, ...]] = {}
+
 class Aura:
     """
     封装宝可梦所有状态偏差的容器。
     它负责管理所有附加到宝可梦身上的AuraComponent。
+
+    组件除了按添加顺序保存在主记录中，还会同时登记到三类索引：
+    按组件类型 (含其所有父类) 分桶、按 (组件类型, index_key的值) 分桶、按生命周期分桶。
+    所有索引都以 id(组件) 为键的有序字典实现，增删均为 O(1)，且保持添加顺序。
+
+    对声明了 aggregate_field 的数值组件，Aura 另外维护累计值，
+    使得当前精力、已消耗PP、能力等级等读取均为 O(1)；完整的组件记录仍被保留用于审计与回放。
     """
     def __init__(self, owner: 'Pokemon'):
         self._owner_ref = weakref.ref(owner)
-        self._components: List[AuraComponent] = []
+        self._components: Dict[int, AuraComponent] = {}
+        self._by_type: Dict[type, Dict[int, AuraComponent]] = {}
+        self._by_key: Dict[Tuple[type, Hashable], Dict[int, AuraComponent]] = {}
+        self._by_lifespan: Dict[ComponentLifespan, Dict[int, AuraComponent]] = {}
+        self._totals: Dict[Tuple[type, Hashable], int] = {}
 
     @property
     def owner(self) -> 'Pokemon':
@@ -49,18 +80,170 @@ class Aura:
             raise RuntimeError("Aura's owner has been garbage collected.")
         return owner
 
+    @staticmethod
+    def _index_types(component: AuraComponent) -> Tuple[type, ...]:
+        """组件需要登记的所有类型桶：其自身类型及 AuraComponent 之下的所有父类。结果按类缓存。"""
+        component_cls = type(component)
+        types = _INDEX_TYPES_CACHE.get(component_cls)
+        if types is None:
+            types = tuple(cls for cls in component_cls.__mro__ if issubclass(cls, AuraComponent) and cls is not AuraComponent)
+            _INDEX_TYPES_CACHE[component_cls] = types
+        return types
+
+    def _index_keys(self, component: AuraComponent) -> List[Tuple[type, Hashable]]:
+        return [(cls, getattr(component, cls.index_key)) for cls in self._index_types(component) if cls.index_key]
+
     def add_component(self, component: AuraComponent):
         """向气场中添加一个新的状态组件。"""
-        self._components.append(component)
+        cid = id(component)
+        if cid in self._components:
+            return
+        self._components[cid] = component
+        for cls in self._index_types(component):
+            self._by_type.setdefault(cls, {})[cid] = component
+        for key in self._index_keys(component):
+            self._by_key.setdefault(key, {})[cid] = component
+        self._by_lifespan.setdefault(component.lifespan, {})[cid] = component
+        self._accumulate(component, 1)
 
     def get_components(self, component_type: Type[T]) -> List[T]:
         """获取所有指定类型的组件。"""
-        return [comp for comp in self._components if isinstance(comp, component_type)]
+        bucket = self._by_type.get(component_type)
+        return list(bucket.values()) if bucket else []
+
+    def get_all_components(self) -> List[AuraComponent]:
+        """按添加顺序获取所有组件。"""
+        return list(self._components.values())
+
+    def get_components_by_key(self, component_type: Type[T], key: Hashable) -> List[T]:
+        """获取指定类型中，index_key 属性值等于 key 的所有组件 (如某个 effect_id 的状态)。"""
+        bucket = self._by_key.get((component_type, key))
+        return list(bucket.values()) if bucket else []
+
+    def has_components(self, component_type: Type[T], key: Optional[Hashable] = None) -> bool:
+        """判断是否存在指定类型 (及可选 key) 的组件，无需构造结果列表。"""
+        bucket = self._by_type.get(component_type) if key is None else self._by_key.get((component_type, key))
+        return bool(bucket)
 
     def remove_component(self, component: AuraComponent):
         """移除一个指定的组件实例。"""
-        if component in self._components:
-            self._components.remove(component)
+        cid = id(component)
+        if self._components.pop(cid, None) is None:
+            return
+        for cls in self._index_types(component):
+            self._discard(self._by_type, cls, cid)
+        for key in self._index_keys(component):
+            self._discard(self._by_key, key, cid)
+        self._discard(self._by_lifespan, component.lifespan, cid)
+        self._accumulate(component, -1)
+
+    def _accumulate(self, component: AuraComponent, sign: int):
+        """将数值组件计入 (sign=1) 或移出 (sign=-1) 累计值。"""
+        for cls in self._index_types(component):
+            if not cls.aggregate_field:
+                continue
+            value = sign * getattr(component, cls.aggregate_field)
+            self._totals[(cls, None)] = self._totals.get((cls, None), 0) + value
+            if cls.index_key:
+                key = (cls, getattr(component, cls.index_key))
+                self._totals[key] = self._totals.get(key, 0) + value
+
+    def compact(self, keep_recent: int = 8) -> int:
+        """
+        压缩永久数值记录 (伤害、治疗、PP消耗、能力等级)。
+
+        对每种声明了 fold_fields 的组件类型，只保留最近 keep_recent 条原始记录，
+        更早的记录按 fold_fields 分组折叠为一条汇总记录 (count 为折叠的原始条数)，
+        汇总记录放在原先第一条被折叠记录的位置。累计值在压缩前后保持不变。
+        为了摊销开销，只有当可折叠记录超过 2 * keep_recent 条时才会真正执行。
+
+        Returns:
+            被移除的原始记录条数。
+        """
+        permanent = self._by_lifespan.get(ComponentLifespan.PERMANENT)
+        if not permanent:
+            return 0
+
+        replaced: Dict[int, Optional[AuraComponent]] = {}
+        for component_cls in {type(c) for c in permanent.values() if type(c).fold_fields}:
+            records = [c for c in self._by_type[component_cls].values()
+                       if type(c) is component_cls and c.lifespan == ComponentLifespan.PERMANENT]
+            if len(records) <= 2 * keep_recent:
+                continue
+            groups: Dict[Tuple, List[AuraComponent]] = {}
+            for c in records[:len(records) - keep_recent]:
+                groups.setdefault(tuple(getattr(c, f) for f in component_cls.fold_fields), []).append(c)
+            for group in groups.values():
+                if len(group) == 1:
+                    continue
+                summary = copy(group[0])
+                setattr(summary, component_cls.aggregate_field, sum(getattr(c, component_cls.aggregate_field) for c in group))
+                summary.count = sum(c.count for c in group)
+                replaced[id(group[0])] = summary
+                for c in group[1:]:
+                    replaced[id(c)] = None
+
+        if not replaced:
+            return 0
+        ordered = [replaced.get(cid, c) for cid, c in self._components.items()]
+        self._rebuild([c for c in ordered if c is not None])
+        return len(replaced) - sum(1 for v in replaced.values() if v is not None)
+
+    def _rebuild(self, components: List[AuraComponent]):
+        """以给定的有序组件列表重建主记录、全部索引与累计值。"""
+        self._components.clear(); self._by_type.clear(); self._by_key.clear()
+        self._by_lifespan.clear(); self._totals.clear()
+        for component in components:
+            self.add_component(component)
+
+    def fork(self, owner: 'Pokemon') -> "Aura":
+        """
+        为 owner 复制一份气场 (写时复制)：不可变的组件直接与原气场共享，只复制会被修改的组件；
+        索引与累计值按桶复制，无需逐个重新登记组件。
+        """
+        clone = Aura.__new__(Aura)
+        clone._owner_ref = weakref.ref(owner)
+        replaced = {}
+        for cid, component in self._components.items():
+            forked = component.fork()
+            if forked is not component: replaced[cid] = forked
+
+        def copy_bucket(bucket: Dict[int, AuraComponent]) -> Dict[int, AuraComponent]:
+            # 只有包含被复制组件的桶需要逐项换成新组件 (键为新组件的 id)，其余的桶直接浅拷贝
+            if not replaced or replaced.keys().isdisjoint(bucket):
+                return dict(bucket)
+            out = {}
+            for cid, component in bucket.items():
+                component = replaced.get(cid, component)
+                out[id(component)] = component
+            return out
+        clone._components = copy_bucket(self._components)
+        clone._by_type = {k: copy_bucket(v) for k, v in self._by_type.items()}
+        clone._by_key = {k: copy_bucket(v) for k, v in self._by_key.items()}
+        clone._by_lifespan = {k: copy_bucket(v) for k, v in self._by_lifespan.items()}
+        clone._totals = dict(self._totals)
+        return clone
+
+    def restore(self, components: List[AuraComponent]):
+        """以给定的有序组件列表完整替换当前记录，用于从快照恢复。"""
+        self._rebuild(list(components))
+
+    def get_total(self, component_type: Type[AuraComponent], key: Optional[Hashable] = None) -> int:
+        """获取某类数值组件的累计值；指定 key 时只统计 index_key 等于 key 的组件。"""
+        return self._totals.get((component_type, key), 0)
+
+    def get_totals_by_key(self, component_type: Type[AuraComponent]) -> Dict[Hashable, int]:
+        """获取某类数值组件按 index_key 分组的全部非零累计值 (如每项能力的等级变化)。"""
+        return {key[1]: total for key, total in self._totals.items() if key[0] is component_type and key[1] is not None and total}
+
+    @staticmethod
+    def _discard(index: Dict, key: Hashable, cid: int):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(cid, None)
+        if not bucket:
+            del index[key]
 
     def clear_components_by_lifespan(self, lifespan_to_clear: ComponentLifespan):
         """
@@ -68,4 +251,8 @@ class Aura:
         这是实现开闭原则的关键，所有清理逻辑都集中于此，
         使得Pokemon类无需关心具体的组件类型。
         """
-        self._components = [c for c in self._components if c.lifespan != lifespan_to_clear]
\ No newline at end of file
+        bucket = self._by_lifespan.get(lifespan_to_clear)
+        if not bucket:
+            return
+        for component in list(bucket.values()):
+            self.remove_component(component)
\ No newline at end of file
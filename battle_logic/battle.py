@@ -3,18 +3,44 @@ from __future__ import annotations
 import random
 import math
 from collections import deque
-from typing import List, Optional, Dict, Any, Literal, Type, Hashable
+from copy import copy
+from typing import List, Optional, Dict, Any, Literal, Hashable, Iterable, Tuple, Union, TYPE_CHECKING
 
 from .pokemon import Pokemon, Move
-from .constants import BattleState, TypeEffectiveness, Stat, MoveCategory
+from .constants import BattleState, Stat, MoveCategory
 from .factory import GameDataFactory
 from .components import VolatileFlagComponent, StatusEffectComponent, CriticalBoostComponent
+from .effects import BaseEffect, DealDamageEffect, compile_effect_list
+from .damage_calc import DamageDistribution, ROLL_MIN, ROLL_MAX, roll_distribution, mix, convolve
+from .events import (
+    BattleEvent, Side, TurnStarted, MoveUsed, NoTarget, MoveMissed, CannotAct, ResidualDamage, StatusEnded,
+    StatusRecovered, FollowUp, SequenceEnded, Fainted, SwitchedOut, SwitchedIn, SentOut,
+)
+from .render import render_events
 from astrbot.api import logger
 
-Action = Dict[Literal["type", "pokemon", "data", "priority"], Any]
+if TYPE_CHECKING:
+    from .replay import BattleRecorder
+    from .ai import ExpectimaxAI
+
+# attack 行动的 slot 为所用技能槽的 SkillSlot.index (技能模板在技能槽间共享，不能由技能反查技能槽)
+Action = Dict[Literal["type", "pokemon", "data", "priority", "slot"], Any]
+
+# 追击段使用的占位技能，技能模板不可变，可安全地在所有战斗间共享
+FOLLOW_UP_MOVE = Move(name="追击效果", display={}, on_use={})
 
 class Battle:
-    def __init__(self, player_team: List[Pokemon], npc_team: List[Pokemon], factory: GameDataFactory):
+    def __init__(
+        self, player_team: List[Pokemon], npc_team: List[Pokemon], factory: GameDataFactory,
+        rng: Optional[random.Random] = None, log_enabled: bool = True, seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            rng: 所有命中、暴击、麻痹、伤害浮动与NPC选招判定使用的随机源。
+                 默认为本场对战独享的 random.Random(seed)，不与其他对战或全局 random 模块共享状态。
+            log_enabled: 为 False 时进入无日志模式 (用于批量模拟、AI推演)，引擎不会创建任何对战事件，也不会渲染日志。
+            seed: 未传入 rng 时使用的随机种子，为 None 时随机生成。相同的种子与相同的行动序列会得到完全相同的对战。
+        """
         self.player_team: List[Pokemon] = player_team
         self.npc_team: List[Pokemon] = npc_team
         self.factory: GameDataFactory = factory
@@ -23,22 +49,42 @@ class Battle:
         self.turn_count: int = 0
         self.state: BattleState = BattleState.FIGHTING
         self.action_history: Dict[Hashable, deque] = {}
+        # 传入外部 rng 时对战的可复现性由调用方负责，seed 记为 None
+        self.seed: Optional[int] = None if rng is not None else (seed if seed is not None else random.getrandbits(63))
+        self.rng: random.Random = rng if rng is not None else random.Random(self.seed)
+        self.log_enabled: bool = log_enabled
         self.history_limit: int = 5
-        from .effects import EFFECT_HANDLER_MAP, BaseEffect
-        self.effect_handler_classes: Dict[str, Type[BaseEffect]] = EFFECT_HANDLER_MAP
-
-    def process_turn(self, player_action_intent: Dict) -> Dict[str, Any]:
-        log = []
+        # 每回合结束时，每只宝可梦每类永久数值记录最多保留的原始条数，更早的记录会被折叠为汇总记录
+        self.aura_log_limit: int = 8
+        # 可选的录像器 (见 replay.BattleRecorder.attach)，记录每回合的玩家意图与随机数消耗
+        self.recorder: Optional["BattleRecorder"] = None
+        # 本回合已播报过倒下的宝可梦 (id)，避免同一只宝可梦的倒下事件被重复记录
+        self._announced_faints: set = set()
+        # 可选的NPC AI (见 ai.ExpectimaxAI)，为 None 时NPC随机选择可用技能
+        self.npc_ai: Optional["ExpectimaxAI"] = None
+        # 正在结算的技能所在技能槽的 SkillSlot.index (供启动追击序列的效果使用)，不在技能结算中时为 None
+        self.acting_slot: Optional[int] = None
+
+    def process_turn(self, player_action_intent: Dict, npc_action_intent: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        结算一个回合。
+        npc_action_intent 可指定NPC本回合的行动 (仅支持 attack，用于AI推演与录像重放)；
+        为 None 时由 npc_ai 决定，未挂载AI时随机选择。
+        attack 意图可以用 "slot" 指定技能槽 (SkillSlot.index)，未指定时使用第一个装有该技能的技能槽。
+        """
+        events: List[BattleEvent] = []
         player, npc = self.player_active_pokemon, self.npc_active_pokemon
+        if self.recorder is not None: self.recorder.record_turn(self, player_action_intent)
 
         try:
             self.turn_count += 1
-            log.append(f"--- 第 {self.turn_count} 回合 ---")
+            self._announced_faints.clear()
+            if self.log_enabled: events.append(TurnStarted(self.turn_count))
             if not player or not npc:
-                return self._build_turn_result(log)
+                return self._build_turn_result(events)
 
             player_action = self._create_action_from_intent(player, player_action_intent)
-            npc_action = self._create_npc_action(npc)
+            npc_action = self._create_npc_action(npc, npc_action_intent)
 
             action_order = sorted(
                 [player_action, npc_action],
@@ -53,25 +99,54 @@ class Battle:
                 if actor.is_fainted() or not opponent:
                     continue
 
-                self._execute_action_core(actor, opponent, action, log)
-                if self._handle_fainting_and_state_update(log) or self.is_over(): break
+                self._execute_action_core(actor, opponent, action, events)
+                if self._handle_fainting_and_state_update(events) or self.is_over(): break
                 
-                self._process_post_action_triggers(actor, log)
-                if self._handle_fainting_and_state_update(log) or self.is_over(): break
+                self._process_post_action_triggers(actor, events)
+                if self._handle_fainting_and_state_update(events) or self.is_over(): break
 
-                self._resolve_end_of_turn_effects(opponent, log)
-                if self._handle_fainting_and_state_update(log) or self.is_over(): break
+                self._resolve_end_of_turn_effects(opponent, events)
+                if self._handle_fainting_and_state_update(events) or self.is_over(): break
             
             if not self.is_over() and self.state != BattleState.AWAITING_SWITCH:
                 self.state = BattleState.FIGHTING
             
-            return self._build_turn_result(log)
+            return self._build_turn_result(events)
 
         finally:
             if player: player.clear_turn_effects()
             if npc: npc.clear_turn_effects()
+            for pokemon in self.player_team + self.npc_team:
+                pokemon.aura.compact(self.aura_log_limit)
+
+    def fork(self, rng: Optional[random.Random] = None, log_enabled: Optional[bool] = None) -> "Battle":
+        """
+        分叉出一场独立的对战，用于AI推演与“如果使用某个技能会怎样”之类的假设查询。
+
+        数据工厂、技能模板、属性克制表等不可变数据直接共享，只复制每只宝可梦的可变状态 (见 Pokemon.fork)
+        与行动历史。分叉出的对战不带录像器，对它的任何操作都不会影响原对战。
 
-    def _process_post_action_triggers(self, actor: Pokemon, log: list):
+        Args:
+            rng: 分叉对战使用的随机源，默认为原随机源当前状态的独立副本 (两者此后产生相同的随机数序列)。
+            log_enabled: 是否产生对战事件，默认与原对战相同。
+        """
+        forked = {id(p): p.fork() for p in self.player_team + self.npc_team}
+        clone = copy(self)
+        clone.player_team = [forked[id(p)] for p in self.player_team]
+        clone.npc_team = [forked[id(p)] for p in self.npc_team]
+        clone.player_active_pokemon = forked[id(self.player_active_pokemon)] if self.player_active_pokemon else None
+        clone.npc_active_pokemon = forked[id(self.npc_active_pokemon)] if self.npc_active_pokemon else None
+        clone.action_history = {id(forked[pid]): deque(h, maxlen=h.maxlen) for pid, h in self.action_history.items() if pid in forked}
+        if rng is None:
+            rng = random.Random()
+            rng.setstate(self.rng.getstate())
+        clone.rng = rng
+        if log_enabled is not None: clone.log_enabled = log_enabled
+        clone.recorder = None
+        clone._announced_faints = set()
+        return clone
+
+    def _process_post_action_triggers(self, actor: Pokemon, events: List[BattleEvent]):
         active_sequences = actor.get_effects_by_category("sequence")
         if not active_sequences: return
 
@@ -99,44 +174,51 @@ class Battle:
             step_index = total_charges - charges
             
             if step_index < len(steps):
-                log.append(f"  由 [{sequence.source_move or '序列'}] 追击 - 第 {step_index + 1}/{total_charges} 段：")
-                move = Move(name="追击效果", display={}, on_use={})
-                
-                self.execute_effect_list(steps[step_index], actor, opponent, move, log)
+                if self.log_enabled: events.append(FollowUp(sequence.source_move or '序列', step_index + 1, total_charges))
+                self.execute_effect_list(steps[step_index], actor, opponent, FOLLOW_UP_MOVE, events)
                 
                 sequence.data["charges"] -= 1
                 if sequence.data["charges"] <= 0:
                     actor.remove_effect(sequence.effect_id)
-                    log.append(f"  {self._get_pokemon_log_prefix(actor)}{actor.name} 的 [{sequence.source_move}] 序列结束了。")
+                    if self.log_enabled: events.append(SequenceEnded(self.side_of(actor), actor.name, sequence.source_move))
                 
                 if opponent.is_fainted():
                     break
 
-    def execute_effect_list(self, effect_list: List[Dict], attacker: Pokemon, defender: Pokemon, move: Move, log: list):
+    def execute_effect_list(self, effect_list: Iterable[Union[Dict, BaseEffect]], attacker: Pokemon, defender: Pokemon, move: Move, events: List[BattleEvent]):
+        """
+        按顺序执行一组效果。
+        传入预编译的效果流水线 (效果处理器的元组) 时直接执行；传入原始JSON效果列表 (如状态的衍生效果) 时先即时编译。
+        """
         if not effect_list: return
-        for effect_data in effect_list:
-            handler_class = self.effect_handler_classes.get(effect_data.get("handler"))
-            if handler_class and random.random() <= effect_data.get("chance", 100) / 100.0:
-                handler_class(self, effect_data).execute(attacker, defender, move, log)
-
-    def _build_turn_result(self, log: List[str]) -> Dict[str, Any]:
-        return {"log": "\n".join(log), "state": self.state, "is_over": self.is_over(), "winner": self.get_winner()}
-
-    def _execute_action_core(self, actor: Pokemon, opponent: Optional[Pokemon], action: Action, log: list):
+        # 效果属性中的列表是只读的元组，需按元素区分流水线与原始效果列表
+        pipeline = effect_list if isinstance(effect_list, tuple) and isinstance(effect_list[0], BaseEffect) else compile_effect_list(effect_list)
+        for effect in pipeline:
+            if effect.chance >= 1.0 or self.rng.random() <= effect.chance:
+                effect.execute(self, attacker, defender, move, events)
+
+    def _build_turn_result(self, events: List[BattleEvent]) -> Dict[str, Any]:
+        """回合结果：events 为本回合的对战事件，log 为渲染后的回合日志 (无日志模式下均为空)。"""
+        return {
+            "events": events, "log": render_events(events) if events else "",
+            "state": self.state, "is_over": self.is_over(), "winner": self.get_winner(),
+        }
+
+    def _execute_action_core(self, actor: Pokemon, opponent: Optional[Pokemon], action: Action, events: List[BattleEvent]):
         if action["type"] == "immobilized_turn":
-            log.append(f"{self._get_pokemon_log_prefix(actor)}{actor.name} 无法行动！")
+            if self.log_enabled: events.append(CannotAct(self.side_of(actor), actor.name, "immobilized"))
             return
-        if self._check_can_act(actor, log):
+        if self._check_can_act(actor, events):
             if action["type"] == "attack":
                 move_used = action["data"]
                 self._record_action(actor, move_used)
                 if move_used.max_pp is not None:
                     actor.use_move(move_used.name)
-                self._perform_action_attack(actor, opponent, move_used, log)
+                self._perform_action_attack(actor, opponent, move_used, events, action.get("slot"))
             elif action["type"] == "switch":
-                self._perform_action_switch(actor, action["data"], log)
+                self._perform_action_switch(actor, action["data"], events)
 
-    def _handle_fainting_and_state_update(self, log: list) -> bool:
+    def _handle_fainting_and_state_update(self, events: List[BattleEvent]) -> bool:
         player_fainted = self.player_active_pokemon and self.player_active_pokemon.is_fainted()
         npc_fainted = self.npc_active_pokemon and self.npc_active_pokemon.is_fainted()
 
@@ -144,8 +226,8 @@ class Battle:
             return False
 
         if player_fainted:
-            if self.state != BattleState.AWAITING_SWITCH and self.state != BattleState.ENDED:
-                log.append(f"  {self._get_pokemon_log_prefix(self.player_active_pokemon)}{self.player_active_pokemon.name} 倒下了！")
+            if self.log_enabled and self.state != BattleState.AWAITING_SWITCH and self.state != BattleState.ENDED:
+                self._announce_faint(self.player_active_pokemon, events)
             
             if self.get_player_survivors():
                 self.state = BattleState.AWAITING_SWITCH
@@ -154,43 +236,51 @@ class Battle:
             return True
 
         if npc_fainted:
-            faint_msg = f"{self.npc_active_pokemon.name} 倒下了！"
-            if not any(faint_msg in line for line in log[-3:]):
-                 log.append(f"  {self._get_pokemon_log_prefix(self.npc_active_pokemon)}{faint_msg}")
+            if self.log_enabled: self._announce_faint(self.npc_active_pokemon, events)
 
             next_npc = self.get_next_npc_pokemon()
             if next_npc:
                 self.npc_active_pokemon = next_npc
-                log.append(f"(NPC) 派出了新的宝可梦：{next_npc.name}！")
+                if self.log_enabled: events.append(SentOut("npc", next_npc.name))
             else:
                 self.state = BattleState.ENDED
             return True
         return False
 
+    def _announce_faint(self, pokemon: Pokemon, events: List[BattleEvent]):
+        if id(pokemon) in self._announced_faints: return
+        self._announced_faints.add(id(pokemon))
+        events.append(Fainted(self.side_of(pokemon), pokemon.name))
+
     def process_faint_switch(self, new_pokemon: Pokemon) -> Dict[str, Any]:
         if self.state != BattleState.AWAITING_SWITCH: return {"success": False, "log": "错误：当前不处于等待换人状态。"}
         if new_pokemon.is_fainted() or new_pokemon not in self.player_team: return {"success": False, "log": "错误：选择的宝可梦无效或已倒下。"}
+        if self.recorder is not None: self.recorder.record_faint_switch(self, new_pokemon)
         p_out = self.player_active_pokemon
         if p_out: p_out.on_switch_out(); self._clear_history_for(p_out)
         self.player_active_pokemon = new_pokemon; self.state = BattleState.FIGHTING
         return {"success": True, "log": f"去吧，{new_pokemon.name}！"}
 
-    def _check_critical_hit(self, attacker: Pokemon) -> bool:
+    def critical_hit_chance(self, attacker: Pokemon) -> float:
+        """攻击方本次出手的暴击概率。"""
         base_crit_chance = 0.0525 + (attacker.crit_points * 0.0005)
-        crit_multiplier = 2.0 if attacker.aura.get_components(CriticalBoostComponent) else 1.0
-        return random.random() < min(base_crit_chance * crit_multiplier, 1.0)
-
-    def _check_can_act(self, pokemon: Pokemon, log: list) -> bool:
-        prefix = self._get_pokemon_log_prefix(pokemon)
-        if any(c.flag_id == 'flinch' for c in pokemon.aura.get_components(VolatileFlagComponent)):
-            log.append(f"{prefix}{pokemon.name} 畏缩了，无法行动！"); return False
-        for effect_comp in pokemon.aura.get_components(StatusEffectComponent):
-            if effect_comp.effect_id == "paralysis":
-                if random.random() < effect_comp.properties.get("immobility_chance", 0.25):
-                    log.append(f"{prefix}{pokemon.name} 全身麻痹，无法行动！"); return False
+        crit_multiplier = 2.0 if attacker.aura.has_components(CriticalBoostComponent) else 1.0
+        return min(base_crit_chance * crit_multiplier, 1.0)
+
+    def _check_critical_hit(self, attacker: Pokemon) -> bool:
+        return self.rng.random() < self.critical_hit_chance(attacker)
+
+    def _check_can_act(self, pokemon: Pokemon, events: List[BattleEvent]) -> bool:
+        if pokemon.aura.has_components(VolatileFlagComponent, 'flinch'):
+            if self.log_enabled: events.append(CannotAct(self.side_of(pokemon), pokemon.name, "flinch"))
+            return False
+        for effect_comp in pokemon.aura.get_components_by_key(StatusEffectComponent, "paralysis"):
+            if self.rng.random() < effect_comp.properties.get("immobility_chance", 0.25):
+                if self.log_enabled: events.append(CannotAct(self.side_of(pokemon), pokemon.name, "paralysis"))
+                return False
         return True
 
-    def _resolve_end_of_turn_effects(self, pokemon: Pokemon, log: list):
+    def _resolve_end_of_turn_effects(self, pokemon: Pokemon, events: List[BattleEvent]):
         if pokemon.is_fainted(): return
         for effect_comp in list(pokemon.aura.get_components(StatusEffectComponent)):
             if pokemon.is_fainted(): break
@@ -202,45 +292,104 @@ class Battle:
             if 'damage_per_turn' in props:
                 damage = max(1, math.floor(pokemon.max_hp * props["damage_per_turn"]))
                 pokemon.take_damage(damage, source_move=effect_comp.name)
-                log.append(f"  {self._get_pokemon_log_prefix(pokemon)}{pokemon.name} 因 [{effect_comp.name}] 受到了 {damage} 点伤害！")
+                if self.log_enabled: events.append(ResidualDamage(self.side_of(pokemon), pokemon.name, effect_comp.name, damage))
             if 'duration' in effect_comp.data and effect_comp.data['duration'] > 0:
                 effect_comp.data['duration'] -= 1
                 if effect_comp.data['duration'] <= 0:
-                    log.append(f"  {self._get_pokemon_log_prefix(pokemon)}{pokemon.name} 的 [{effect_comp.name}] 效果结束了。")
+                    if self.log_enabled: events.append(StatusEnded(self.side_of(pokemon), pokemon.name, effect_comp.name))
                     pokemon.aura.remove_component(effect_comp)
-            elif 'clear_chance' in props and random.random() < props['clear_chance']:
-                 log.append(f"  {self._get_pokemon_log_prefix(pokemon)}{pokemon.name} 从 [{effect_comp.name}] 中恢复了！")
+            elif 'clear_chance' in props and self.rng.random() < props['clear_chance']:
+                 if self.log_enabled: events.append(StatusRecovered(self.side_of(pokemon), pokemon.name, effect_comp.name))
                  pokemon.aura.remove_component(effect_comp)
 
-    def _perform_action_attack(self, attacker: Pokemon, opponent: Optional[Pokemon], move: Move, log: list):
-        log.append(f"{self._get_pokemon_log_prefix(attacker)}{attacker.name} 使用了 {move.name}！")
-        if not opponent: log.append("  但是没有目标！"); return
+    def _perform_action_attack(
+        self, attacker: Pokemon, opponent: Optional[Pokemon], move: Move, events: List[BattleEvent], slot: Optional[int] = None,
+    ):
+        if self.log_enabled: events.append(MoveUsed(self.side_of(attacker), attacker.name, move.name))
+        if not opponent:
+            if self.log_enabled: events.append(NoTarget())
+            return
         if self._check_hit(attacker, opponent, move):
-            self.execute_effect_list(move.effects, attacker, opponent, move, log)
-        else: log.append("  但攻击落空了！")
-
-    def _perform_action_switch(self, p_out: Pokemon, p_in: Pokemon, log: list):
-        log.append(f"{self._get_pokemon_log_prefix(p_out)}收回了 {p_out.name}！"); p_out.on_switch_out(); self._clear_history_for(p_out)
+            self.acting_slot = slot
+            try:
+                self.execute_effect_list(move.pipeline, attacker, opponent, move, events)
+            finally:
+                self.acting_slot = None
+        elif self.log_enabled: events.append(MoveMissed())
+
+    def _perform_action_switch(self, p_out: Pokemon, p_in: Pokemon, events: List[BattleEvent]):
+        if self.log_enabled: events.append(SwitchedOut(self.side_of(p_out), p_out.name))
+        p_out.on_switch_out(); self._clear_history_for(p_out)
         if p_out in self.player_team: self.player_active_pokemon = p_in
         else: self.npc_active_pokemon = p_in
-        log.append(f"{self._get_pokemon_log_prefix(p_in)}去吧，{p_in.name}！")
+        if self.log_enabled: events.append(SwitchedIn(self.side_of(p_in), p_in.name))
 
-    def calculate_damage(self, attacker: Pokemon, defender: Pokemon, move: Move) -> Dict[str, Any]:
-        result = {"damage": 0, "log_msg": "", "is_crit": False};
-        if move.category == MoveCategory.STATUS: return result
-        effectiveness = TypeEffectiveness.get_effectiveness(move.type, defender.types, self.factory.get_type_chart())
+    def calculate_damage(
+        self, attacker: Pokemon, defender: Pokemon, move: Move,
+        power: Optional[int] = None, category: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        计算一次伤害。power/category 用于覆盖技能面板上的威力与类别 (技能模板不可变)。
+        返回 {"damage", "is_crit", "effectiveness"}，属性免疫时 damage 为 0、effectiveness 为 0。
+        """
+        result = {"damage": 0, "is_crit": False, "effectiveness": 1.0}
+        factors = self._damage_factors(attacker, defender, move, power, category)
+        if factors is None: return result
+        damage, effectiveness = factors
+        result["effectiveness"] = effectiveness
         if effectiveness == 0:
-            result["log_msg"] = f"这对 {self._get_pokemon_log_prefix(defender)}{defender.name} 没有任何效果！"; return result
-        attack_stat = attacker.get_modified_stat(Stat.ATTACK if move.category == MoveCategory.PHYSICAL else Stat.SPECIAL_ATTACK)
-        defense_stat = defender.get_modified_stat(Stat.DEFENSE if move.category == MoveCategory.PHYSICAL else Stat.SPECIAL_DEFENSE)
-        damage = (((2 * attacker.level / 5 + 2) * move.display_power * attack_stat / defense_stat) / 50) + 2
-        if self._check_critical_hit(attacker): damage *= 2.0; result["is_crit"] = True; result["log_msg"] += "击中了要害！"
-        damage *= random.uniform(0.85, 1.0)
+            return result
+        if self._check_critical_hit(attacker): damage *= 2.0; result["is_crit"] = True
+        damage *= self.rng.uniform(ROLL_MIN, ROLL_MAX)
         if move.type in attacker.types: damage *= 1.5
         damage *= effectiveness
-        if effectiveness > 1: result["log_msg"] += " 效果绝佳！"
-        elif effectiveness < 1: result["log_msg"] += " 效果不理想..."
-        result["damage"] = math.floor(max(1, damage)); result["log_msg"] = result["log_msg"].strip()
+        result["damage"] = math.floor(max(1, damage))
+        return result
+
+    def _damage_factors(
+        self, attacker: Pokemon, defender: Pokemon, move: Move, power: Optional[int], category: Optional[str],
+    ) -> Optional[Tuple[float, float]]:
+        """返回 (暴击与浮动前的基础伤害, 属性克制倍率)；变化类技能返回 None。"""
+        if power is None: power = move.display_power
+        if category is None: category = move.category
+        if category == MoveCategory.STATUS: return None
+        effectiveness = self.factory.get_type_effectiveness(move.type, defender.types)
+        if effectiveness == 0:
+            return 0.0, effectiveness
+        attack_stat, defense_stat = self._attack_defense_stats(attacker, defender, category)
+        return (((2 * attacker.level / 5 + 2) * power * attack_stat / defense_stat) / 50) + 2, effectiveness
+
+    @staticmethod
+    def _attack_defense_stats(attacker: Pokemon, defender: Pokemon, category: str) -> Tuple[int, int]:
+        """伤害公式使用的 (攻击方攻击/特攻, 防御方防御/特防)。"""
+        if category == MoveCategory.PHYSICAL:
+            return attacker.get_modified_stat(Stat.ATTACK), defender.get_modified_stat(Stat.DEFENSE)
+        return attacker.get_modified_stat(Stat.SPECIAL_ATTACK), defender.get_modified_stat(Stat.SPECIAL_DEFENSE)
+
+    def damage_distribution(self, attacker: Pokemon, defender: Pokemon, move: Move) -> DamageDistribution:
+        """
+        解析计算 attacker 对 defender 使用 move 的总伤害分布 (含命中率、暴击率、伤害浮动与伤害效果的触发概率)，
+        不消耗随机源，也不改变对战状态。
+        按当前的能力等级计算，不考虑同一技能中先于伤害结算的其他效果 (如先提升自身能力再攻击)。
+        """
+        result = DamageDistribution(
+            hit_chance=self.hit_chance(attacker, defender, move), crit_chance=self.critical_hit_chance(attacker),
+            stab=move.type in attacker.types, target_hp=defender.current_hp,
+        )
+        total: Dict[int, float] = {0: 1.0}
+        for effect in move.pipeline:
+            if not isinstance(effect, DealDamageEffect) or not effect.options: continue
+            factors = self._damage_factors(attacker, defender, move, effect.power, effect.category)
+            if factors is None: continue
+            damage, result.effectiveness = factors
+            if result.effectiveness == 0: continue
+            if result.stab: damage *= 1.5
+            damage *= result.effectiveness
+            # 浮动前的倍率都可以提到乘积外：floor(max(1, 基础 × 暴击 × 本系 × 克制 × U))
+            single = mix((1 - result.crit_chance, roll_distribution(damage)), (result.crit_chance, roll_distribution(damage * 2.0)))
+            chance = min(effect.chance, 1.0)
+            total = convolve(total, mix((1 - chance, {0: 1.0}), (chance, single)))
+        result.outcomes = mix((1 - result.hit_chance, {0: 1.0}), (result.hit_chance, total))
         return result
 
 
@@ -258,15 +407,25 @@ class Battle:
 
         # 规则 2: 检查防御方是否处于“闪避状态”。如果是，则无视命中率，直接落空。
         # (此检查仅在技能不是必中技能时才会执行)
-        for effect in defender.aura.get_components(StatusEffectComponent):
-            if effect.properties.get("guaranteed_evasion"):
-                return False
+        if self._is_evading(defender):
+            return False
 
         # 规则 3: 如果以上条件都不满足，则根据技能的基础命中率进行随机判定。
         # (accuracy 为 None 或 100 时，等同于必定命中)
         if move.accuracy is None:
             return True
-        return random.randint(1, 100) <= move.accuracy
+        return self.rng.randint(1, 100) <= move.accuracy
+
+    def hit_chance(self, attacker: Pokemon, defender: Pokemon, move: Move) -> float:
+        """技能的命中概率，判定规则与 _check_hit 相同。"""
+        if move.guaranteed_hit: return 1.0
+        if self._is_evading(defender): return 0.0
+        if move.accuracy is None: return 1.0
+        return min(max(move.accuracy, 0), 100) / 100
+
+    @staticmethod
+    def _is_evading(defender: Pokemon) -> bool:
+        return any(effect.properties.get("guaranteed_evasion") for effect in defender.aura.get_components(StatusEffectComponent))
 
 
     def _create_action_from_intent(self, pokemon: Pokemon, intent: Dict) -> Action:
@@ -284,7 +443,7 @@ class Battle:
         action_type = intent.get("type")
         if action_type == "attack":
             move = intent.get("data");
-            if move: return {"type": "attack", "pokemon": pokemon, "data": move, "priority": move.priority}
+            if move: return self._attack_action(pokemon, move, intent.get("slot"))
         elif action_type == "switch":
             target = intent.get("data");
             if target: return {"type": "switch", "pokemon": pokemon, "data": target, "priority": 8}
@@ -292,7 +451,13 @@ class Battle:
         logger.warning(f"宝可梦 {pokemon.name} 收到无效行动意图 ({intent.get('type')})，强制进入无法行动。")
         return {"type": "immobilized_turn", "pokemon": pokemon, "data": None, "priority": 8}
 
-    def _create_npc_action(self, pokemon: Pokemon) -> Action:
+    @staticmethod
+    def _attack_action(pokemon: Pokemon, move: Move, slot: Optional[int] = None) -> Action:
+        """使用技能的行动。未指定技能槽时使用第一个装有该技能的技能槽 (技能不在技能槽中时为 None)。"""
+        if slot is None: slot = next((s.index for s in pokemon.skill_slots if s.move is move), None)
+        return {"type": "attack", "pokemon": pokemon, "data": move, "priority": move.priority, "slot": slot}
+
+    def _create_npc_action(self, pokemon: Pokemon, intent: Optional[Dict] = None) -> Action:
         # 在回合开始创建意图时，最优先检查是否处于无法行动状态。
         immobilized = pokemon.get_effect("immobilized")
         if immobilized and immobilized.data.get("delay_activation_turns", 0) <= 0:
@@ -301,10 +466,20 @@ class Battle:
         if not pokemon.has_usable_moves():
             return {"type": "immobilized_turn", "pokemon": pokemon, "data": None, "priority": 8}
             
-        usable = [s.move for s in pokemon.skill_slots if s.move.max_pp is None or pokemon.get_current_pp(s.move.name) > 0]
-        if usable:
-            move = random.choice(usable)
-            return {"type": "attack", "pokemon": pokemon, "data": move, "priority": move.priority}
+        slot = None
+        if intent is not None and intent.get("type") == "attack" and intent.get("data"):
+            move, slot = intent["data"], intent.get("slot")
+        elif self.npc_ai is not None:
+            move = self.npc_ai.choose_move(self)
+        else:
+            usable = [s for s in pokemon.skill_slots if s.move.max_pp is None or pokemon.get_current_pp(s.move.name) > 0]
+            chosen = self.rng.choice(usable) if usable else None
+            if chosen: return self._attack_action(pokemon, chosen.move, chosen.index)
+            move = None
+        if move:
+            # 非随机决定的技能不会体现在随机数记录中，需要单独写入录像
+            if self.recorder is not None: self.recorder.record_npc_move(self, move)
+            return self._attack_action(pokemon, move, slot)
             
         logger.error(f"NPC宝可梦 {pokemon.name} 逻辑错误：未能选择技能，强制进入无法行动。")
         return {"type": "immobilized_turn", "pokemon": pokemon, "data": None, "priority": 8}
@@ -315,7 +490,7 @@ class Battle:
         if not self.is_over(): return None
         return "Player" if all(p.is_fainted() for p in self.npc_team) else "NPC"
 
-    def _get_pokemon_log_prefix(self, p: Pokemon) -> str: return "(玩家)" if p in self.player_team else "(NPC)"
+    def side_of(self, p: Pokemon) -> Side: return "player" if p in self.player_team else "npc"
 
     def get_player_survivors(self) -> List[Pokemon]: return [p for p in self.player_team if not p.is_fainted()]
 
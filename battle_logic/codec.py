@@ -0,0 +1,317 @@
+# battle_logic/codec.py
+"""
+Battle 的紧凑二进制编码，用于会话持久化、对战回放与跨进程传递。
+
+对象图本身无法高效地 pickle：宝可梦持有数据工厂的引用，Aura 持有 weakref。
+本编码只保存无法从游戏数据重新推导的状态，恢复时由数据工厂重新生成宝可梦与技能模板。
+
+格式 (小端序，整数均为 LEB128 变长编码，有符号数先做 zigzag)：
+    头部      b"PKB" | 版本 u8 | 标志 u8 (bit0: 含随机数状态, bit1: 含随机种子)
+    字符串表  数量 | (长度 | UTF-8)*      —— 物种、技能、效果ID等名称只出现一次，其余位置均引用表内下标
+    对战      回合数 | 状态 | 玩家首发下标+1 | NPC首发下标+1 (0 表示无)
+    队伍 x2   数量 | 宝可梦*
+    宝可梦    物种 | 等级 | 技能槽数量 | 技能* | 组件数量 | 组件*
+    组件      类型<<2|生命周期 (u8) | 来源技能+1 | 类型专有字段
+    行动历史  数量 | (阵营 u8 | 队伍下标 | 技能数量 | 技能*)*
+    随机数    (可选) Mersenne Twister 状态 625 x u32 | gauss_next 标志 u8 [| f64]
+    种子      (可选) 对战的初始随机种子
+"""
+from __future__ import annotations
+import random
+import struct
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TYPE_CHECKING
+
+from .aura import AuraComponent, ComponentLifespan
+from .battle import Battle
+from .components import (
+    StatusEffectComponent, StatStageComponent, DamageComponent, HealComponent,
+    PPConsumptionComponent, VolatileFlagComponent, CriticalBoostComponent,
+)
+from .constants import BattleState, Stat
+from .pokemon import Pokemon
+
+if TYPE_CHECKING:
+    from .factory import GameDataFactory
+
+MAGIC = b"PKB"
+CODEC_VERSION = 1
+_FLAG_RNG = 0x01
+_FLAG_SEED = 0x02
+
+_STATES = list(BattleState)
+_STATS = list(Stat)
+_LIFESPANS = list(ComponentLifespan)
+_MT_STATE = struct.Struct("<625I")
+_DOUBLE = struct.Struct("<d")
+
+class CodecError(ValueError):
+    """二进制数据损坏、版本不兼容或引用了不存在的游戏数据。"""
+
+class _Writer:
+    __slots__ = ("buf", "strings")
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.strings: Dict[str, int] = {}
+
+    def uint(self, value: int):
+        buf = self.buf
+        while value >= 0x80:
+            buf.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buf.append(value)
+
+    def sint(self, value: int):
+        self.uint(value << 1 if value >= 0 else (-value << 1) - 1)
+
+    def string(self, value: str):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.uint(index)
+
+    def optional_string(self, value: Optional[str]):
+        self.uint(0) if value is None else self.uint(self.strings.setdefault(value, len(self.strings)) + 1)
+
+    def value(self, value: Any):
+        """写入状态组件运行时数据中的任意标量 / 列表 / 字典。"""
+        if value is None: self.buf.append(0)
+        elif value is True: self.buf.append(1)
+        elif value is False: self.buf.append(2)
+        elif isinstance(value, int): self.buf.append(3); self.sint(value)
+        elif isinstance(value, float): self.buf.append(4); self.buf += _DOUBLE.pack(value)
+        elif isinstance(value, str): self.buf.append(5); self.string(value)
+        elif isinstance(value, (list, tuple)):
+            self.buf.append(6); self.uint(len(value))
+            for item in value: self.value(item)
+        elif isinstance(value, dict):
+            self.buf.append(7); self.uint(len(value))
+            for key, item in value.items(): self.string(key); self.value(item)
+        else:
+            raise CodecError(f"无法编码的数据类型: {type(value).__name__}")
+
+class _Reader:
+    __slots__ = ("data", "pos", "strings")
+
+    def __init__(self, data: bytes, pos: int = 0):
+        self.data = data
+        self.pos = pos
+        self.strings: List[str] = []
+
+    def u8(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def uint(self) -> int:
+        data, pos = self.data, self.pos
+        result = shift = 0
+        while True:
+            byte = data[pos]; pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80: break
+            shift += 7
+        self.pos = pos
+        return result
+
+    def sint(self) -> int:
+        value = self.uint()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def string(self) -> str:
+        return self.strings[self.uint()]
+
+    def optional_string(self) -> Optional[str]:
+        index = self.uint()
+        return self.strings[index - 1] if index else None
+
+    def value(self) -> Any:
+        tag = self.u8()
+        if tag == 0: return None
+        if tag == 1: return True
+        if tag == 2: return False
+        if tag == 3: return self.sint()
+        if tag == 4:
+            value = _DOUBLE.unpack_from(self.data, self.pos)[0]; self.pos += 8
+            return value
+        if tag == 5: return self.string()
+        if tag == 6: return [self.value() for _ in range(self.uint())]
+        if tag == 7: return {self.string(): self.value() for _ in range(self.uint())}
+        raise CodecError(f"未知的数据标签: {tag}")
+
+# --- 组件的专有字段，按类型编号注册 (编号写入数据，只能追加，不能调整顺序) ---
+
+def _write_status(w: _Writer, c: StatusEffectComponent): w.string(c.effect_id); w.value(c.data)
+def _read_status(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    effect_id = r.string()
+    component = StatusEffectComponent(effect_id, p._get_effect_props(effect_id), **kw)
+    component.data.update(r.value())
+    return component
+
+def _write_stage(w: _Writer, c: StatStageComponent): w.uint(_STATS.index(c.stat)); w.sint(c.change); w.uint(c.count)
+def _read_stage(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return StatStageComponent(_STATS[r.uint()], r.sint(), r.uint(), **kw)
+
+def _write_damage(w: _Writer, c: DamageComponent): w.sint(c.amount); w.buf.append(1 if c.is_direct else 0); w.uint(c.count)
+def _read_damage(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return DamageComponent(r.sint(), r.u8() == 1, r.uint(), **kw)
+
+def _write_heal(w: _Writer, c: HealComponent): w.sint(c.amount); w.uint(c.count)
+def _read_heal(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return HealComponent(r.sint(), r.uint(), **kw)
+
+def _write_pp(w: _Writer, c: PPConsumptionComponent): w.string(c.move_name); w.sint(c.amount); w.uint(c.count)
+def _read_pp(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return PPConsumptionComponent(r.string(), r.sint(), r.uint(), **kw)
+
+def _write_flag(w: _Writer, c: VolatileFlagComponent): w.string(c.flag_id)
+def _read_flag(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return VolatileFlagComponent(r.string(), source_move=kw["source_move"])
+
+def _write_crit(w: _Writer, c: CriticalBoostComponent): pass
+def _read_crit(r: _Reader, p: Pokemon, kw: Dict[str, Any]) -> AuraComponent:
+    return CriticalBoostComponent(**kw)
+
+_COMPONENT_TYPES: List[Tuple[Type[AuraComponent], Callable, Callable]] = [
+    (StatusEffectComponent, _write_status, _read_status),
+    (StatStageComponent, _write_stage, _read_stage),
+    (DamageComponent, _write_damage, _read_damage),
+    (HealComponent, _write_heal, _read_heal),
+    (PPConsumptionComponent, _write_pp, _read_pp),
+    (VolatileFlagComponent, _write_flag, _read_flag),
+    (CriticalBoostComponent, _write_crit, _read_crit),
+]
+_TYPE_IDS = {cls: (type_id, writer) for type_id, (cls, writer, _) in enumerate(_COMPONENT_TYPES)}
+
+# --- 编码 ---
+
+def encode_battle(battle: Battle, include_rng: bool = True) -> bytes:
+    """
+    将对战编码为二进制数据。
+
+    Args:
+        include_rng: 是否写入随机数生成器的状态 (约 2.5KB)。只有 battle.rng 是独立的 random.Random 实例时才会写入。
+    """
+    body = _Writer()
+    body.uint(battle.turn_count)
+    body.uint(_STATES.index(battle.state))
+    body.uint(battle.player_team.index(battle.player_active_pokemon) + 1 if battle.player_active_pokemon in battle.player_team else 0)
+    body.uint(battle.npc_team.index(battle.npc_active_pokemon) + 1 if battle.npc_active_pokemon in battle.npc_team else 0)
+    for team in (battle.player_team, battle.npc_team):
+        body.uint(len(team))
+        for pokemon in team:
+            _write_pokemon(body, pokemon)
+
+    history = [(side, index, battle.get_action_history_for(pokemon))
+               for side, team in enumerate((battle.player_team, battle.npc_team)) for index, pokemon in enumerate(team)]
+    history = [entry for entry in history if entry[2]]
+    body.uint(len(history))
+    for side, index, moves in history:
+        body.buf.append(side); body.uint(index); body.uint(len(moves))
+        for move in reversed(moves): body.string(move.name)
+
+    rng_state = battle.rng.getstate() if include_rng and isinstance(battle.rng, random.Random) else None
+    if rng_state is not None:
+        _, mt_state, gauss_next = rng_state
+        body.buf += _MT_STATE.pack(*mt_state)
+        if gauss_next is None: body.buf.append(0)
+        else: body.buf.append(1); body.buf += _DOUBLE.pack(gauss_next)
+    if battle.seed is not None:
+        body.sint(battle.seed)
+
+    out = _Writer()
+    out.buf += MAGIC
+    out.buf.append(CODEC_VERSION)
+    out.buf.append((_FLAG_RNG if rng_state is not None else 0) | (_FLAG_SEED if battle.seed is not None else 0))
+    out.uint(len(body.strings))
+    for text in body.strings:
+        raw = text.encode("utf-8")
+        out.uint(len(raw)); out.buf += raw
+    out.buf += body.buf
+    return bytes(out.buf)
+
+def _write_pokemon(w: _Writer, pokemon: Pokemon):
+    w.string(pokemon.name)
+    w.uint(pokemon.level)
+    w.uint(len(pokemon.skill_slots))
+    for slot in pokemon.skill_slots:
+        w.string(slot.move.name)
+    components = pokemon.aura.get_all_components()
+    w.uint(len(components))
+    for component in components:
+        type_id, write = _TYPE_IDS[type(component)]
+        w.buf.append(type_id << 2 | _LIFESPANS.index(component.lifespan))
+        w.optional_string(component.source_move)
+        write(w, component)
+
+# --- 解码 ---
+
+def decode_battle(data: bytes, factory: "GameDataFactory", **battle_kwargs: Any) -> Battle:
+    """
+    由二进制数据恢复对战。battle_kwargs 会原样传给 Battle 构造函数；
+    数据中含随机数状态且未显式传入 rng 时，恢复出的对战会从编码时的随机数状态继续。
+    """
+    if data[:3] != MAGIC:
+        raise CodecError("不是有效的对战数据。")
+    if data[3] != CODEC_VERSION:
+        raise CodecError(f"不支持的对战数据版本: {data[3]}")
+    flags = data[4]
+    r = _Reader(data, 5)
+    try:
+        for _ in range(r.uint()):
+            length = r.uint()
+            r.strings.append(data[r.pos:r.pos + length].decode("utf-8"))
+            r.pos += length
+
+        turn_count, state = r.uint(), _STATES[r.uint()]
+        player_active, npc_active = r.uint(), r.uint()
+        teams = [[_read_pokemon(r, factory) for _ in range(r.uint())] for _ in range(2)]
+
+        history = []
+        for _ in range(r.uint()):
+            side, index = r.u8(), r.uint()
+            history.append((teams[side][index], [r.string() for _ in range(r.uint())]))
+
+        rng_state = None
+        if flags & _FLAG_RNG:
+            mt_state = _MT_STATE.unpack_from(data, r.pos); r.pos += _MT_STATE.size
+            gauss_next = None
+            if r.u8():
+                gauss_next = _DOUBLE.unpack_from(data, r.pos)[0]; r.pos += 8
+            rng_state = (3, mt_state, gauss_next)
+        seed = r.sint() if flags & _FLAG_SEED else None
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise CodecError(f"对战数据已损坏: {e}") from e
+
+    restore_rng = rng_state is not None and "rng" not in battle_kwargs
+    if restore_rng:
+        battle_kwargs["rng"] = random.Random()
+        battle_kwargs["rng"].setstate(rng_state)
+    battle = Battle(teams[0], teams[1], factory, **battle_kwargs)
+    if restore_rng:
+        # 从编码时的随机数状态继续，种子仍记为对战最初的种子 (用于回放)
+        battle.seed = seed
+    battle.turn_count = turn_count
+    battle.state = state
+    battle.player_active_pokemon = teams[0][player_active - 1] if player_active else None
+    battle.npc_active_pokemon = teams[1][npc_active - 1] if npc_active else None
+    for pokemon, move_names in history:
+        for name in move_names:
+            move = factory.get_move_template(name)
+            if move: battle._record_action(pokemon, move)
+    return battle
+
+def _read_pokemon(r: _Reader, factory: "GameDataFactory") -> Pokemon:
+    name, level = r.string(), r.uint()
+    move_names = [r.string() for _ in range(r.uint())]
+    pokemon = factory.create_pokemon(name, level, move_names)
+    if pokemon is None:
+        raise CodecError(f"对战数据中存在未知宝可梦: '{name}'")
+    components = []
+    for _ in range(r.uint()):
+        header = r.u8()
+        _, _, read = _COMPONENT_TYPES[header >> 2]
+        kwargs = {"source_move": r.optional_string(), "lifespan": _LIFESPANS[header & 0x03]}
+        components.append(read(r, pokemon, kwargs))
+    pokemon.aura.restore(components)
+    return pokemon
\ No newline at end of file
@@ -6,6 +6,9 @@ from typing import Dict, Any, Optional
 
 class StatusEffectComponent(AuraComponent):
     """组件：代表一个持续的异常状态或临时效果。"""
+    __slots__ = ("effect_id", "name", "properties", "data")
+    index_key = "effect_id"
+
     def __init__(self, effect_id: str, properties: Dict[str, Any], **kwargs):
         """
         初始化状态效果组件。
@@ -18,40 +21,73 @@ class StatusEffectComponent(AuraComponent):
         self.properties = properties
         self.data: Dict[str, Any] = {}
 
+    def fork(self) -> "StatusEffectComponent":
+        # 运行时数据 (剩余回合、剩余段数等) 会在对战中被修改，分叉时需要独立的副本；效果属性只读，可以共享
+        clone = StatusEffectComponent.__new__(StatusEffectComponent)
+        clone.source_move, clone.lifespan = self.source_move, self.lifespan
+        clone.effect_id, clone.name, clone.properties = self.effect_id, self.name, self.properties
+        clone.data = dict(self.data)
+        return clone
+
 class StatStageComponent(AuraComponent):
     """组件：代表一项能力等级的变化。"""
-    def __init__(self, stat: Stat, change: int, **kwargs):
+    __slots__ = ("stat", "change", "count")
+    index_key = "stat"
+    aggregate_field = "change"
+    fold_fields = ("stat",)
+
+    def __init__(self, stat: Stat, change: int, count: int = 1, **kwargs):
         # 【最终修正】能力等级是永久的，使用基类默认的 PERMANENT 生命周期。
         # 换下场时不会被清除。
         super().__init__(**kwargs)
         self.stat = stat
         self.change = change
+        self.count = count  # 该记录代表的原始记录条数，日志压缩后的汇总记录大于1
 
 class DamageComponent(AuraComponent):
     """组件：代表一次受到的伤害。"""
-    def __init__(self, amount: int, is_direct: bool = True, **kwargs):
+    __slots__ = ("amount", "is_direct", "count")
+    aggregate_field = "amount"
+    fold_fields = ("source_move", "is_direct")
+
+    def __init__(self, amount: int, is_direct: bool = True, count: int = 1, **kwargs):
         # 伤害记录是永久的，使用默认生命周期
         super().__init__(**kwargs)
         self.amount = amount
         self.is_direct = is_direct
+        self.count = count
 
 class HealComponent(AuraComponent):
     """组件：代表一次受到的治疗。"""
-    def __init__(self, amount: int, **kwargs):
+    __slots__ = ("amount", "count")
+    aggregate_field = "amount"
+    fold_fields = ("source_move",)
+
+    def __init__(self, amount: int, count: int = 1, **kwargs):
         # 治疗记录是永久的，使用默认生命周期
         super().__init__(**kwargs)
         self.amount = amount
+        self.count = count
 
 class PPConsumptionComponent(AuraComponent):
     """组件：代表一次技能PP的消耗。"""
-    def __init__(self, move_name: str, amount: int = 1, **kwargs):
+    __slots__ = ("move_name", "amount", "count")
+    index_key = "move_name"
+    aggregate_field = "amount"
+    fold_fields = ("move_name",)
+
+    def __init__(self, move_name: str, amount: int = 1, count: int = 1, **kwargs):
         # PP消耗记录是永久的，使用默认生命周期
         super().__init__(**kwargs)
         self.move_name = move_name
         self.amount = amount
+        self.count = count
 
 class VolatileFlagComponent(AuraComponent):
     """组件：代表一个临时的、一回合的标志（如'畏缩'）。"""
+    __slots__ = ("flag_id",)
+    index_key = "flag_id"
+
     def __init__(self, flag_id: str, **kwargs):
         # 回合结束时清除
         super().__init__(lifespan=ComponentLifespan.TEMPORARY, **kwargs)
@@ -59,6 +95,8 @@ class VolatileFlagComponent(AuraComponent):
 
 class CriticalBoostComponent(AuraComponent):
     """组件：代表一个暴击率提升的标志。"""
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         # 【最终修正】暴击提升效果是永久的，使用基类默认的 PERMANENT 生命周期。
         super().__init__(**kwargs)
\ No newline at end of file
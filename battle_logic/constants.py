@@ -29,6 +29,7 @@ class TypeEffectiveness:
         """
         【已重构】计算属性克制倍率。
         现在从调用者接收克制表(chart)，而不是依赖于模块内的硬编码常量。
+        战斗中请使用 GameDataFactory.get_type_effectiveness，它基于预编译的倍率矩阵并带有缓存。
         
         Args:
             move_type: 攻击技能的属性。
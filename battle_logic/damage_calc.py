@@ -0,0 +1,87 @@
+# battle_logic/damage_calc.py
+"""
+伤害分布的解析计算，供 NPC AI、/battle calc 指令与平衡工具使用，无需成千上万次随机模拟。
+
+引擎中一次伤害为 floor(max(1, 基础伤害 × 暴击 × U × 本系加成 × 属性克制))，其中 U ~ uniform(0.85, 1.0)。
+U 是连续均匀分布，因此每个整数伤害值的概率就是 U 落入对应区间的长度占比，可以逐个整数直接算出；
+暴击、伤害效果的触发概率与命中率再以混合分布叠加，同一技能的多个伤害效果之间做卷积。
+"""
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+# 伤害浮动的区间，与 Battle.calculate_damage 中的 rng.uniform(0.85, 1.0) 一致
+ROLL_MIN, ROLL_MAX = 0.85, 1.0
+
+Distribution = Dict[int, float]
+
+def roll_distribution(damage: float) -> Distribution:
+    """
+    伤害浮动前的伤害为 damage (已乘暴击以外的全部倍率) 时，最终伤害 floor(max(1, damage × U)) 的分布。
+    """
+    lo, hi = damage * ROLL_MIN, damage * ROLL_MAX
+    if hi <= lo:
+        return {max(1, math.floor(lo)): 1.0}
+    width = hi - lo
+    result: Distribution = {}
+    for value in range(math.floor(lo), math.ceil(hi)):
+        p = (min(hi, value + 1) - max(lo, value)) / width
+        if p > 0:
+            key = max(1, value)
+            result[key] = result.get(key, 0.0) + p
+    return result
+
+def mix(*weighted: Tuple[float, Distribution]) -> Distribution:
+    """按权重混合若干分布 (权重之和应为 1)。"""
+    result: Distribution = {}
+    for weight, dist in weighted:
+        if weight <= 0: continue
+        for value, p in dist.items():
+            result[value] = result.get(value, 0.0) + weight * p
+    return result
+
+def convolve(a: Distribution, b: Distribution) -> Distribution:
+    """两次独立伤害之和的分布。"""
+    result: Distribution = {}
+    for x, px in a.items():
+        for y, py in b.items():
+            result[x + y] = result.get(x + y, 0.0) + px * py
+    return result
+
+@dataclass
+class DamageDistribution:
+    """
+    一次技能使用对目标造成的总伤害分布。
+
+    outcomes 为 {总伤害: 概率}，包含未命中、免疫与伤害效果未触发时的 0 伤害，概率之和为 1。
+    target_hp 为计算时目标的剩余HP，ko_chance 据此给出一击倒下的概率。
+    """
+    outcomes: Distribution = field(default_factory=lambda: {0: 1.0})
+    hit_chance: float = 1.0
+    crit_chance: float = 0.0
+    effectiveness: float = 1.0
+    stab: bool = False
+    target_hp: int = 0
+
+    @property
+    def expected(self) -> float:
+        return sum(value * p for value, p in self.outcomes.items())
+
+    @property
+    def min_damage(self) -> int:
+        """命中且造成伤害时的最小伤害 (不会造成伤害时为 0)。"""
+        return min((v for v in self.outcomes if v > 0), default=0)
+
+    @property
+    def max_damage(self) -> int:
+        return max(self.outcomes, default=0)
+
+    @property
+    def ko_chance(self) -> float:
+        return self.chance_at_least(self.target_hp)
+
+    def chance_at_least(self, damage: int) -> float:
+        """总伤害不低于 damage 的概率。"""
+        if damage <= 0: return 1.0
+        return min(1.0, sum(p for value, p in self.outcomes.items() if value >= damage))
\ No newline at end of file
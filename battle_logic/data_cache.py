@@ -0,0 +1,123 @@
+# battle_logic/data_cache.py
+"""
+已校验游戏数据的编译缓存，用于加快插件启动。
+
+首次加载时 GameDataFactory 用 Pydantic 逐条校验 JSON 数据，并把规范化后的结果 (已补全默认值的纯字典)
+以 marshal 格式写入缓存文件。以后启动时，只要数据文件的内容哈希与缓存中记录的一致，就直接读取缓存，
+既不重新校验，也不导入 Pydantic；任何数据文件被修改后哈希随之改变，会自动重新校验并重写缓存。
+
+marshal 的格式与 Python 版本相关，因此哈希中同时计入了缓存格式版本与解释器版本。
+缓存文件损坏、版本不符或读写失败时都只会退回到完整的校验流程，不影响插件启动。
+"""
+from __future__ import annotations
+import hashlib
+import marshal
+import os
+import sys
+from copy import deepcopy
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+
+from astrbot.api import logger
+
+# 缓存内容的结构变化时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+CACHE_FILE_NAME = "game_data.cache"
+# 编译数据的各个部分及其来源文件 (状态与临时效果两个文件合并为同一张效果表)
+SOURCES: Dict[str, Tuple[str, ...]] = {
+    "moves": ("moves.json",), "pokemon": ("pokemon.json",),
+    "effects": ("status_conditions.json", "temporary_effects.json"), "type_chart": ("type_chart.json",),
+}
+# GameDataFactory 读取的全部数据文件，均计入内容哈希
+SOURCE_FILES = tuple(name for files in SOURCES.values() for name in files)
+# 数据文件的 (修改时间, 大小)，文件不存在时为 None
+SourceStamps = Dict[str, Optional[Tuple[int, int]]]
+
+CompiledData = Dict[str, Dict[str, Any]]
+
+def source_digest(data_path: Path) -> str:
+    """数据目录下全部数据文件的内容哈希 (包含缓存格式版本与解释器版本)。文件缺失时抛出 FileNotFoundError。"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{CACHE_VERSION}:{sys.implementation.cache_tag}:{marshal.version}".encode())
+    for name in SOURCE_FILES:
+        content = (data_path / name).read_bytes()
+        h.update(f"\0{name}\0{len(content)}\0".encode()); h.update(content)
+    return h.hexdigest()
+
+def source_stamps(data_path: Path) -> SourceStamps:
+    """各数据文件当前的 (修改时间, 大小)，用于低开销地判断文件是否被修改过 (见 GameDataFactory.changed_sources)。"""
+    stamps: SourceStamps = {}
+    for name in SOURCE_FILES:
+        try:
+            st = os.stat(data_path / name)
+            stamps[name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+def load(cache_path: Path, digest: str) -> Optional[CompiledData]:
+    """读取缓存，哈希一致时返回编译好的数据，否则 (包括文件不存在或已损坏) 返回 None。"""
+    try:
+        with open(cache_path, "rb") as f:
+            payload = marshal.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"游戏数据缓存 {cache_path} 无法读取，将重新校验数据: {e}")
+        return None
+    if not isinstance(payload, dict) or payload.get("digest") != digest:
+        return None
+    return payload.get("data")
+
+def save(cache_path: Path, digest: str, data: CompiledData):
+    """写入缓存。先写临时文件再原子替换，多个进程同时启动时也不会读到写了一半的缓存。"""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            marshal.dump({"digest": digest, "data": data}, f)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"写入游戏数据缓存 {cache_path} 失败，下次启动将重新校验数据: {e}")
+        try: tmp_path.unlink()
+        except OSError: pass
+
+def read_only(value: Any) -> Any:
+    """已校验数据的深层只读副本：字典逐层包装为 MappingProxyType，列表转为元组。"""
+    if isinstance(value, dict): return MappingProxyType({k: read_only(v) for k, v in value.items()})
+    if isinstance(value, list): return tuple(read_only(v) for v in value)
+    return value
+
+class DataRecord:
+    """
+    一条已校验数据的只读视图，在运行时代替 Pydantic 数据模型：
+    字段以属性访问，嵌套的对象同样包装为 DataRecord，列表字段与 model_dump() 均返回副本。
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        object.__setattr__(self, "_data", data)
+
+    def __getattr__(self, name: str) -> Any:
+        # 以下划线开头的名称 (包括复制、序列化时探测的特殊方法) 不是数据字段
+        if name.startswith("_"): raise AttributeError(name)
+        try:
+            value = self._data[name]
+        except KeyError:
+            raise AttributeError(f"'{type(self).__name__}' 没有字段 '{name}'") from None
+        if isinstance(value, dict): return DataRecord(value)
+        # 列表字段返回副本，调用方修改返回值不会影响共享的数据
+        return deepcopy(value) if isinstance(value, list) else value
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("DataRecord 是只读的")
+
+    def __reduce__(self):
+        return (DataRecord, (self._data,))
+
+    def __repr__(self) -> str:
+        return f"DataRecord({self._data!r})"
+
+    def model_dump(self) -> Dict[str, Any]:
+        return deepcopy(self._data)
\ No newline at end of file
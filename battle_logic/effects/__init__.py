@@ -1,5 +1,7 @@
 # battle_logic/effects/__init__.py
 
+from typing import Any, Dict, Iterable, Tuple, Union
+
 from .base_effect import BaseEffect
 from .deal_damage import DealDamageEffect
 from .stat_change import StatChangeEffect
@@ -13,4 +15,22 @@ EFFECT_HANDLER_MAP = {
     "apply_status": ApplyStatusEffect,
     "restore_health": RestoreHealthEffect,
     "start_sequence": StartSequenceEffect,
-}
\ No newline at end of file
+}
+
+# 预编译的效果流水线：按顺序执行的处理器实例元组
+EffectPipeline = Tuple[BaseEffect, ...]
+
+def compile_effect_list(effect_list: Iterable[Union[Dict[str, Any], BaseEffect]]) -> EffectPipeline:
+    """
+    将JSON效果列表编译为效果流水线。
+    未知的 handler 会被丢弃 (与执行时静默跳过的旧行为一致)，已编译的处理器原样保留。
+    """
+    pipeline = []
+    for effect in effect_list or ():
+        if isinstance(effect, BaseEffect):
+            pipeline.append(effect)
+            continue
+        handler_class = EFFECT_HANDLER_MAP.get(effect.get("handler"))
+        if handler_class:
+            pipeline.append(handler_class(effect))
+    return tuple(pipeline)
\ No newline at end of file
@@ -7,17 +7,24 @@ from typing import List, Dict, TYPE_CHECKING, Any
 if TYPE_CHECKING:
     from ..pokemon import Pokemon, Move
     from ..battle import Battle
+    from ..events import BattleEvent
 
 class BaseEffect(ABC):
     """
     效果处理器的抽象基类。
-    【Aura架构版】构造函数接收Battle实例，以实现依赖注入。
-    子类通过操作宝可夢的Aura来执行效果。
+    【预编译版】每条效果数据只在数据工厂加载时实例化一次 (见 compile_effect_list)，
+    之后被所有战斗共享，因此处理器实例必须是无状态的：Battle 实例在执行时通过参数注入。
+    子类通过操作宝可夢的Aura来执行效果，并可重写 prepare() 预先解析 effect_data。
     """
-    def __init__(self, battle: 'Battle', effect_data: Dict[str, Any]):
-        self.battle = battle
+    def __init__(self, effect_data: Dict[str, Any]):
         self.effect_data = effect_data
+        # 触发概率 (0~1)，在编译时预先换算
+        self.chance: float = effect_data.get("chance", 100) / 100.0
+        self.prepare()
+
+    def prepare(self):
+        """预解析 effect_data 中的选项，避免在每次命中时重复读取字典。"""
 
     @abstractmethod
-    def execute(self, attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', log: List[str]):
+    def execute(self, battle: 'Battle', attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', events: List['BattleEvent']):
         raise NotImplementedError
\ No newline at end of file
@@ -3,10 +3,12 @@
 from __future__ import annotations
 from typing import List, TYPE_CHECKING
 from .base_effect import BaseEffect
-from copy import copy
+from ..events import DamageDealt, NoEffect
 
 if TYPE_CHECKING:
     from ..pokemon import Pokemon, Move
+    from ..battle import Battle
+    from ..events import BattleEvent
 
 class DealDamageEffect(BaseEffect):
     """
@@ -14,29 +16,26 @@ class DealDamageEffect(BaseEffect):
     它计算伤害值，然后调用目标的 take_damage 方法，
     该方法会将伤害记录为一个 DamageComponent。
     """
-    def execute(self, attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', log: List[str]):
-        options = self.effect_data.get("options")
-        if not options: return
+    def prepare(self):
+        self.options = self.effect_data.get("options")
+        if self.options:
+            self.power = self.options.get("power")
+            self.category = self.options.get("category")
 
-        # 创建一个临时技能对象以支持动态的威力或类别
-        temp_move = copy(move)
-        temp_move.display_power = options.get("power", move.display_power)
-        temp_move.category = options.get("category", move.category)
-        
-        # 通过注入的 battle 实例调用其伤害计算方法
-        damage_result = self.battle.calculate_damage(attacker, defender, temp_move)
+    def execute(self, battle: 'Battle', attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', events: List['BattleEvent']):
+        if not self.options: return
+
+        # 通过注入的 battle 实例调用其伤害计算方法，以覆盖参数的形式支持动态的威力或类别
+        damage_result = battle.calculate_damage(attacker, defender, move, power=self.power, category=self.category)
         
-        damage = damage_result.get("damage", 0)
-        damage_log = damage_result.get("log_msg", "")
+        damage = damage_result["damage"]
 
         if damage > 0:
             # 核心变化：调用pokemon上的方法，它会向Aura添加一个DamageComponent
             defender.take_damage(damage, source_move=move.name)
             
-            # 日志记录逻辑保持不变
-            prefix = self.battle._get_pokemon_log_prefix(defender)
-            log.append(f"  对 {prefix}{defender.name} 造成了 {damage} 点伤害！")
-            if damage_log: log.append(f"  ({damage_log})")
-        elif damage_log:
-            # 处理“没有效果”等情况的日志
-            log.append(f"  {damage_log}")
\ No newline at end of file
+            if battle.log_enabled:
+                events.append(DamageDealt(battle.side_of(defender), defender.name, damage, damage_result["is_crit"], damage_result["effectiveness"]))
+        elif damage_result["effectiveness"] == 0 and battle.log_enabled:
+            # 属性免疫
+            events.append(NoEffect(battle.side_of(defender), defender.name))
\ No newline at end of file
@@ -4,9 +4,12 @@ from __future__ import annotations
 import math
 from typing import List, TYPE_CHECKING
 from .base_effect import BaseEffect
+from ..events import Healed, HealthFull
 
 if TYPE_CHECKING:
     from ..pokemon import Pokemon, Move
+    from ..battle import Battle
+    from ..events import BattleEvent
 
 class RestoreHealthEffect(BaseEffect):
     """
@@ -14,14 +17,18 @@ class RestoreHealthEffect(BaseEffect):
     计算治疗量，然后调用目标的 heal 方法，
     该方法会将治疗记录为一个 HealComponent。
     """
-    def execute(self, attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', log: List[str]):
-        target = attacker if self.effect_data.get("target") == "self" else defender
+    def prepare(self):
+        self.targets_self = self.effect_data.get("target") == "self"
+        self.percentage = self.effect_data.get("percentage", 0)
+
+    def execute(self, battle: 'Battle', attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', events: List['BattleEvent']):
+        target = attacker if self.targets_self else defender
         
         if target.current_hp >= target.max_hp:
-            log.append(f"  {self.battle._get_pokemon_log_prefix(target)}{target.name}的精力已经是满的了！")
+            if battle.log_enabled: events.append(HealthFull(battle.side_of(target), target.name))
             return
 
-        percentage = self.effect_data.get("percentage", 0)
+        percentage = self.percentage
         if percentage > 0:
             heal_amount = math.floor(target.max_hp * (percentage / 100))
             old_hp = target.current_hp
@@ -29,5 +36,5 @@ class RestoreHealthEffect(BaseEffect):
             # 核心变化：调用pokemon上的方法，它会向Aura添加一个HealComponent
             target.heal(heal_amount, source_move=move.name)
             
-            hp_log = f"[{old_hp} -> {target.current_hp}/{target.max_hp}]"
-            log.append(f"  {self.battle._get_pokemon_log_prefix(target)}{target.name} 回复了 {heal_amount} 点精力！ {hp_log}")
\ No newline at end of file
+            if battle.log_enabled:
+                events.append(Healed(battle.side_of(target), target.name, heal_amount, old_hp, target.current_hp, target.max_hp))
\ No newline at end of file
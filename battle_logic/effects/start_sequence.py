@@ -3,29 +3,34 @@
 from __future__ import annotations
 from typing import List, TYPE_CHECKING
 from .base_effect import BaseEffect
+from ..events import StatusApplied
 
 if TYPE_CHECKING:
     from ..pokemon import Pokemon, Move
+    from ..battle import Battle
+    from ..events import BattleEvent
 
 class StartSequenceEffect(BaseEffect):
     """
     效果处理器：启动一个追击序列。
     """
-    def execute(self, attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', log: List[str]):
-        source_slot = next((slot for slot in attacker.skill_slots if slot.move is move), None)
-        if source_slot is None:
+    def prepare(self):
+        self.sequence_id = self.effect_data.get("sequence_id")
+        self.initial_charges = self.effect_data.get("initial_charges", 1)
+
+    def execute(self, battle: 'Battle', attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', events: List['BattleEvent']):
+        # 技能模板在技能槽间共享 (同一技能可能装在多个技能槽中)，技能槽由行动传入，不能由技能反查
+        slot_index = battle.acting_slot
+        if slot_index is None:
             # 在测试或特殊情况下，move对象可能不是来自skill_slots，这可以接受
             return
 
-        effect_id = f"sequence_slot_{source_slot.index}"
-        sequence_id_from_json = self.effect_data.get("sequence_id")
-        initial_charges = self.effect_data.get("initial_charges", 1)
-        
+        effect_id = f"sequence_slot_{slot_index}"
         sequence_data = {
-            "source_slot_index": source_slot.index,
-            "sequence_id": sequence_id_from_json,
-            "charges": initial_charges,
-            "total_charges": initial_charges,
+            "source_slot_index": slot_index,
+            "sequence_id": self.sequence_id,
+            "charges": self.initial_charges,
+            "total_charges": self.initial_charges,
         }
         
         success, message, _ = attacker.apply_effect(
@@ -36,11 +41,6 @@ class StartSequenceEffect(BaseEffect):
 
         # 【核心修复】确保即使 apply_effect 成功但 message 为空时，也有一条默认日志。
         # 这解决了 test_scenario_7 中击倒对手后日志不显示的问题。
-        if success:
-            prefix = self.battle._get_pokemon_log_prefix(attacker)
-            if message:
-                for line in message.split('\n'):
-                    log.append(f"  {prefix}{attacker.name}{line.strip()}")
-            else:
-                 # apply_effect 对于刷新效果可能不返回message，这里提供默认日志
-                log.append(f"  {prefix}{attacker.name}获得了 [序列效果] 效果！")
\ No newline at end of file
+        if success and battle.log_enabled:
+            # apply_effect 对于刷新效果可能不返回message，这里提供默认日志
+            events.append(StatusApplied(battle.side_of(attacker), attacker.name, message or "获得了 [序列效果] 效果！"))
\ No newline at end of file
@@ -1,34 +1,49 @@
 # battle_logic/effects/stat_change.py
 
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
 from .base_effect import BaseEffect
 from ..constants import Stat
+from ..events import StatChanged, InvalidStat
 
 if TYPE_CHECKING:
     from ..pokemon import Pokemon, Move
+    from ..battle import Battle
+    from ..events import BattleEvent
 
 class StatChangeEffect(BaseEffect):
     """
     【Aura架构版】效果处理器：改变能力或暴击等级。
     调用目标宝可梦的专用方法，这些方法现在负责向Aura添加StatStageComponent。
     """
-    def execute(self, attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', log: List[str]):
-        target = attacker if self.effect_data.get("target") == "self" else defender
-        
-        for change_info in self.effect_data.get("changes", []):
-            try:
-                stat_to_change = Stat(change_info["stat"])
-                change_amount = change_info["change"]
+    def prepare(self):
+        self.targets_self = self.effect_data.get("target") == "self"
+        # 预解析为 (Stat枚举, 变化量, 原始stat名)；无效的条目 Stat 为 None，执行时输出警告
+        self.changes: Tuple[Tuple[Optional[Stat], int, Optional[str]], ...] = tuple(
+            self._parse_change(change_info) for change_info in self.effect_data.get("changes", [])
+        )
+
+    @staticmethod
+    def _parse_change(change_info: dict) -> Tuple[Optional[Stat], int, Optional[str]]:
+        try:
+            return Stat(change_info["stat"]), change_info["change"], change_info["stat"]
+        except (ValueError, KeyError):
+            return None, 0, change_info.get("stat")
 
-                # 根据属性类型，调用Pokemon对象上对应的专用方法
-                if stat_to_change == Stat.CRIT_RATE:
-                    success, message = target.change_crit_stage(change_amount)
-                else:
-                    success, message = target.apply_stat_change(stat_to_change, change_amount)
+    def execute(self, battle: 'Battle', attacker: 'Pokemon', defender: 'Pokemon', move: 'Move', events: List['BattleEvent']):
+        target = attacker if self.targets_self else defender
+        
+        for stat_to_change, change_amount, raw_stat in self.changes:
+            if stat_to_change is None:
+                if battle.log_enabled:
+                    events.append(InvalidStat(raw_stat))
+                continue
 
-                if message:
-                    log.append(f"  {message}")
+            # 根据属性类型，调用Pokemon对象上对应的专用方法
+            if stat_to_change == Stat.CRIT_RATE:
+                success, message = target.change_crit_stage(change_amount)
+            else:
+                success, message = target.apply_stat_change(stat_to_change, change_amount)
 
-            except (ValueError, KeyError):
-                log.append(f"（系统警告：在moves.json中发现无效的stat名称 '{change_info.get('stat')}'）")
\ No newline at end of file
+            if message and battle.log_enabled:
+                events.append(StatChanged(battle.side_of(target), target.name, message))
\ No newline at end of file
@@ -0,0 +1,157 @@
+# battle_logic/events.py
+"""
+对战事件：引擎与效果处理器在回合中产生的结构化记录，取代直接拼接的日志字符串。
+
+事件只包含纯数据 (阵营 "player"/"npc"、宝可梦名称、数值等)，不持有任何 Pokemon 对象，
+可直接比较、保存或交给 AI 分析；只有需要给玩家看的文字时才由 battle_logic.render 渲染。
+Battle 处于无日志模式 (log_enabled=False) 时不会创建任何事件。
+"""
+from dataclasses import dataclass
+from typing import Literal
+
+Side = Literal["player", "npc"]
+
+class BattleEvent:
+    """所有对战事件的基类。"""
+    __slots__ = ()
+
+@dataclass(frozen=True, slots=True)
+class TurnStarted(BattleEvent):
+    turn: int
+
+@dataclass(frozen=True, slots=True)
+class MoveUsed(BattleEvent):
+    side: Side
+    name: str
+    move: str
+
+@dataclass(frozen=True, slots=True)
+class NoTarget(BattleEvent):
+    pass
+
+@dataclass(frozen=True, slots=True)
+class MoveMissed(BattleEvent):
+    pass
+
+@dataclass(frozen=True, slots=True)
+class CannotAct(BattleEvent):
+    """宝可梦本回合无法行动。reason: "immobilized" (无法行动状态/PP耗尽)、"flinch" (畏缩)、"paralysis" (麻痹)。"""
+    side: Side
+    name: str
+    reason: Literal["immobilized", "flinch", "paralysis"]
+
+@dataclass(frozen=True, slots=True)
+class DamageDealt(BattleEvent):
+    """技能造成的伤害。effectiveness 为属性克制倍率。"""
+    side: Side
+    name: str
+    amount: int
+    is_crit: bool = False
+    effectiveness: float = 1.0
+
+@dataclass(frozen=True, slots=True)
+class NoEffect(BattleEvent):
+    """属性免疫，技能对目标没有效果。"""
+    side: Side
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class StatusApplied(BattleEvent):
+    """状态施加成功。message 为 Pokemon.apply_effect 返回的描述 (可能包含多行，如替换状态时)。"""
+    side: Side
+    name: str
+    message: str
+
+@dataclass(frozen=True, slots=True)
+class FlagApplied(BattleEvent):
+    """一次性标志 (如畏缩) 施加成功，message 为效果数据中的 apply_log。"""
+    side: Side
+    name: str
+    flag_id: str
+    message: str
+
+@dataclass(frozen=True, slots=True)
+class StatusFailed(BattleEvent):
+    reason: str
+
+@dataclass(frozen=True, slots=True)
+class StatChanged(BattleEvent):
+    """能力等级或暴击等级变化 (含已达上限等未生效的情况)，message 为 Pokemon 返回的描述。"""
+    side: Side
+    name: str
+    message: str
+
+@dataclass(frozen=True, slots=True)
+class InvalidStat(BattleEvent):
+    """技能数据中存在无效的能力名称。"""
+    stat: str
+
+@dataclass(frozen=True, slots=True)
+class Healed(BattleEvent):
+    side: Side
+    name: str
+    amount: int
+    old_hp: int
+    new_hp: int
+    max_hp: int
+
+@dataclass(frozen=True, slots=True)
+class HealthFull(BattleEvent):
+    side: Side
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class ResidualDamage(BattleEvent):
+    """回合结束时状态 (中毒、灼伤等) 造成的伤害。"""
+    side: Side
+    name: str
+    status: str
+    amount: int
+
+@dataclass(frozen=True, slots=True)
+class StatusEnded(BattleEvent):
+    """有持续时间的状态到期。"""
+    side: Side
+    name: str
+    status: str
+
+@dataclass(frozen=True, slots=True)
+class StatusRecovered(BattleEvent):
+    """按概率解除的状态 (如冰冻) 被解除。"""
+    side: Side
+    name: str
+    status: str
+
+@dataclass(frozen=True, slots=True)
+class FollowUp(BattleEvent):
+    """追击序列的一段开始执行。"""
+    source: str
+    step: int
+    total: int
+
+@dataclass(frozen=True, slots=True)
+class SequenceEnded(BattleEvent):
+    side: Side
+    name: str
+    source: str
+
+@dataclass(frozen=True, slots=True)
+class Fainted(BattleEvent):
+    side: Side
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class SwitchedOut(BattleEvent):
+    side: Side
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class SwitchedIn(BattleEvent):
+    side: Side
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class SentOut(BattleEvent):
+    """NPC 的宝可梦倒下后自动派出下一只。"""
+    side: Side
+    name: str
\ No newline at end of file
@@ -1,78 +1,99 @@
 # battle_logic/factory.py
 import json
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from types import MappingProxyType
+from typing import Dict, Optional, List, Any, Mapping, Tuple, Sequence, Iterable
 from copy import deepcopy 
 
 from astrbot.api import logger
-from pydantic import ValidationError
 
+from . import data_cache
 from .pokemon import Pokemon
 from .move import Move
-from .data_models import MoveDataModel, PokemonDataModel
+from .effects import EffectPipeline, compile_effect_list
+from .profiling import StartupProfiler
 
 class GameDataFactory:
     """
     游戏数据工厂，负责从JSON文件加载、校验并提供所有游戏核心数据。
     这是连接数据层和领域逻辑的唯一入口，确保了数据的集中管理和一致性。
+
+    加载完成后，工厂即是一份不可变的数据快照：数据文件修改后由 reload() 生成新的工厂，而不是原地修改，
+    已开始的对战 (及其中的宝可梦) 继续使用创建时的工厂。
     """
-    def __init__(self, data_path: Path):
+    def __init__(self, data_path: Path, cache_dir: Optional[Path] = None, profiler: Optional[StartupProfiler] = None):
         """
         初始化工厂实例。
 
         Args:
             data_path: 存放所有游戏数据 (JSON文件) 的目录路径。
+            cache_dir: 编译缓存的存放目录。为 None 时不使用缓存，每次都完整校验数据。
+            profiler: 记录各加载阶段耗时的计时器，为 None 时使用独立的计时器。
         """
         self._data_path = data_path 
+        self._cache_path: Optional[Path] = cache_dir / data_cache.CACHE_FILE_NAME if cache_dir is not None else None
+        self.profiler = profiler if profiler is not None else StartupProfiler()
+        self._init_tables()
         
-        self._move_db: Dict[str, MoveDataModel] = {}
-        self._pokemon_db: Dict[str, PokemonDataModel] = {}
-        self._follow_up_sequences: Dict[str, List[List[Dict[str, Any]]]] = {}
+        # 启动数据加载流程
+        self._load_data(self._data_path)
+
+    def _init_tables(self):
+        """初始化各个数据表 (均为空)，由 __init__ 与 reload 共用。"""
+        # 加载时各数据文件的 (修改时间, 大小)，用于判断文件是否被修改过
+        self.source_stamps: data_cache.SourceStamps = {}
+        # 规范化后的全部数据，重载时未修改的部分直接沿用
+        self._compiled: data_cache.CompiledData = {}
+        # 校验后的技能与宝可梦数据 (只读视图)
+        self._move_db: Dict[str, data_cache.DataRecord] = {}
+        self._pokemon_db: Dict[str, data_cache.DataRecord] = {}
+        # 追击序列的每一段均在加载时预编译为效果流水线
+        self._follow_up_sequences: Dict[str, List[EffectPipeline]] = {}
+        # 每个技能 on_use.effects 预编译后的效果流水线
+        self._move_pipelines: Dict[str, EffectPipeline] = {}
+        # 不可变技能模板的缓存，每个技能名只构建一次
+        self._move_templates: Dict[str, Move] = {}
         
         # 新增：用于存储从多个文件加载并合并的效果属性
-        self._effects_db: Dict[str, Any] = {}
+        self._effects_db: Dict[str, Mapping[str, Any]] = {}
+        self._effects_view: Mapping[str, Mapping[str, Any]] = MappingProxyType(self._effects_db)
         # 新增：用于存储属性克制表
         self._type_chart: Dict[str, Any] = {}
-        
-        # 启动数据加载流程
-        self._load_data(self._data_path)
+        # 由属性克制表预编译而来：属性名 -> 整数下标，以及 [攻击属性][防御属性] 的倍率矩阵
+        self._type_index: Dict[str, int] = {}
+        self._type_matrix: List[List[float]] = []
+        # 按 (技能属性, 防御方属性元组) 缓存的最终倍率
+        self._effectiveness_cache: Dict[Tuple[str, Tuple[str, ...]], float] = {}
 
     def _load_data(self, data_path: Path):
         """
         【核心重构】从多个JSON文件中加载所有游戏数据，并将不同类别的效果合并。
+        配置了缓存目录且数据文件未修改时，直接读取上次校验后写入的编译缓存 (见 data_cache)。
+        各阶段的耗时计入 self.profiler。
         """
+        profiler = self.profiler
         try:
-            # 1. 加载技能数据
-            with open(data_path / "moves.json", 'r', encoding='utf-8') as f:
-                raw_moves = json.load(f)
-                for name, data in raw_moves.items():
-                    try:
-                        move_model = MoveDataModel.model_validate(data)
-                        self._move_db[name] = move_model
-                        if move_model.on_follow_up:
-                            for seq_id, steps_raw in move_model.on_follow_up.items():
-                                self._follow_up_sequences[seq_id] = [[eff.model_dump() for eff in step] for step in steps_raw]
-                    except ValidationError as e:
-                        logger.error(f"校验技能 '{name}' 数据时失败:\n{e}")
-
-            # 2. 加载宝可梦数据
-            with open(data_path / "pokemon.json", 'r', encoding='utf-8') as f:
-                raw_pokemon = json.load(f)
-                for name, data in raw_pokemon.items():
-                    try:
-                        self._pokemon_db[name] = PokemonDataModel.model_validate(data)
-                    except ValidationError as e:
-                        logger.error(f"校验宝可梦 '{name}' 数据时失败:\n{e}")
-            
-            # 3. 加载并合并所有效果数据
-            with open(data_path / "status_conditions.json", 'r', encoding='utf-8') as f:
-                self._effects_db.update(json.load(f))
-            with open(data_path / "temporary_effects.json", 'r', encoding='utf-8') as f:
-                self._effects_db.update(json.load(f))
-
-            # 4. 加载属性克制表
-            with open(data_path / "type_chart.json", 'r', encoding='utf-8') as f:
-                self._type_chart = json.load(f)
+            # 读取前记录文件状态：读取期间发生的修改会在下一次检查时被发现
+            self.source_stamps = data_cache.source_stamps(data_path)
+            compiled, digest = None, None
+            if self._cache_path is not None:
+                with profiler.phase("读取缓存"):
+                    digest = data_cache.source_digest(data_path)
+                    compiled = data_cache.load(self._cache_path, digest)
+            from_cache = compiled is not None
+            if compiled is None:
+                with profiler.phase("JSON解析"):
+                    raw = self._read_sources(data_path)
+                with profiler.phase("导入模块"):
+                    from . import data_models  # noqa: F401  Pydantic 的导入耗时单独统计
+                with profiler.phase("数据校验"):
+                    compiled, valid = self._validate_data(raw)
+                # 存在校验失败的条目时不写缓存，保证每次启动都会报告这些错误
+                if digest is not None and valid:
+                    with profiler.phase("写入缓存"):
+                        data_cache.save(self._cache_path, digest, compiled)
+            with profiler.phase("建立索引"):
+                self._apply_compiled_data(compiled)
 
         except FileNotFoundError as e:
             logger.error(f"核心游戏数据文件未找到: {e}", exc_info=True); raise
@@ -80,30 +101,182 @@ class GameDataFactory:
             logger.error(f"从 {data_path} 加载游戏数据时发生未知严重错误: {e}", exc_info=True); raise
         
         # 更新校验逻辑，确保所有数据都已加载
-        if not (self._move_db and self._pokemon_db and self._effects_db and self._type_chart):
+        if not self._is_complete():
             logger.error("数据工厂加载失败，部分或全部核心数据未能通过校验或加载。"); raise RuntimeError("宝可梦插件因数据校验失败而无法启动。")
         
         # 更新成功日志
-        logger.info(f"宝可梦数据工厂加载成功: {len(self._move_db)}技能, {len(self._pokemon_db)}宝可梦, {len(self._effects_db)}效果, {len(self._type_chart)}属性克制")
+        source = "缓存" if from_cache else "数据文件"
+        logger.info(f"宝可梦数据工厂从{source}加载成功: {len(self._move_db)}技能, {len(self._pokemon_db)}宝可梦, {len(self._effects_db)}效果, {len(self._type_chart)}属性克制")
+
+    @staticmethod
+    def _read_sources(data_path: Path, parts: Iterable[str] = data_cache.SOURCES) -> data_cache.CompiledData:
+        """读取指定部分 (默认全部) 的数据文件 (未校验)，状态与临时效果两个文件合并为同一张效果表。"""
+        raw: data_cache.CompiledData = {}
+        for part in parts:
+            merged: Dict[str, Any] = {}
+            for name in data_cache.SOURCES[part]:
+                with open(data_path / name, 'r', encoding='utf-8') as f:
+                    merged.update(json.load(f))
+            raw[part] = merged
+        return raw
+
+    @staticmethod
+    def _validate_data(raw: data_cache.CompiledData) -> Tuple[data_cache.CompiledData, bool]:
+        """
+        用 Pydantic 校验读取到的技能与宝可梦数据 (raw 中没有的部分跳过)，
+        返回 (规范化后的纯字典数据, 是否全部条目均通过校验)。
+        Pydantic 只在这里按需导入，从缓存加载时完全不需要它。
+        """
+        from pydantic import ValidationError
+        from .data_models import MoveDataModel, PokemonDataModel
+
+        compiled: data_cache.CompiledData = dict(raw)
+        valid = True
+        for part, model, label in (("moves", MoveDataModel, "技能"), ("pokemon", PokemonDataModel, "宝可梦")):
+            if part not in raw: continue
+            compiled[part] = {}
+            for name, data in raw[part].items():
+                try:
+                    compiled[part][name] = model.model_validate(data).model_dump()
+                except ValidationError as e:
+                    logger.error(f"校验{label} '{name}' 数据时失败:\n{e}"); valid = False
+        return compiled, valid
+
+    def _apply_compiled_data(self, compiled: data_cache.CompiledData):
+        """由规范化后的数据建立各个数据库，并预编译技能与追击序列的效果流水线。"""
+        self._compiled = compiled
+        for name, data in compiled["moves"].items():
+            self._move_db[name] = data_cache.DataRecord(data)
+            self._move_pipelines[name] = compile_effect_list(data["on_use"]["effects"])
+            for seq_id, steps in (data.get("on_follow_up") or {}).items():
+                self._follow_up_sequences[seq_id] = [compile_effect_list(step) for step in steps]
+        for name, data in compiled["pokemon"].items():
+            self._pokemon_db[name] = data_cache.DataRecord(data)
+        # 效果属性会被状态组件直接引用，以只读视图保存，调用方无法修改共享的数据
+        self._effects_db.update((effect_id, data_cache.read_only(props)) for effect_id, props in compiled["effects"].items())
+        self._type_chart = compiled["type_chart"]
+        self._compile_type_chart()
+
+    def _is_complete(self) -> bool:
+        return bool(self._move_db and self._pokemon_db and self._effects_db and self._type_chart)
+
+    @property
+    def data_path(self) -> Path:
+        return self._data_path
+
+    def changed_sources(self, stamps: Optional[data_cache.SourceStamps] = None) -> List[str]:
+        """
+        自本工厂加载以来被修改过 (或被删除) 的数据文件名。stamps 为 None 时读取当前的文件状态。
+        只读取文件状态，开销很小，可频繁调用。
+        """
+        if stamps is None: stamps = data_cache.source_stamps(self._data_path)
+        return [name for name in data_cache.SOURCE_FILES if stamps[name] != self.source_stamps.get(name)]
+
+    # 工厂是不可变的数据快照，无需复制：拷贝宝可梦或战斗时直接共享同一个工厂 (同 Move 模板)
+    def __copy__(self) -> "GameDataFactory":
+        return self
+
+    def __deepcopy__(self, memo: Dict) -> "GameDataFactory":
+        return self
+
+    def reload(self) -> "GameDataFactory":
+        """
+        增量重载：返回载入了最新数据文件的新工厂，本工厂保持不变；数据文件均未修改时返回本工厂。
+        只重新读取被修改的数据文件，只重新校验其中的技能或宝可梦数据，其余部分沿用本工厂已校验的结果。
+
+        数据文件无法读取、格式错误或有条目未通过校验时抛出异常 (OSError / ValueError)，
+        此时不会生成半新半旧的数据，调用方应继续使用本工厂。
+        """
+        stamps = data_cache.source_stamps(self._data_path)
+        changed = self.changed_sources(stamps)
+        if not changed: return self
+        parts = [part for part, files in data_cache.SOURCES.items() if not set(files).isdisjoint(changed)]
+        files = "、".join(changed)
+
+        factory = GameDataFactory.__new__(GameDataFactory)
+        factory._data_path, factory._cache_path, factory.profiler = self._data_path, self._cache_path, StartupProfiler()
+        factory._init_tables()
+        factory.source_stamps = stamps
+        with factory.profiler.phase("JSON解析"):
+            raw = self._read_sources(self._data_path, parts)
+        with factory.profiler.phase("数据校验"):
+            validated, valid = self._validate_data(raw)
+        if not valid:
+            raise ValueError(f"{files} 中有条目未通过校验，已保留当前数据")
+        with factory.profiler.phase("建立索引"):
+            factory._apply_compiled_data({**self._compiled, **validated})
+        if not factory._is_complete():
+            raise ValueError(f"重新加载 {files} 后数据为空，已保留当前数据")
+        if self._cache_path is not None:
+            with factory.profiler.phase("写入缓存"):
+                data_cache.save(self._cache_path, data_cache.source_digest(self._data_path), factory._compiled)
+        logger.info(f"宝可梦数据已重新加载 ({files})，耗时 {factory.profiler.report()}")
+        return factory
+
+    def _compile_type_chart(self):
+        """
+        将属性克制表预编译为整数下标的倍率矩阵。
+        判定优先级与 TypeEffectiveness.get_effectiveness 保持一致：效果绝佳 > 效果不理想 > 没有效果。
+        """
+        types = list(self._type_chart.keys())
+        for type_data in self._type_chart.values():
+            for key in ("super_effective", "not_very_effective", "no_effect"):
+                types.extend(t for t in type_data.get(key, []) if t not in types)
+        self._type_index = {t: i for i, t in enumerate(types)}
+        self._type_matrix = [[1.0] * len(types) for _ in types]
+        for attack_type, type_data in self._type_chart.items():
+            row = self._type_matrix[self._type_index[attack_type]]
+            for defend_type in types:
+                if defend_type in type_data.get("super_effective", []): row[self._type_index[defend_type]] = 2.0
+                elif defend_type in type_data.get("not_very_effective", []): row[self._type_index[defend_type]] = 0.5
+                elif defend_type in type_data.get("no_effect", []): row[self._type_index[defend_type]] = 0.0
+        self._effectiveness_cache.clear()
+
+    def get_type_effectiveness(self, move_type: str, defender_types: Sequence[str]) -> float:
+        """
+        获取技能属性对防御方 (单/双属性) 的克制倍率。
+        结果按 (技能属性, 防御方属性元组) 缓存，未命中时查预编译矩阵计算。
+        """
+        key = (move_type, tuple(defender_types))
+        cached = self._effectiveness_cache.get(key)
+        if cached is not None:
+            return cached
+        e = 1.0
+        attack_index = self._type_index.get(move_type)
+        if attack_index is not None:
+            row = self._type_matrix[attack_index]
+            for t in key[1]:
+                defend_index = self._type_index.get(t)
+                if defend_index is not None:
+                    e *= row[defend_index]
+        self._effectiveness_cache[key] = e
+        return e
 
     def get_all_pokemon_names(self) -> List[str]:
         """获取所有已加载的宝可梦名称列表。"""
         return list(self._pokemon_db.keys())
 
-    def get_pokemon_data(self, name: str) -> Optional[PokemonDataModel]:
-        """根据名称获取宝可梦的Pydantic数据模型。"""
+    def get_pokemon_data(self, name: str) -> Optional[data_cache.DataRecord]:
+        """根据名称获取宝可梦的数据 (字段与 PokemonDataModel 相同的只读视图)。"""
         return self._pokemon_db.get(name)
 
     def get_move_template(self, name: str) -> Optional[Move]:
-        """根据名称获取技能的模板实例。"""
+        """
+        根据名称获取技能的模板实例。
+        模板是不可变的共享对象，首次访问时构建并缓存，之后直接返回同一个实例。
+        """
+        template = self._move_templates.get(name)
+        if template is not None: return template
         move_model = self._move_db.get(name)
         if not move_model: return None
-        return Move(name=name, display=move_model.display.model_dump(), on_use=move_model.on_use.model_dump())
+        template = Move(name=name, display=move_model.display.model_dump(), on_use=move_model.on_use.model_dump(), pipeline=self._move_pipelines.get(name))
+        self._move_templates[name] = template
+        return template
     
     # +++ 新增的公共访问方法 +++
-    def get_effect_properties(self) -> Dict[str, Any]:
-        """获取所有效果的属性定义（已从多个文件合并）。"""
-        return self._effects_db
+    def get_effect_properties(self) -> Mapping[str, Mapping[str, Any]]:
+        """获取所有效果的属性定义（已从多个文件合并）。返回只读视图，嵌套的字典与列表同样只读。"""
+        return self._effects_view
 
     def get_type_chart(self) -> Dict[str, Any]:
         """获取属性克制表。"""
@@ -129,6 +302,6 @@ class GameDataFactory:
         # 关键一步：将工厂自身 (self) 注入到 Pokemon 实例中，使其可以访问游戏数据。
         return Pokemon(name=name, level=level, types=pokemon_data_model.types, stats=base_stats_data, move_names=move_names, factory=self)
 
-    def get_follow_up_sequence(self, sequence_id: str) -> Optional[List[List[Dict[str, Any]]]]:
-        """获取一个追击序列的具体效果步骤。"""
+    def get_follow_up_sequence(self, sequence_id: str) -> Optional[List[EffectPipeline]]:
+        """获取一个追击序列的具体效果步骤 (每一段均为预编译的效果流水线)。"""
         return self._follow_up_sequences.get(sequence_id)
\ No newline at end of file
@@ -0,0 +1,501 @@
+# battle_logic/lockstep.py
+"""
+结构数组 (struct-of-arrays) 锁步模拟引擎：把 B 场对战的状态放进 NumPy 数组 (HP、能力等级、各技能槽PP、
+状态效果、畏缩标志、追击序列剩余段数)，每一步把所有未结束的对战同时推进一回合。
+
+回合语义与 Battle.process_turn 一致：
+- 双方按 (优先级, 修正后的速度) 从高到低行动，相同时玩家先行动；没有可用技能时本回合无法行动；
+- 行动前判定畏缩与麻痹，行动后判定命中，命中后依次执行技能的效果 (各自的触发概率)；
+- 每次行动后依次结算行动方的追击序列 (Battle._process_post_action_triggers) 与对手的回合末效果
+  (Battle._resolve_end_of_turn_effects)，任意一方倒下即结束对战；回合结束时清除畏缩等回合内标志。
+双方与 BattleSimulator 一样在可用技能中随机选择。
+
+两个引擎使用不同的随机数发生器，因此只在统计意义上一致 (胜率、回合数、各技能伤害)，不逐场一致。
+本引擎只支持单挑对局 (双方各一只宝可梦，即平衡测试的两两对局) 以及数据中实际出现的机制，
+遇到不支持的机制 (多只宝可梦的队伍、无法行动计数、带运行期参数的状态、回合结束时清除的状态、
+可能同时存在的多个回合末效果、新的效果处理器等) 时抛出 UnsupportedMatchupError，调用方应改用 BattleSimulator。
+
+NumPy 是本模块的可选依赖 (同 vectorized.py)。
+"""
+from __future__ import annotations
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .battle import Battle, FOLLOW_UP_MOVE
+from .components import StatusEffectComponent
+from .constants import Stat, MoveCategory
+from .effects import (
+    BaseEffect, EffectPipeline, DealDamageEffect, StatChangeEffect, ApplyStatusEffect,
+    RestoreHealthEffect, StartSequenceEffect, compile_effect_list,
+)
+from .factory import GameDataFactory
+from .move import Move
+from .pokemon import Pokemon
+from .simulation import SimulationReport, MoveDamageStats, TeamSpec
+from .vectorized import damage_kernel
+
+PLAYER, NPC = 0, 1
+SIDES = ("player", "npc")
+# 锁步引擎跟踪的能力 (命中、闪避与暴击等级不影响任何判定，无需跟踪)
+COMBAT_STATS = (Stat.ATTACK, Stat.DEFENSE, Stat.SPECIAL_ATTACK, Stat.SPECIAL_DEFENSE, Stat.SPEED)
+_STAT_INDEX = {stat: i for i, stat in enumerate(COMBAT_STATS)}
+ATK, DEF, SPA, SPD, SPE = range(len(COMBAT_STATS))
+# 能力等级 -6..+6 对应的倍率，与 Pokemon.get_modified_stat 相同
+_STAGE_MULTIPLIERS = np.array([(2 + s) / 2 if s >= 0 else 2 / (2 - s) for s in range(-6, 7)])
+# 无法行动时的行动优先级 (同 Battle._create_action_from_intent)
+IMMOBILIZED_PRIORITY = 8
+
+class UnsupportedMatchupError(ValueError):
+    """对局包含锁步引擎不支持的机制，应改用对象引擎 (BattleSimulator) 模拟。"""
+
+# --- 编译后的效果 ---
+# 每个效果在编译时绑定攻击方与防御方 (PLAYER/NPC)，并预先算出与双方状态无关的量 (本系加成、属性克制、治疗量等)
+
+class _Op:
+    __slots__ = ("chance",)
+
+    def __init__(self, chance: float):
+        self.chance = chance
+
+class _DamageOp(_Op):
+    __slots__ = ("att", "dfn", "power", "physical", "stab", "effectiveness", "source")
+
+    def __init__(self, chance, att, dfn, power, physical, stab, effectiveness, source):
+        super().__init__(chance)
+        self.att, self.dfn, self.power, self.physical = att, dfn, power, physical
+        self.stab, self.effectiveness, self.source = stab, effectiveness, source
+
+class _StatOp(_Op):
+    __slots__ = ("target", "changes")
+
+    def __init__(self, chance, target, changes):
+        super().__init__(chance)
+        self.target, self.changes = target, changes
+
+class _StatusOp(_Op):
+    __slots__ = ("target", "effect", "derivative")
+
+    def __init__(self, chance, target, effect, derivative):
+        super().__init__(chance)
+        self.target, self.effect, self.derivative = target, effect, derivative
+
+class _FlinchOp(_Op):
+    __slots__ = ("target",)
+
+    def __init__(self, chance, target):
+        super().__init__(chance)
+        self.target = target
+
+class _HealOp(_Op):
+    __slots__ = ("target", "amount")
+
+    def __init__(self, chance, target, amount):
+        super().__init__(chance)
+        self.target, self.amount = target, amount
+
+class _SequenceOp(_Op):
+    __slots__ = ("side", "slot", "charges")
+
+    def __init__(self, chance, side, slot, charges):
+        super().__init__(chance)
+        self.side, self.slot, self.charges = side, slot, charges
+
+class _Sequence:
+    """技能槽上的追击序列：各段编译后的效果 (序列不存在时为 None，首次触发即被移除) 与总段数。"""
+    __slots__ = ("steps", "total")
+
+    def __init__(self, steps: Optional[List[List[_Op]]], total: int):
+        self.steps, self.total = steps, total
+
+class _Matchup:
+    """一个单挑对局编译后的静态数据：双方的能力值、技能槽与效果，以及涉及的全部状态效果。"""
+    def __init__(self, factory: GameDataFactory, player: Pokemon, npc: Pokemon):
+        self.factory = factory
+        self.pokemon = (player, npc)
+        self.effect_props = factory.get_effect_properties()
+        self.level = np.array([p.level for p in self.pokemon], dtype=np.float64)
+        self.max_hp = np.array([p.max_hp for p in self.pokemon], dtype=np.int64)
+        self.base = np.array([[p.stats.get(stat, 1) for stat in COMBAT_STATS] for p in self.pokemon], dtype=np.float64)
+        self.slot_count = max(len(p.skill_slots) for p in self.pokemon)
+        for p in self.pokemon:
+            if p.aura.get_components(StatusEffectComponent):
+                raise UnsupportedMatchupError(f"{p.name} 带有初始状态")
+        # 暴击率只取决于宝可梦本身 (数据中没有能提升暴击率的效果)
+        battle = Battle([player], [npc], factory, log_enabled=False)
+        self.crit_chance = [battle.critical_hit_chance(p) for p in self.pokemon]
+
+        # 状态效果表：按首次出现的顺序编号；applied_to[side] 为可能被施加到该方的状态编号
+        self.effects: List[str] = []
+        self._effect_index: Dict[str, int] = {}
+        self.applied_to: Tuple[Set[int], Set[int]] = (set(), set())
+        self.sequences: List[List[Optional[_Sequence]]] = [[None] * self.slot_count for _ in self.pokemon]
+
+        # 技能槽 (不足 slot_count 的位置视为不存在)；max_pp 为 -1 表示PP不限
+        self.slot_valid = np.zeros((2, self.slot_count), dtype=bool)
+        self.max_pp = np.full((2, self.slot_count), -1, dtype=np.int64)
+        self.priority = np.zeros((2, self.slot_count), dtype=np.int64)
+        self.ops: List[List[List[_Op]]] = [[[] for _ in range(self.slot_count)] for _ in self.pokemon]
+        for side, pokemon in enumerate(self.pokemon):
+            for k, slot in enumerate(pokemon.skill_slots):
+                move = slot.move
+                self.slot_valid[side, k] = True
+                if move.max_pp is not None: self.max_pp[side, k] = move.max_pp
+                self.priority[side, k] = move.priority
+                self.ops[side][k] = self._compile(move.pipeline, move, side, 1 - side, k)
+        # same_name[side][k][j + 1]：上一次使用的技能槽 j 与技能槽 k 的技能同名 (j = -1 表示尚未行动)
+        self.same_name = [
+            [np.array([False] + [other.move.name == slot.move.name for other in p.skill_slots]
+                      + [False] * (self.slot_count - len(p.skill_slots))) for slot in p.skill_slots]
+            for p in self.pokemon
+        ]
+
+        self._compile_effect_tables()
+
+    # --- 编译 ---
+
+    def _compile(self, pipeline: EffectPipeline, move: Move, att: int, dfn: int, slot: Optional[int] = None) -> List[_Op]:
+        """slot 为技能所在的技能槽 (同 Battle.acting_slot)，追击段中为 None。"""
+        ops: List[_Op] = []
+        for effect in pipeline:
+            op = self._compile_effect(effect, move, att, dfn, slot)
+            if op is not None: ops.append(op)
+        return ops
+
+    def _compile_effect(self, effect: BaseEffect, move: Move, att: int, dfn: int, slot: Optional[int]) -> Optional[_Op]:
+        attacker, defender = self.pokemon[att], self.pokemon[dfn]
+        chance = min(effect.chance, 1.0)
+        if isinstance(effect, DealDamageEffect):
+            if not effect.options: return None
+            power = effect.power if effect.power is not None else move.display_power
+            category = effect.category if effect.category is not None else move.category
+            # 与 Battle._damage_factors / _attack_defense_stats 的类别判定保持一致
+            if category == MoveCategory.STATUS: return None
+            effectiveness = self.factory.get_type_effectiveness(move.type, defender.types)
+            if effectiveness == 0: return None
+            return _DamageOp(chance, att, dfn, power, category == MoveCategory.PHYSICAL, move.type in attacker.types, effectiveness, move.name)
+        if isinstance(effect, StatChangeEffect):
+            target = att if effect.targets_self else dfn
+            changes = tuple((_STAT_INDEX[stat], change) for stat, change, _ in effect.changes if stat in _STAT_INDEX)
+            return _StatOp(chance, target, changes) if changes else None
+        if isinstance(effect, ApplyStatusEffect):
+            return self._compile_status(effect, chance, move, att, dfn, slot)
+        if isinstance(effect, RestoreHealthEffect):
+            target = att if effect.targets_self else dfn
+            if effect.percentage <= 0: return None
+            return _HealOp(chance, target, math.floor(self.pokemon[target].max_hp * (effect.percentage / 100)))
+        if isinstance(effect, StartSequenceEffect):
+            if slot is None: return None
+            steps = self.factory.get_follow_up_sequence(effect.sequence_id) if effect.sequence_id else None
+            sequence = _Sequence(
+                [self._compile(step, FOLLOW_UP_MOVE, att, dfn) for step in steps] if steps else None, effect.initial_charges,
+            )
+            existing = self.sequences[att][slot]
+            if existing is not None and existing.total != sequence.total:
+                raise UnsupportedMatchupError(f"技能 '{move.name}' 启动了多个不同的追击序列")
+            self.sequences[att][slot] = sequence
+            return _SequenceOp(chance, att, slot, effect.initial_charges)
+        raise UnsupportedMatchupError(f"不支持的效果处理器: {type(effect).__name__}")
+
+    def _compile_status(self, effect: ApplyStatusEffect, chance: float, move: Move, att: int, dfn: int, slot: Optional[int]) -> Optional[_Op]:
+        effect_id = effect.effect_id
+        if not effect_id: return None
+        target = dfn if effect.targets_opponent else att
+        props = self.effect_props.get(effect_id, {})
+        if props.get("category") == "volatile_flag":
+            # 回合内标志中只有畏缩会影响判定
+            return _FlinchOp(chance, target) if effect_id == "flinch" else None
+        if effect_id.startswith("sequence_slot_") or effect_id == "immobilized":
+            raise UnsupportedMatchupError(f"不支持的状态: {effect_id}")
+        if not props:
+            # 未知效果：施加总是失败
+            return None
+        if effect.options:
+            raise UnsupportedMatchupError(f"不支持带运行期参数的状态: {effect_id}")
+        if props.get("stacking_behavior", "ignore") not in ("ignore", "refresh"):
+            raise UnsupportedMatchupError(f"不支持的叠加方式: {effect_id}")
+        # 同 Pokemon.apply_effect：is_volatile 优先，其次 is_temporary 的状态在回合结束时清除，本引擎不跟踪
+        if props.get("is_temporary") and not props.get("is_volatile"):
+            raise UnsupportedMatchupError(f"不支持回合结束时清除的状态: {effect_id}")
+        index = self._register_effect(effect_id)
+        self.applied_to[target].add(index)
+        derivative = props.get("on_apply_effects")
+        # 衍生效果以被施加状态的一方为防御方执行 (见 ApplyStatusEffect.execute)
+        derivative_ops = self._compile(compile_effect_list(derivative), move, att, target, slot) if derivative else []
+        return _StatusOp(chance, target, index, derivative_ops)
+
+    def _register_effect(self, effect_id: str) -> int:
+        index = self._effect_index.get(effect_id)
+        if index is None:
+            index = self._effect_index[effect_id] = len(self.effects)
+            self.effects.append(effect_id)
+        return index
+
+    def _compile_effect_tables(self):
+        props = [self.effect_props[e] for e in self.effects]
+        self.effect_names = [p.get("name", e) for e, p in zip(self.effects, props)]
+        self.refresh = [p.get("stacking_behavior", "ignore") == "refresh" for p in props]
+        # 同一 status_type 的状态互相替换
+        self.same_type = [
+            [j for j, q in enumerate(props) if j != i and p.get("status_type") and q.get("status_type") == p.get("status_type")]
+            for i, p in enumerate(props)
+        ]
+        self.evasion = np.array([bool(p.get("guaranteed_evasion")) for p in props], dtype=bool)
+        # stat_modifiers[stat] = [(效果编号, 倍率), ...]
+        self.stat_modifiers: List[List[Tuple[int, float]]] = [[] for _ in COMBAT_STATS]
+        for i, p in enumerate(props):
+            for stat_name, factor in (p.get("stat_modifiers") or {}).items():
+                stat = next((s for s in COMBAT_STATS if s.value == stat_name), None)
+                if stat is not None: self.stat_modifiers[_STAT_INDEX[stat]].append((i, factor))
+        # 回合末效果：(效果编号, 每回合伤害 [双方各自的数值], 解除概率)
+        self.residual: List[Tuple[int, Optional[Tuple[int, int]], Optional[float]]] = []
+        for i, p in enumerate(props):
+            damage = tuple(max(1, math.floor(pk.max_hp * p["damage_per_turn"])) for pk in self.pokemon) if "damage_per_turn" in p else None
+            if damage is not None or "clear_chance" in p:
+                self.residual.append((i, damage, p.get("clear_chance")))
+        # 对象引擎按状态的施加顺序结算回合末效果，本引擎按效果编号结算：
+        # 只有同一方不会同时带有两个回合末效果 (同一 status_type 的状态互相替换) 时两者才一致
+        for side, pokemon in enumerate(self.pokemon):
+            active = [i for i, _, _ in self.residual if i in self.applied_to[side]]
+            for a, i in enumerate(active):
+                j = next((j for j in active[a + 1:] if j not in self.same_type[i]), None)
+                if j is not None:
+                    raise UnsupportedMatchupError(
+                        f"{pokemon.name} 可能同时带有回合末效果 {self.effects[i]} 与 {self.effects[j]}，结算顺序与对象引擎不一定相同"
+                    )
+        paralysis = self._effect_index.get("paralysis")
+        self.paralysis: Optional[Tuple[int, float]] = (
+            (paralysis, self.effect_props["paralysis"].get("immobility_chance", 0.25)) if paralysis is not None else None
+        )
+
+class _BattleBatch:
+    """B 场同一对局的对战的可变状态。第二维为 (玩家, NPC)。"""
+    def __init__(self, m: _Matchup, size: int, rng: np.random.Generator, max_turns: int):
+        self.m, self.size, self.rng, self.max_turns = m, size, rng, max_turns
+        # 与 Pokemon.current_hp 相同，HP 为累计治疗量减去累计伤害 (过量治疗会保留)，显示值再截取到 [0, 最大HP]
+        self.pool = np.tile(m.max_hp, (size, 1))
+        self.stage = np.zeros((size, 2, len(COMBAT_STATS)), dtype=np.int64)
+        self.pp = np.tile(m.max_pp, (size, 1, 1))
+        self.status = np.zeros((size, 2, len(m.effects)), dtype=bool)
+        self.flinch = np.zeros((size, 2), dtype=bool)
+        self.charges = np.zeros((size, 2, m.slot_count), dtype=np.int64)
+        self.last_move = np.full((size, 2), -1, dtype=np.int64)
+        self.turn = np.zeros(size, dtype=np.int64)
+        self.over = np.zeros(size, dtype=bool)
+        self.player_won = np.zeros(size, dtype=bool)
+        # (造成伤害的一方, 伤害来源) -> [次数, 总量]
+        self.damage: Dict[Tuple[int, str], List[int]] = {}
+
+    def run(self):
+        while True:
+            live = np.flatnonzero(~self.over & (self.turn < self.max_turns))
+            if not live.size: return
+            self._turn(live)
+
+    def _turn(self, idx: np.ndarray):
+        m = self.m
+        self.turn[idx] += 1
+        choice = np.stack([self._choose(idx, PLAYER), self._choose(idx, NPC)], axis=1)
+        keys = []
+        for side in (PLAYER, NPC):
+            priority = np.where(choice[:, side] >= 0, m.priority[side][np.maximum(choice[:, side], 0)], IMMOBILIZED_PRIORITY)
+            keys.append((priority, self._stat(idx, side, SPE)))
+        (p_pri, p_spe), (n_pri, n_spe) = keys
+        # sorted(..., reverse=True) 是稳定排序：优先级与速度都相同时玩家先行动
+        first = np.where((p_pri > n_pri) | ((p_pri == n_pri) & (p_spe >= n_spe)), PLAYER, NPC)
+
+        running = np.ones(len(idx), dtype=bool)
+        for actor in (first, 1 - first):
+            for side in (PLAYER, NPC):
+                sel = np.flatnonzero(running & (actor == side))
+                if not sel.size: continue
+                ended = self._act(idx[sel], side, choice[sel, side])
+                running[sel[ended]] = False
+        # 回合结束时清除回合内标志 (Pokemon.clear_turn_effects)
+        self.flinch[idx] = False
+
+    def _choose(self, idx: np.ndarray, side: int) -> np.ndarray:
+        """在有PP的技能中等概率随机选择，返回技能槽编号；没有可用技能时为 -1。"""
+        m = self.m
+        usable = m.slot_valid[side] & ((m.max_pp[side] < 0) | (self.pp[idx, side] > 0))
+        count = usable.sum(axis=1)
+        pick = np.floor(self.rng.random(len(idx)) * count).astype(np.int64)
+        choice = (np.cumsum(usable, axis=1) <= pick[:, None]).sum(axis=1)
+        return np.where(count > 0, choice, -1)
+
+    def _act(self, idx: np.ndarray, side: int, moves: np.ndarray) -> np.ndarray:
+        """side 一方在 idx 中的对战里行动 (含行动后的追击与对手的回合末效果)，返回已结束对战的掩码。"""
+        m, opponent = self.m, 1 - side
+        acting = moves >= 0
+        acting[acting] = self._can_act(idx[acting], side)
+        for k in range(m.slot_count):
+            group = idx[acting & (moves == k)]
+            if not group.size: continue
+            self.last_move[group, side] = k
+            if m.max_pp[side, k] >= 0: self.pp[group, side, k] -= 1
+            self._run_ops(m.ops[side][k], group[self._hit(group, side, k)])
+        ended = self._check_fainted(idx)
+
+        rest = ~ended
+        self._follow_ups(idx[rest], side)
+        ended[rest] = self._check_fainted(idx[rest])
+
+        rest = ~ended
+        self._resolve_end_of_turn(idx[rest], opponent)
+        ended[rest] = self._check_fainted(idx[rest])
+        return ended
+
+    def _can_act(self, idx: np.ndarray, side: int) -> np.ndarray:
+        can = ~self.flinch[idx, side]
+        if self.m.paralysis is not None:
+            effect, chance = self.m.paralysis
+            can &= ~(self.status[idx, side, effect] & (self.rng.random(len(idx)) < chance))
+        return can
+
+    def _hit(self, idx: np.ndarray, side: int, slot: int) -> np.ndarray:
+        move = self.m.pokemon[side].skill_slots[slot].move
+        if move.guaranteed_hit: return np.ones(len(idx), dtype=bool)
+        hit = ~(self.status[idx, 1 - side] & self.m.evasion).any(axis=1)
+        if move.accuracy is None: return hit
+        # randint(1, 100) <= accuracy
+        return hit & (np.floor(self.rng.random(len(idx)) * 100) + 1 <= move.accuracy)
+
+    def _check_fainted(self, idx: np.ndarray) -> np.ndarray:
+        fainted = self.pool[idx] <= 0
+        ended = fainted.any(axis=1)
+        done = idx[ended]
+        self.over[done] = True
+        # Battle.get_winner：NPC 全部倒下即玩家获胜 (双方同时倒下时也是)
+        self.player_won[done] = fainted[ended, NPC]
+        return ended
+
+    def _stat(self, idx: np.ndarray, side: int, stat: int) -> np.ndarray:
+        """修正后的能力值，与 Pokemon.get_modified_stat 相同。"""
+        value = self.m.base[side, stat] * _STAGE_MULTIPLIERS[self.stage[idx, side, stat] + 6]
+        for effect, factor in self.m.stat_modifiers[stat]:
+            value = np.where(self.status[idx, side, effect], value * factor, value)
+        return np.floor(np.maximum(value, 1))
+
+    def _record(self, side: int, source: str, hits: int, total: int):
+        if not hits: return
+        record = self.damage.setdefault((side, source), [0, 0])
+        record[0] += hits; record[1] += total
+
+    # --- 效果 ---
+
+    def _run_ops(self, ops: List[_Op], idx: np.ndarray):
+        for op in ops:
+            if not idx.size: return
+            target = idx if op.chance >= 1.0 else idx[self.rng.random(len(idx)) <= op.chance]
+            if target.size: self._apply(op, target)
+
+    def _apply(self, op: _Op, idx: np.ndarray):
+        m, n = self.m, len(idx)
+        if isinstance(op, _DamageOp):
+            attack = self._stat(idx, op.att, ATK if op.physical else SPA)
+            defense = self._stat(idx, op.dfn, DEF if op.physical else SPD)
+            crit = self.rng.random(n) < m.crit_chance[op.att]
+            damage = damage_kernel(m.level[op.att], op.power, attack, defense, op.stab, op.effectiveness, crit, self.rng.random(n))
+            self.pool[idx, op.dfn] -= damage
+            self._record(op.att, op.source, n, int(damage.sum()))
+        elif isinstance(op, _StatOp):
+            for stat, change in op.changes:
+                self.stage[idx, op.target, stat] = np.clip(self.stage[idx, op.target, stat] + change, -6, 6)
+        elif isinstance(op, _StatusOp):
+            if not m.refresh[op.effect]:
+                idx = idx[~self.status[idx, op.target, op.effect]]
+            for other in m.same_type[op.effect]:
+                self.status[idx, op.target, other] = False
+            self.status[idx, op.target, op.effect] = True
+            if op.derivative: self._run_ops(op.derivative, idx)
+        elif isinstance(op, _FlinchOp):
+            self.flinch[idx, op.target] = True
+        elif isinstance(op, _HealOp):
+            hp = np.clip(self.pool[idx, op.target], 0, m.max_hp[op.target])
+            self.pool[idx[hp < m.max_hp[op.target]], op.target] += op.amount
+        elif isinstance(op, _SequenceOp):
+            self.charges[idx, op.side, op.slot] = op.charges
+
+    def _follow_ups(self, idx: np.ndarray, side: int):
+        """行动方的追击序列，按技能槽顺序逐段结算 (同 Battle._process_post_action_triggers)。"""
+        m, opponent = self.m, 1 - side
+        last = self.last_move[idx, side] + 1
+        for k, sequence in enumerate(m.sequences[side]):
+            if sequence is None or not idx.size: continue
+            # 本回合 (或最近一次) 使用的技能启动的序列不触发；对手已倒下时不再追击
+            candidates = (self.charges[idx, side, k] > 0) & ~m.same_name[side][k][last] & (self.pool[idx, opponent] > 0)
+            group = idx[candidates]
+            if not group.size: continue
+            if sequence.steps is None:
+                self.charges[group, side, k] = 0
+                continue
+            step = sequence.total - self.charges[group, side, k]
+            for j, ops in enumerate(sequence.steps):
+                self._run_ops(ops, group[step == j])
+            self.charges[group[step < len(sequence.steps)], side, k] -= 1
+
+    def _resolve_end_of_turn(self, idx: np.ndarray, side: int):
+        """side 一方的持续伤害与状态自然解除 (同 Battle._resolve_end_of_turn_effects)。"""
+        m = self.m
+        for effect, damage, clear_chance in m.residual:
+            active = idx[self.status[idx, side, effect] & (self.pool[idx, side] > 0)]
+            if not active.size: continue
+            if damage is not None:
+                self.pool[active, side] -= damage[side]
+                self._record(1 - side, m.effect_names[effect], len(active), len(active) * damage[side])
+            if clear_chance is not None:
+                self.status[active[self.rng.random(len(active)) < clear_chance], side, effect] = False
+
+    def report(self) -> SimulationReport:
+        report = SimulationReport(battles=self.size)
+        draws = ~self.over
+        report.player_wins = int((self.over & self.player_won).sum())
+        report.npc_wins = int((self.over & ~self.player_won).sum())
+        report.draws = int(draws.sum())
+        turns, counts = np.unique(self.turn, return_counts=True)
+        report.turn_counts.update({int(t): int(c) for t, c in zip(turns, counts)})
+        for (side, source), (hits, total) in self.damage.items():
+            report.move_damage.setdefault(SIDES[side], {})[source] = MoveDamageStats(hits, total)
+        return report
+
+class LockstepSimulator:
+    """
+    锁步模拟器，接口与 BattleSimulator 相同 (队伍配置格式、SimulationReport 报告)。
+
+    Args:
+        factory: 游戏数据工厂。
+        seed: NumPy 随机数发生器的种子；相同的种子、配置与 batch_size 会得到完全相同的报告。
+        level: 双方宝可梦的等级。
+        max_turns: 单场对战的回合上限，超过后记为平局。
+        batch_size: 每批同时推进的对战数量。
+    """
+    def __init__(self, factory: GameDataFactory, seed: Optional[int] = None, level: int = 100, max_turns: int = 500, batch_size: int = 65536):
+        self.factory = factory
+        self.rng = np.random.default_rng(seed)
+        self.level = level
+        self.max_turns = max_turns
+        self.batch_size = max(1, batch_size)
+
+    def compile(self, player_spec: TeamSpec, npc_spec: TeamSpec) -> _Matchup:
+        """检查并编译对局；包含不支持的机制时抛出 UnsupportedMatchupError。"""
+        return _Matchup(self.factory, self._build(player_spec), self._build(npc_spec))
+
+    def run(self, player_spec: TeamSpec, npc_spec: TeamSpec, n: int) -> SimulationReport:
+        """模拟 n 场对战并返回汇总报告。"""
+        matchup = self.compile(player_spec, npc_spec)
+        report = SimulationReport()
+        for start in range(0, n, self.batch_size):
+            batch = _BattleBatch(matchup, min(self.batch_size, n - start), self.rng, self.max_turns)
+            batch.run()
+            report.merge(batch.report())
+        return report
+
+    def _build(self, spec: TeamSpec) -> Pokemon:
+        if len(spec) != 1:
+            raise UnsupportedMatchupError("锁步引擎只支持单挑对局 (双方各一只宝可梦)")
+        member = spec[0]
+        pokemon = self.factory.create_pokemon(member["name"], self.level, member.get("moves") or None)
+        if pokemon is None:
+            raise ValueError(f"模拟配置中存在未知宝可梦: '{member['name']}'")
+        return pokemon
\ No newline at end of file
@@ -1,24 +1,63 @@
 # battle_logic/move.py
 
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, Tuple, Any
+
+from .effects import EffectPipeline, compile_effect_list
 
 class Move:
-    def __init__(self, name: str, display: Dict[str, Any], on_use: Dict[str, Any], **kwargs):
-        self.name = name
+    """
+    技能模板。
+
+    【不可变】技能模板由数据工厂按名称构建一次并缓存，所有宝可梦、所有战斗共享同一个实例，
+    因此创建后不允许再修改任何属性。战斗中的可变数据 (如剩余PP) 记录在宝可梦的 Aura 中。
+    """
+    __slots__ = (
+        "name", "display_power", "type", "category", "description", "max_pp",
+        "priority", "accuracy", "guaranteed_hit", "effects", "pipeline",
+    )
+
+    def __init__(self, name: str, display: Dict[str, Any], on_use: Dict[str, Any], pipeline: Optional[EffectPipeline] = None, **kwargs):
+        init = object.__setattr__
+        init(self, "name", name)
         
         # 从 'display' 字典中读取面板显示属性
-        self.display_power = display.get("power", 0)
-        self.type = display.get("type", "一般")
-        self.category = display.get("category", "status")
-        self.description = display.get("description", "没有描述。")
+        init(self, "display_power", display.get("power", 0))
+        init(self, "type", display.get("type", "一般"))
+        init(self, "category", display.get("category", "status"))
+        init(self, "description", display.get("description", "没有描述。"))
 
         # 【核心修复】将PP设为可选属性，以优雅地处理“挣扎”
         # 如果JSON中没有定义pp，则max_pp为None
-        self.max_pp: Optional[int] = display.get("pp")
-        self.current_pp: Optional[int] = self.max_pp
+        init(self, "max_pp", display.get("pp"))
 
         # 从 'on_use' 字典中读取实际战斗属性
-        self.priority = on_use.get("priority", 0) # 挣扎的priority应为0
-        self.accuracy = on_use.get("accuracy", 100)
-        self.guaranteed_hit = on_use.get("guaranteed_hit", False)
-        self.effects = on_use.get("effects", [])
\ No newline at end of file
+        init(self, "priority", on_use.get("priority", 0)) # 挣扎的priority应为0
+        init(self, "accuracy", on_use.get("accuracy", 100))
+        init(self, "guaranteed_hit", on_use.get("guaranteed_hit", False))
+        effects: Tuple[Dict[str, Any], ...] = tuple(on_use.get("effects", []))
+        init(self, "effects", effects)
+        # 预编译的效果流水线；由数据工厂传入时直接复用，否则在此编译
+        init(self, "pipeline", pipeline if pipeline is not None else compile_effect_list(effects))
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError(f"技能模板 '{self.name}' 是不可变的，无法修改属性 '{key}'。")
+
+    def __delattr__(self, key: str):
+        raise AttributeError(f"技能模板 '{self.name}' 是不可变的，无法删除属性 '{key}'。")
+
+    # 不可变对象无需复制：拷贝宝可梦或战斗时直接共享同一个模板
+    def __copy__(self) -> "Move":
+        return self
+
+    def __deepcopy__(self, memo: Dict) -> "Move":
+        return self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        for slot, value in state.items():
+            object.__setattr__(self, slot, value)
+
+    def __repr__(self) -> str:
+        return f"Move({self.name!r})"
\ No newline at end of file
@@ -91,19 +91,21 @@ class Pokemon:
     # ... 其他所有方法保持不变，此处省略 ...
     @property
     def current_hp(self) -> int:
-        damage = sum(c.amount for c in self.aura.get_components(DamageComponent))
-        healed = sum(c.amount for c in self.aura.get_components(HealComponent))
+        damage = self.aura.get_total(DamageComponent)
+        healed = self.aura.get_total(HealComponent)
         return max(0, min(self.max_hp, healed - damage))
     def is_fainted(self) -> bool:
         return self.current_hp <= 0
     def get_current_pp(self, move_name: str) -> Optional[int]:
         move = self.get_move_by_name(move_name)
         if move is None or move.max_pp is None: return None
-        spent = sum(c.amount for c in self.aura.get_components(PPConsumptionComponent) if c.move_name == move_name)
+        spent = self.aura.get_total(PPConsumptionComponent, move_name)
         return move.max_pp - spent
+    def get_stat_stage(self, stat: Stat) -> int:
+        return self.aura.get_total(StatStageComponent, stat)
     def get_modified_stat(self, stat: Stat) -> int:
         base = self.stats.get(stat, 1)
-        stage = sum(c.change for c in self.aura.get_components(StatStageComponent) if c.stat == stat)
+        stage = self.get_stat_stage(stat)
         mod = (2 + stage) / 2 if stage >= 0 else 2 / (2 - stage)
         val = base * mod
         for comp in self.aura.get_components(StatusEffectComponent):
@@ -114,9 +116,9 @@ class Pokemon:
     def has_usable_moves(self) -> bool:
         return any(s.move.max_pp is None or self.get_current_pp(s.move.name) > 0 for s in self.skill_slots)
     def has_effect(self, effect_id: str) -> bool:
-        return any(c.effect_id == effect_id for c in self.aura.get_components(StatusEffectComponent))
+        return self.aura.has_components(StatusEffectComponent, effect_id)
     def get_effect(self, effect_id: str) -> Optional[StatusEffectComponent]:
-        return next((c for c in self.aura.get_components(StatusEffectComponent) if c.effect_id == effect_id), None)
+        return next(iter(self.aura.get_components_by_key(StatusEffectComponent, effect_id)), None)
     def get_effects_by_category(self, category: str) -> List[StatusEffectComponent]:
         return [c for c in self.aura.get_components(StatusEffectComponent) if c.properties.get("category") == category]
     def take_damage(self, dmg: int, source_move: Optional[str] = None):
@@ -128,12 +130,12 @@ class Pokemon:
         if move and move.max_pp is not None:
             self.aura.add_component(PPConsumptionComponent(name, source_move=name))
     def remove_effect(self, effect_id: str) -> bool:
-        components = [c for c in self.aura.get_components(StatusEffectComponent) if c.effect_id == effect_id]
+        components = self.aura.get_components_by_key(StatusEffectComponent, effect_id)
         if not components: return False
         for c in components: self.aura.remove_component(c)
         return True
     def apply_stat_change(self, stat: Stat, stages: int) -> Tuple[bool, str]:
-        current = sum(c.change for c in self.aura.get_components(StatStageComponent) if c.stat == stat)
+        current = self.get_stat_stage(stat)
         new_total = max(-6, min(6, current + stages))
         change = new_total - current
         if change == 0:
@@ -144,7 +146,7 @@ class Pokemon:
         msg += "提升了！" if change > 0 else "降低了！"
         return True, msg
     def change_crit_stage(self, stages: int) -> Tuple[bool, str]:
-        current = sum(c.change for c in self.aura.get_components(StatStageComponent) if c.stat == Stat.CRIT_RATE)
+        current = self.get_stat_stage(Stat.CRIT_RATE)
         new_total = max(0, min(3, current + stages))
         change = new_total - current
         if change == 0: return False, "的要害攻击率已无法再提升！"
@@ -173,12 +175,20 @@ class Pokemon:
         return stats
     def _initialize_moves(self, move_names: List[str], factory: 'GameDataFactory'):
         from astrbot.api import logger
-        from copy import deepcopy
         for i, name in enumerate(move_names):
+            # 技能模板不可变，所有宝可梦直接共享工厂缓存的同一实例
             template = factory.get_move_template(name)
             if template:
-                self.skill_slots.append(SkillSlot(index=i, move=deepcopy(template)))
+                self.skill_slots.append(SkillSlot(index=i, move=template))
             else:
                 logger.warning(f"未能为 {self.name} 加载技能 '{name}'.")
+    def fork(self) -> "Pokemon":
+        """复制宝可梦的可变状态 (气场、能力值)；种族值、属性、技能模板与数据工厂等不可变数据与原宝可梦共享。"""
+        clone = Pokemon.__new__(Pokemon)
+        clone.__dict__.update(self.__dict__)
+        clone.stats = dict(self.stats)
+        clone.skill_slots = list(self.skill_slots)
+        clone.aura = self.aura.fork(clone)
+        return clone
     def get_move_by_name(self, name: str) -> Optional[Move]:
         return next((s.move for s in self.skill_slots if s.move.name == name), None)
\ No newline at end of file
@@ -0,0 +1,37 @@
+# battle_logic/profiling.py
+"""
+启动耗时统计：按阶段 (导入模块、读取缓存、JSON解析、数据校验、建立索引等) 累计插件加载各部分的耗时，
+加载完成后输出一行分阶段的耗时明细，便于发现启动变慢的回归。
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+class StartupProfiler:
+    """
+    分阶段计时器。同名阶段多次进入时耗时累加，明细按阶段首次出现的顺序排列。
+
+    Args:
+        clock: 计时函数，默认为 time.perf_counter，便于测试注入。
+    """
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """统计 with 代码块的耗时，计入阶段 name (代码块抛出异常时同样计入)。"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + self.clock() - start
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self) -> str:
+        """形如 "共 35.2ms (导入模块 20.1ms, JSON解析 3.0ms, ...)" 的耗时明细。"""
+        details = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+        return f"共 {self.total * 1000:.1f}ms ({details})"
\ No newline at end of file
@@ -0,0 +1,64 @@
+# battle_logic/render.py
+"""
+对战事件 -> 回合日志文本。引擎只产生事件 (battle_logic.events)，需要展示给玩家时才调用这里的渲染函数。
+"""
+from typing import Callable, Dict, Iterable, List, Type
+
+from .events import (
+    BattleEvent, TurnStarted, MoveUsed, NoTarget, MoveMissed, CannotAct, DamageDealt, NoEffect,
+    StatusApplied, FlagApplied, StatusFailed, StatChanged, InvalidStat, Healed, HealthFull,
+    ResidualDamage, StatusEnded, StatusRecovered, FollowUp, SequenceEnded, Fainted,
+    SwitchedOut, SwitchedIn, SentOut,
+)
+
+_PREFIX = {"player": "(玩家)", "npc": "(NPC)"}
+_CANNOT_ACT = {"immobilized": "无法行动！", "flinch": "畏缩了，无法行动！", "paralysis": "全身麻痹，无法行动！"}
+
+def _who(e) -> str:
+    return f"{_PREFIX[e.side]}{e.name}"
+
+def _damage(e: DamageDealt) -> List[str]:
+    lines = [f"  对 {_who(e)} 造成了 {e.amount} 点伤害！"]
+    detail = "击中了要害！" if e.is_crit else ""
+    if e.effectiveness > 1: detail += " 效果绝佳！"
+    elif e.effectiveness < 1: detail += " 效果不理想..."
+    if detail: lines.append(f"  ({detail.strip()})")
+    return lines
+
+def _healed(e: Healed) -> List[str]:
+    return [f"  {_who(e)} 回复了 {e.amount} 点精力！ [{e.old_hp} -> {e.new_hp}/{e.max_hp}]"]
+
+# 每种事件 -> 若干行日志
+_RENDERERS: Dict[Type[BattleEvent], Callable[..., List[str]]] = {
+    TurnStarted: lambda e: [f"--- 第 {e.turn} 回合 ---"],
+    MoveUsed: lambda e: [f"{_who(e)} 使用了 {e.move}！"],
+    NoTarget: lambda e: ["  但是没有目标！"],
+    MoveMissed: lambda e: ["  但攻击落空了！"],
+    CannotAct: lambda e: [f"{_who(e)} {_CANNOT_ACT[e.reason]}"],
+    DamageDealt: _damage,
+    NoEffect: lambda e: [f"  这对 {_who(e)} 没有任何效果！"],
+    StatusApplied: lambda e: [f"  {_who(e)}{line.strip()}" for line in e.message.split("\n")],
+    FlagApplied: lambda e: [f"  {_who(e)}{e.message}"],
+    StatusFailed: lambda e: [f"  但它失败了... ({e.reason})"],
+    StatChanged: lambda e: [f"  {e.message}"],
+    InvalidStat: lambda e: [f"（系统警告：在moves.json中发现无效的stat名称 '{e.stat}'）"],
+    Healed: _healed,
+    HealthFull: lambda e: [f"  {_who(e)}的精力已经是满的了！"],
+    ResidualDamage: lambda e: [f"  {_who(e)} 因 [{e.status}] 受到了 {e.amount} 点伤害！"],
+    StatusEnded: lambda e: [f"  {_who(e)} 的 [{e.status}] 效果结束了。"],
+    StatusRecovered: lambda e: [f"  {_who(e)} 从 [{e.status}] 中恢复了！"],
+    FollowUp: lambda e: [f"  由 [{e.source}] 追击 - 第 {e.step}/{e.total} 段："],
+    SequenceEnded: lambda e: [f"  {_who(e)} 的 [{e.source}] 序列结束了。"],
+    Fainted: lambda e: [f"  {_who(e)} 倒下了！"],
+    SwitchedOut: lambda e: [f"{_PREFIX[e.side]}收回了 {e.name}！"],
+    SwitchedIn: lambda e: [f"{_PREFIX[e.side]}去吧，{e.name}！"],
+    SentOut: lambda e: [f"{_PREFIX[e.side]} 派出了新的宝可梦：{e.name}！"],
+}
+
+def render_event(event: BattleEvent) -> List[str]:
+    """将单个事件渲染为日志行。"""
+    return _RENDERERS[type(event)](event)
+
+def render_events(events: Iterable[BattleEvent]) -> str:
+    """将一个回合的事件渲染为完整的回合日志。"""
+    return "\n".join(line for event in events for line in render_event(event))
\ No newline at end of file
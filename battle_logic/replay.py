@@ -0,0 +1,246 @@
+# battle_logic/replay.py
+"""
+对战录像：记录每回合的玩家行动意图、由AI决定的NPC技能与本回合消耗的全部随机数，并可在无日志模式下快速重放到任意回合。
+
+录像只包含开局时的对战编码 (battle_logic.codec，不含随机数状态) 与一条条回合记录，不保存任何日志文本。
+重放时随机数按记录原样回放，而不是重新生成，因此：
+- 重放结果与原对战逐一对应，与随机种子、随机数算法无关；
+- 若引擎或游戏数据已改变导致本回合的随机数消耗不一致，会抛出 ReplayDivergence，而不是悄悄得到另一场对战。
+
+用法：
+    recorder = BattleRecorder.attach(battle)        # 开局时挂载，之后照常调用 battle.process_turn
+    data = recorder.journal.to_bytes()              # 随时导出 (应在两个回合之间调用)
+    battle = replay(BattleJournal.from_bytes(data), factory, until_turn=37)
+"""
+from __future__ import annotations
+import random
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Union, TYPE_CHECKING
+
+from .battle import Battle
+from .codec import CodecError, _Reader, _Writer, encode_battle, decode_battle
+
+if TYPE_CHECKING:
+    from .factory import GameDataFactory
+    from .pokemon import Pokemon, Move
+
+JOURNAL_MAGIC = b"PKR"
+JOURNAL_VERSION = 2
+
+# 回合记录的类型
+ENTRY_ATTACK = 0             # 参数: 技能名
+ENTRY_SWITCH = 1             # 参数: 换上的宝可梦在玩家队伍中的下标
+ENTRY_IMMOBILIZED = 2        # 玩家主动选择无法行动
+ENTRY_FAINT_SWITCH = 3       # 濒死替换，参数: 换上的宝可梦下标 (不消耗回合)
+
+_DOUBLE = struct.Struct("<d")
+Draw = Union[float, int]
+
+class ReplayDivergence(RuntimeError):
+    """重放时随机数的消耗与录像不一致 (引擎或游戏数据在录制后发生了变化)。"""
+
+class JournalEntry(NamedTuple):
+    kind: int
+    arg: Union[str, int, None]
+    draws: List[Draw]
+    # 非随机决定 (由 NPC AI 选出或调用方指定) 的NPC技能名；随机选出的技能已体现在 draws 中，此处为 None
+    npc_move: Optional[str] = None
+
+class BattleJournal:
+    """一场对战的录像。回合记录一经写完就被增量编码，导出的开销与对战长度无关 (仅一次内存拷贝)。"""
+    def __init__(self, initial: bytes, entries: Optional[List[JournalEntry]] = None):
+        self.initial = initial
+        self.entries: List[JournalEntry] = entries if entries is not None else []
+        self._encoded = bytearray()
+        self._encoded_count = 0
+
+    @property
+    def turns(self) -> int:
+        """录像中的回合数 (不含濒死替换)。"""
+        return sum(1 for e in self.entries if e.kind != ENTRY_FAINT_SWITCH)
+
+    def copy(self) -> "BattleJournal":
+        """录像的副本 (浅拷贝回合记录列表，已写完的回合记录不会再改变)，可以交给其他线程编码。"""
+        return BattleJournal(self.initial, list(self.entries))
+
+    def to_bytes(self) -> bytes:
+        w = _Writer()
+        w.buf = self._encoded
+        for entry in self.entries[self._encoded_count:]:
+            w.buf.append(entry.kind)
+            if entry.kind == ENTRY_ATTACK:
+                raw = entry.arg.encode("utf-8")
+                w.uint(len(raw)); w.buf += raw
+            elif entry.kind in (ENTRY_SWITCH, ENTRY_FAINT_SWITCH):
+                w.uint(entry.arg)
+            w.uint(len(entry.draws))
+            for draw in entry.draws:
+                # 浮点数为 random() 的结果，整数为 getrandbits() 的结果
+                if isinstance(draw, float): w.buf.append(0); w.buf += _DOUBLE.pack(draw)
+                else: w.buf.append(1); w.uint(draw)
+            # NPC技能名: 长度+1 | UTF-8，0 表示无
+            if entry.npc_move is None: w.uint(0)
+            else:
+                raw = entry.npc_move.encode("utf-8")
+                w.uint(len(raw) + 1); w.buf += raw
+        self._encoded_count = len(self.entries)
+
+        header = _Writer()
+        header.buf += JOURNAL_MAGIC
+        header.buf.append(JOURNAL_VERSION)
+        header.uint(len(self.initial)); header.buf += self.initial
+        header.uint(len(self.entries))
+        return bytes(header.buf) + bytes(self._encoded)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BattleJournal":
+        if data[:3] != JOURNAL_MAGIC:
+            raise CodecError("不是有效的对战录像。")
+        version = data[3]
+        if version != JOURNAL_VERSION:
+            raise CodecError(f"不支持的对战录像版本: {version}")
+        r = _Reader(data, 4)
+        try:
+            size = r.uint()
+            initial = data[r.pos:r.pos + size]; r.pos += size
+            entries = []
+            count = r.uint()
+            entries_start = r.pos
+            for _ in range(count):
+                kind, arg = r.u8(), None
+                if kind == ENTRY_ATTACK:
+                    length = r.uint()
+                    arg = data[r.pos:r.pos + length].decode("utf-8"); r.pos += length
+                elif kind in (ENTRY_SWITCH, ENTRY_FAINT_SWITCH):
+                    arg = r.uint()
+                draws: List[Draw] = []
+                for _ in range(r.uint()):
+                    if r.u8() == 0:
+                        draws.append(_DOUBLE.unpack_from(data, r.pos)[0]); r.pos += 8
+                    else:
+                        draws.append(r.uint())
+                npc_move = None
+                length = r.uint()
+                if length:
+                    npc_move = data[r.pos:r.pos + length - 1].decode("utf-8"); r.pos += length - 1
+                entries.append(JournalEntry(kind, arg, draws, npc_move))
+        except (IndexError, struct.error, UnicodeDecodeError) as e:
+            raise CodecError(f"对战录像已损坏: {e}") from e
+        journal = cls(initial, entries)
+        journal._encoded += data[entries_start:r.pos]
+        journal._encoded_count = len(entries)
+        return journal
+
+class _RecordingRandom(random.Random):
+    """与原随机源状态相同的 Random，额外把每次底层取值追加到当前回合记录中。"""
+    def __init__(self, state: Any):
+        super().__init__()
+        self.setstate(state)
+        self.sink: List[Draw] = []
+
+    def random(self) -> float:
+        value = super().random()
+        self.sink.append(value)
+        return value
+
+    def getrandbits(self, k: int) -> int:
+        value = super().getrandbits(k)
+        self.sink.append(value)
+        return value
+
+class _ReplayRandom(random.Random):
+    """按录像原样回放随机数的随机源。"""
+    def __init__(self):
+        super().__init__(0)
+        self.draws: List[Draw] = []
+        self.pos = 0
+
+    def load(self, draws: List[Draw]):
+        self.draws, self.pos = draws, 0
+
+    def _next(self, expected: type) -> Draw:
+        if self.pos >= len(self.draws) or not isinstance(self.draws[self.pos], expected):
+            raise ReplayDivergence(f"随机数消耗与录像不一致 (第 {self.pos + 1} 次取值)。")
+        value = self.draws[self.pos]
+        self.pos += 1
+        return value
+
+    def random(self) -> float:
+        return self._next(float)
+
+    def getrandbits(self, k: int) -> int:
+        return self._next(int)
+
+class BattleRecorder:
+    """挂载在 Battle 上的录像器，由 Battle.process_turn / process_faint_switch 回调。"""
+    def __init__(self, journal: BattleJournal):
+        self.journal = journal
+
+    @classmethod
+    def attach(cls, battle: Battle, journal: Optional[BattleJournal] = None) -> "BattleRecorder":
+        """
+        为对战挂载录像器。未传入 journal 时从对战的当前状态开始一份新录像；
+        传入时 (如从持久化存储恢复的会话) 在原录像之后继续记录。
+        """
+        recorder = cls(journal if journal is not None else BattleJournal(encode_battle(battle, include_rng=False)))
+        battle.rng = _RecordingRandom(battle.rng.getstate())
+        battle.recorder = recorder
+        return recorder
+
+    def record_turn(self, battle: Battle, intent: Dict[str, Any]):
+        intent_type = intent.get("type")
+        if intent_type == "attack" and intent.get("data") is not None:
+            entry = JournalEntry(ENTRY_ATTACK, intent["data"].name, [])
+        elif intent_type == "switch" and intent.get("data") in battle.player_team:
+            entry = JournalEntry(ENTRY_SWITCH, battle.player_team.index(intent["data"]), [])
+        else:
+            entry = JournalEntry(ENTRY_IMMOBILIZED, None, [])
+        self._append(battle, entry)
+
+    def record_npc_move(self, battle: Battle, move: "Move"):
+        if self.journal.entries:
+            self.journal.entries[-1] = self.journal.entries[-1]._replace(npc_move=move.name)
+
+    def record_faint_switch(self, battle: Battle, new_pokemon: "Pokemon"):
+        self._append(battle, JournalEntry(ENTRY_FAINT_SWITCH, battle.player_team.index(new_pokemon), []))
+
+    def _append(self, battle: Battle, entry: JournalEntry):
+        self.journal.entries.append(entry)
+        if isinstance(battle.rng, _RecordingRandom):
+            battle.rng.sink = entry.draws
+
+def replay(journal: BattleJournal, factory: "GameDataFactory", until_turn: Optional[int] = None) -> Battle:
+    """
+    在无日志模式下重放录像，返回重放到第 until_turn 回合结束 (None 表示全部) 时的对战。
+    返回的对战的随机源只能回放录像中的随机数；若要在此基础上继续对战，请为 battle.rng 赋一个新的 random.Random。
+    """
+    rng = _ReplayRandom()
+    battle = decode_battle(journal.initial, factory, rng=rng, log_enabled=False)
+    for entry in journal.entries:
+        if until_turn is not None and battle.turn_count >= until_turn:
+            break
+        rng.load(entry.draws)
+        if entry.kind == ENTRY_FAINT_SWITCH:
+            result = battle.process_faint_switch(battle.player_team[entry.arg])
+            if not result["success"]:
+                raise ReplayDivergence(f"第 {battle.turn_count} 回合后的濒死替换无法重放: {result['log']}")
+        else:
+            battle.process_turn(_rebuild_intent(battle, entry), _rebuild_npc_intent(battle, entry))
+        if rng.pos != len(rng.draws):
+            raise ReplayDivergence(f"第 {battle.turn_count} 回合的随机数消耗少于录像。")
+    return battle
+
+def _rebuild_intent(battle: Battle, entry: JournalEntry) -> Dict[str, Any]:
+    if entry.kind == ENTRY_ATTACK:
+        move = battle.player_active_pokemon.get_move_by_name(entry.arg) if battle.player_active_pokemon else None
+        return {"type": "attack", "data": move or battle.factory.get_move_template(entry.arg)}
+    if entry.kind == ENTRY_SWITCH:
+        return {"type": "switch", "data": battle.player_team[entry.arg]}
+    return {"type": "force_immobilized_turn", "data": None}
+
+def _rebuild_npc_intent(battle: Battle, entry: JournalEntry) -> Optional[Dict[str, Any]]:
+    if entry.npc_move is None:
+        return None
+    npc = battle.npc_active_pokemon
+    move = npc.get_move_by_name(entry.npc_move) if npc else None
+    return {"type": "attack", "data": move or battle.factory.get_move_template(entry.npc_move)}
\ No newline at end of file
@@ -0,0 +1,225 @@
+# battle_logic/simulation.py
+"""
+无日志的批量对战模拟 (蒙特卡洛)，用于平衡 moves.json 与 pokemon.json。
+
+队伍配置沿用插件后台 NPC 配置的格式：[{"name": "测试精灵", "moves": [...]}, ...]，
+moves 为空时使用宝可梦的默认技能。双方均随机选择可用技能，倒下后按队伍顺序派出下一只。
+
+ParallelBattleSimulator 将模拟任务分发到进程池，每个工作进程通过初始化函数只加载一次数据工厂。
+"""
+from __future__ import annotations
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .battle import Battle
+from .constants import BattleState
+from .components import DamageComponent
+from .factory import GameDataFactory
+from .pokemon import Pokemon
+
+TeamSpec = List[Dict[str, Any]]
+
+@dataclass
+class MoveDamageStats:
+    """单个技能 (或持续伤害来源) 的伤害统计。"""
+    hits: int = 0
+    total: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.hits if self.hits else 0.0
+
+@dataclass
+class SimulationReport:
+    """批量模拟的汇总结果。move_damage 按 "player"/"npc" 区分造成伤害的一方。"""
+    battles: int = 0
+    player_wins: int = 0
+    npc_wins: int = 0
+    draws: int = 0
+    turn_counts: Counter = field(default_factory=Counter)
+    move_damage: Dict[str, Dict[str, MoveDamageStats]] = field(default_factory=lambda: {"player": {}, "npc": {}})
+
+    @property
+    def player_win_rate(self) -> float:
+        return self.player_wins / self.battles if self.battles else 0.0
+
+    @property
+    def npc_win_rate(self) -> float:
+        return self.npc_wins / self.battles if self.battles else 0.0
+
+    @property
+    def mean_turns(self) -> float:
+        return sum(t * n for t, n in self.turn_counts.items()) / self.battles if self.battles else 0.0
+
+    def merge(self, other: "SimulationReport") -> "SimulationReport":
+        """将另一份报告累加到本报告中，返回自身。"""
+        self.battles += other.battles
+        self.player_wins += other.player_wins
+        self.npc_wins += other.npc_wins
+        self.draws += other.draws
+        self.turn_counts.update(other.turn_counts)
+        for side, moves in other.move_damage.items():
+            for move_name, stats in moves.items():
+                mine = self.move_damage.setdefault(side, {}).setdefault(move_name, MoveDamageStats())
+                mine.hits += stats.hits
+                mine.total += stats.total
+        return self
+
+class BattleSimulator:
+    """
+    在 Battle 之上运行无日志的完整对战。
+
+    Args:
+        factory: 游戏数据工厂。
+        seed: 随机种子；相同的种子与配置会得到完全相同的报告。
+        level: 双方宝可梦的等级。
+        max_turns: 单场对战的回合上限，超过后记为平局。
+    """
+    def __init__(self, factory: GameDataFactory, seed: Optional[int] = None, level: int = 100, max_turns: int = 500):
+        self.factory = factory
+        self.rng = random.Random(seed)
+        self.level = level
+        self.max_turns = max_turns
+
+    def run(self, player_spec: TeamSpec, npc_spec: TeamSpec, n: int) -> SimulationReport:
+        """模拟 n 场对战并返回汇总报告。"""
+        report = SimulationReport()
+        for _ in range(n):
+            self.run_one(player_spec, npc_spec, report)
+        return report
+
+    def run_one(self, player_spec: TeamSpec, npc_spec: TeamSpec, report: SimulationReport) -> Optional[str]:
+        """模拟一场对战，将结果计入 report，返回胜者 ("Player"/"NPC") 或平局时的 None。"""
+        # 每场对战使用由模拟器派生的独立种子，单场对战可以凭种子单独复现
+        battle = Battle(self._build_team(player_spec), self._build_team(npc_spec), self.factory, seed=self.rng.getrandbits(63), log_enabled=False)
+
+        while not battle.is_over() and battle.turn_count < self.max_turns:
+            if battle.state == BattleState.AWAITING_SWITCH:
+                battle.process_faint_switch(battle.get_player_survivors()[0])
+                continue
+            battle.process_turn(self._choose_player_intent(battle.player_active_pokemon))
+
+        winner = battle.get_winner()
+        report.battles += 1
+        report.turn_counts[battle.turn_count] += 1
+        if winner == "Player": report.player_wins += 1
+        elif winner == "NPC": report.npc_wins += 1
+        else: report.draws += 1
+        # 玩家队伍受到的伤害来自 NPC 的技能，反之亦然
+        self._collect_damage(battle.npc_team, report.move_damage.setdefault("player", {}))
+        self._collect_damage(battle.player_team, report.move_damage.setdefault("npc", {}))
+        return winner
+
+    def _build_team(self, spec: TeamSpec) -> List[Pokemon]:
+        team = []
+        for member in spec:
+            pokemon = self.factory.create_pokemon(member["name"], self.level, member.get("moves") or None)
+            if pokemon is None:
+                raise ValueError(f"模拟配置中存在未知宝可梦: '{member['name']}'")
+            team.append(pokemon)
+        return team
+
+    def _choose_player_intent(self, pokemon: Pokemon) -> Dict[str, Any]:
+        usable = [s for s in pokemon.skill_slots if s.move.max_pp is None or pokemon.get_current_pp(s.move.name) > 0]
+        if not usable:
+            return {"type": "force_immobilized_turn", "data": None}
+        slot = self.rng.choice(usable)
+        return {"type": "attack", "data": slot.move, "slot": slot.index}
+
+    @staticmethod
+    def _collect_damage(victims: List[Pokemon], stats_by_move: Dict[str, MoveDamageStats]):
+        for pokemon in victims:
+            for record in pokemon.aura.get_components(DamageComponent):
+                stats = stats_by_move.setdefault(record.source_move or "未知来源", MoveDamageStats())
+                stats.hits += record.count
+                stats.total += record.amount
+
+# --- 进程池并行模拟 ---
+
+Matchup = Tuple[TeamSpec, TeamSpec]
+# (对局键, 玩家队伍, NPC队伍, 场数, 种子, 等级, 回合上限)
+_Job = Tuple[str, TeamSpec, TeamSpec, int, int, int, int]
+
+_worker_factory: Optional[GameDataFactory] = None
+
+def _init_worker(data_path: str):
+    """进程池初始化函数：每个工作进程只加载一次数据工厂。"""
+    global _worker_factory
+    _worker_factory = GameDataFactory(Path(data_path))
+
+def _run_job(job: _Job) -> Tuple[str, SimulationReport]:
+    return _simulate_job(_worker_factory, job)
+
+def _simulate_job(factory: GameDataFactory, job: _Job) -> Tuple[str, SimulationReport]:
+    key, player_spec, npc_spec, n, seed, level, max_turns = job
+    simulator = BattleSimulator(factory, seed=seed, level=level, max_turns=max_turns)
+    return key, simulator.run(player_spec, npc_spec, n)
+
+def pairwise_matchups(factory: GameDataFactory, npc_spec: Optional[TeamSpec] = None) -> Dict[str, Matchup]:
+    """
+    生成平衡测试用的对局表。
+    未指定 npc_spec 时，返回 pokemon.json 中所有宝可梦两两之间 (使用默认技能) 的单挑对局；
+    指定时，返回每只宝可梦对阵该 NPC 队伍的对局。
+    """
+    names = factory.get_all_pokemon_names()
+    if npc_spec is not None:
+        return {name: ([{"name": name}], npc_spec) for name in names}
+    return {f"{a} vs {b}": ([{"name": a}], [{"name": b}]) for a in names for b in names if a != b}
+
+class ParallelBattleSimulator:
+    """
+    基于 ProcessPoolExecutor 的并行模拟器，默认使用全部 CPU 核心。
+
+    每个对局的 n 场模拟会被切分为若干个 chunk_size 场的任务，每个任务使用由 seed 派生的独立种子，
+    因此只要 seed 与 chunk_size 不变，结果就与工作进程数量无关。workers=1 时在当前进程内顺序执行，
+    使用本实例自己的数据工厂 (首次使用时加载，之后复用)，不会改动供工作进程使用的模块级全局。
+    """
+    def __init__(
+        self, data_path: Path, workers: Optional[int] = None, seed: Optional[int] = None,
+        level: int = 100, max_turns: int = 500, chunk_size: int = 200,
+    ):
+        self.data_path = Path(data_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.level = level
+        self.max_turns = max_turns
+        self.chunk_size = chunk_size
+        self._factory: Optional[GameDataFactory] = None
+
+    def run(self, player_spec: TeamSpec, npc_spec: TeamSpec, n: int) -> SimulationReport:
+        """并行模拟单个对局 n 场，返回合并后的报告。"""
+        return self.sweep({"": (player_spec, npc_spec)}, n)[""]
+
+    def sweep(self, matchups: Dict[str, Matchup], n: int) -> Dict[str, SimulationReport]:
+        """对每个对局各模拟 n 场，返回 {对局键: 合并后的报告}。"""
+        jobs = self._build_jobs(matchups, n)
+        reports: Dict[str, SimulationReport] = {key: SimulationReport() for key in matchups}
+        if self.workers <= 1:
+            factory = self._local_factory()
+            for job in jobs:
+                key, report = _simulate_job(factory, job)
+                reports[key].merge(report)
+            return reports
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(str(self.data_path),)) as pool:
+            for key, report in pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))):
+                reports[key].merge(report)
+        return reports
+
+    def _local_factory(self) -> GameDataFactory:
+        if self._factory is None:
+            self._factory = GameDataFactory(self.data_path)
+        return self._factory
+
+    def _build_jobs(self, matchups: Dict[str, Matchup], n: int) -> List[_Job]:
+        seed_rng = random.Random(self.seed)
+        jobs: List[_Job] = []
+        for key, (player_spec, npc_spec) in matchups.items():
+            for start in range(0, n, self.chunk_size):
+                count = min(self.chunk_size, n - start)
+                jobs.append((key, player_spec, npc_spec, count, seed_rng.getrandbits(63), self.level, self.max_turns))
+        return jobs
\ No newline at end of file
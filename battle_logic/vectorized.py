@@ -0,0 +1,111 @@
+# battle_logic/vectorized.py
+"""
+批量伤害计算内核 (NumPy)，用于蒙特卡洛模拟与平衡工具：一次数组运算算出成千上万次伤害判定。
+
+公式、运算顺序与取整方式与 Battle.calculate_damage 完全一致，相同的输入与相同的随机数得到逐位相同的结果：
+    floor(max(1, ((2 × 等级 / 5 + 2) × 威力 × 攻击 / 防御 / 50 + 2) [× 2 暴击] × U [× 1.5 本系] × 克制))
+其中 U = 0.85 + 0.15 × u，与 random.uniform(0.85, 1.0) 的实现相同。属性免疫 (克制倍率为 0) 时伤害为 0。
+
+NumPy 只是本模块的可选依赖，插件的其他部分不会导入本模块。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .constants import MoveCategory
+from .damage_calc import ROLL_MIN, ROLL_MAX
+from .effects import DealDamageEffect
+
+if TYPE_CHECKING:
+    from .battle import Battle
+    from .pokemon import Pokemon, Move
+
+# (攻击方, 防御方, 技能)
+Attack = Tuple["Pokemon", "Pokemon", "Move"]
+
+def damage_kernel(
+    level: np.ndarray, power: np.ndarray, attack: np.ndarray, defense: np.ndarray,
+    stab: np.ndarray, effectiveness: np.ndarray, crit: np.ndarray, roll_u: np.ndarray,
+) -> np.ndarray:
+    """
+    批量计算伤害。所有参数为形状相同 (或可广播) 的数组。
+
+    Args:
+        level/power/attack/defense: 攻击方等级、技能威力、攻击方 (特)攻与防御方 (特)防 (已计入能力等级)。
+        stab: 是否触发本系加成 (bool)。
+        effectiveness: 属性克制倍率，为 0 时伤害为 0。
+        crit: 是否暴击 (bool)。
+        roll_u: [0, 1) 上的均匀随机数，换算为伤害浮动 U。
+    Returns:
+        int64 伤害数组。
+    """
+    level = np.asarray(level, dtype=np.float64)
+    damage = (((2 * level / 5 + 2) * np.asarray(power, dtype=np.float64) * np.asarray(attack, dtype=np.float64)
+               / np.asarray(defense, dtype=np.float64)) / 50) + 2
+    damage = np.where(crit, damage * 2.0, damage)
+    damage = damage * (ROLL_MIN + (ROLL_MAX - ROLL_MIN) * np.asarray(roll_u, dtype=np.float64))
+    damage = np.where(stab, damage * 1.5, damage)
+    effectiveness = np.asarray(effectiveness, dtype=np.float64)
+    damage = damage * effectiveness
+    return np.where(effectiveness == 0, 0, np.floor(np.maximum(damage, 1))).astype(np.int64)
+
+@dataclass
+class DamageBatch:
+    """
+    一批伤害判定的输入数组，每个下标对应一次 (攻击方, 防御方, 技能) 的伤害计算。
+    属性免疫时 effectiveness 为 0，伤害恒为 0。
+    """
+    level: np.ndarray
+    power: np.ndarray
+    attack: np.ndarray
+    defense: np.ndarray
+    stab: np.ndarray
+    effectiveness: np.ndarray
+    crit_chance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    @classmethod
+    def from_attacks(cls, battle: "Battle", attacks: Sequence[Attack]) -> "DamageBatch":
+        """
+        按双方当前状态 (能力等级、状态修正、暴击率) 收集一组攻击的输入，口径与技能的伤害效果
+        (DealDamageEffect 以其威力与类别覆盖调用 Battle.calculate_damage) 相同。
+        没有伤害效果的技能伤害为 0；有多个伤害效果的技能无法表示为一次伤害判定，抛出 ValueError。
+        """
+        rows = []
+        for attacker, defender, move in attacks:
+            effects = [e for e in move.pipeline if isinstance(e, DealDamageEffect) and e.options]
+            if len(effects) > 1:
+                raise ValueError(f"技能 '{move.name}' 有多个伤害效果，无法表示为一次伤害判定")
+            power, category = (effects[0].power, effects[0].category) if effects else (None, MoveCategory.STATUS)
+            # 与 Battle._damage_factors 使用相同的默认值、类别判定与能力选择
+            if power is None: power = move.display_power
+            if category is None: category = move.category
+            effectiveness = 0.0 if category == MoveCategory.STATUS else battle.factory.get_type_effectiveness(move.type, defender.types)
+            attack_stat, defense_stat = battle._attack_defense_stats(attacker, defender, category)
+            rows.append((
+                attacker.level, power, attack_stat, defense_stat,
+                move.type in attacker.types, effectiveness, battle.critical_hit_chance(attacker),
+            ))
+        columns = list(zip(*rows)) if rows else [()] * 7
+        return cls(
+            level=np.array(columns[0], dtype=np.int64), power=np.array(columns[1], dtype=np.int64),
+            attack=np.array(columns[2], dtype=np.int64), defense=np.array(columns[3], dtype=np.int64),
+            stab=np.array(columns[4], dtype=bool), effectiveness=np.array(columns[5], dtype=np.float64),
+            crit_chance=np.array(columns[6], dtype=np.float64),
+        )
+
+    def damage(self, crit_u: np.ndarray, roll_u: np.ndarray) -> np.ndarray:
+        """用给定的 [0, 1) 随机数计算伤害：crit_u 小于暴击率时暴击，roll_u 决定伤害浮动。"""
+        return damage_kernel(self.level, self.power, self.attack, self.defense, self.stab, self.effectiveness, crit_u < self.crit_chance, roll_u)
+
+    def roll(self, rng: np.random.Generator, trials: Optional[int] = None) -> np.ndarray:
+        """
+        抽取随机数并计算伤害。trials 为 None 时每次攻击判定一次，返回形状 (len,)；
+        否则每次攻击独立判定 trials 次，返回形状 (trials, len)。
+        """
+        shape = (len(self),) if trials is None else (trials, len(self))
+        return self.damage(rng.random(shape), rng.random(shape))
\ No newline at end of file
@@ -0,0 +1,63 @@
+# command_executor.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+class SessionCommandExecutor:
+    """
+    指令执行器：同一会话的指令严格按到达顺序逐条执行，不同会话的指令在有界线程池中并行执行。
+
+    GameService 的方法都是同步的 (对战结算、AI 推演、持久化提交)，直接在 async 指令处理函数中调用
+    会阻塞 AstrBot 的事件循环，使所有其他聊天一起等待。执行器把这些调用放到工作线程中完成，
+    事件循环只负责等待结果。
+
+    每个会话在事件循环中对应一把 asyncio.Lock，仅在该会话有指令排队或执行时存在，执行完毕即释放，
+    因此锁的数量不会随历史会话数量增长。
+
+    Args:
+        max_workers: 工作线程数量；为 0 时不使用线程池，在事件循环中直接同步执行 (仍保证按会话串行)。
+    """
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(0, max_workers)
+        self._pool: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pokemon-command") if self.max_workers else None
+        )
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # 每个会话正在排队或执行的指令数，归零时丢弃该会话的锁
+        self._queued: Dict[str, int] = {}
+
+    async def run(self, session_id: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在会话 session_id 的执行顺序中调用 func(*args, **kwargs) 并返回其结果。"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        self._queued[session_id] = self._queued.get(session_id, 0) + 1
+        try:
+            async with lock:
+                if self._pool is None:
+                    return func(*args, **kwargs)
+                future = asyncio.get_running_loop().run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # 调用方被取消时工作线程仍在执行，等它结束后再释放锁，避免同一会话的下一条指令与之交错
+                    await asyncio.wait({future})
+                    raise
+        finally:
+            self._queued[session_id] -= 1
+            if not self._queued[session_id]:
+                del self._queued[session_id]
+                del self._locks[session_id]
+
+    @property
+    def active_sessions(self) -> int:
+        """当前有指令排队或执行中的会话数量。"""
+        return len(self._locks)
+
+    def shutdown(self, wait: bool = True):
+        """停止接收新指令；wait 为 True 时等待已提交的指令执行完毕。"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
\ No newline at end of file
@@ -0,0 +1,70 @@
+# data_watcher.py
+"""
+游戏数据热重载：修改 data 目录下的 JSON 文件后无需重启插件。
+
+- GameDataWatcher 在后台线程中定期检查数据文件的修改时间与大小 (只做 stat，开销很小)，
+  发现修改后调用 GameDataFactory.reload 增量重载：只重新读取、校验被修改的文件；
+- 重载得到的是一个新的工厂 (不可变的数据快照)，通过 on_reload 回调发布，发布只是一次引用赋值。
+  读取方每次读取一次当前工厂的引用即可，无需加锁：已开始的对战持有创建时的工厂，新对战使用新的工厂；
+- 数据有误 (JSON 格式错误、校验失败等) 时记录错误并继续使用当前数据，同一份错误的文件不会被反复重试，
+  再次修改后才重新尝试。
+"""
+import threading
+from typing import Callable, Optional
+
+from astrbot.api import logger
+
+from .battle_logic import data_cache
+from .battle_logic.factory import GameDataFactory
+
+class GameDataWatcher:
+    """
+    数据文件的轮询监视器。
+
+    Args:
+        factory: 当前使用的数据工厂。
+        on_reload: 重载成功后以新工厂为参数调用，负责把新工厂发布给读取方。
+        interval: 两次检查的间隔 (秒)。
+    """
+    def __init__(self, factory: GameDataFactory, on_reload: Callable[[GameDataFactory], None], interval: float = 2.0):
+        self.factory = factory
+        self.on_reload = on_reload
+        self.interval = interval
+        # 上一次重载失败时的文件状态，文件再次变化之前不重试
+        self._failed_stamps: Optional[data_cache.SourceStamps] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """检查一次数据文件，有修改时重载并发布新工厂。返回是否发布了新工厂。"""
+        stamps = data_cache.source_stamps(self.factory.data_path)
+        if not self.factory.changed_sources(stamps) or stamps == self._failed_stamps:
+            return False
+        try:
+            factory = self.factory.reload()
+        except Exception as e:
+            self._failed_stamps = stamps
+            logger.error(f"宝可梦插件：重新加载游戏数据失败，继续使用当前数据: {e}")
+            return False
+        self._failed_stamps = None
+        if factory is self.factory:
+            return False
+        self.factory = factory
+        self.on_reload(factory)
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="pokemon-data-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"宝可梦插件：检查游戏数据文件时出错: {e}", exc_info=True)
\ No newline at end of file
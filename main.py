@@ -1,14 +1,24 @@
 # astrbot_plugin_hapemxg_roco1/main.py
 
+import asyncio
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional, Any, List, Callable
+from typing import Dict, Optional, Any, List, TYPE_CHECKING
 
 from astrbot.api import logger, AstrBotConfig
 from astrbot.api.event import AstrMessageEvent, filter
-from astrbot.api.star import Context, Star, register
+from astrbot.api.star import Context, Star, StarTools, register
 
-from .service import GameService, ServiceResult
-from .battle_logic.factory import GameDataFactory
+# 服务层与领域层 (以及 Pydantic) 的导入较慢，推迟到插件实际加载时 (见 _ensure_loaded)
+if TYPE_CHECKING:
+    from .service import GameService, ServiceResult
+    from .persistence import WriteBehindWriter
+    from .command_executor import SessionCommandExecutor
+    from .battle_logic.factory import GameDataFactory
+    from .battle_logic.ai import ExpectimaxAI
+    from .battle_logic.profiling import StartupProfiler
+    from .data_watcher import GameDataWatcher
 
 @register("PokemonBattle", "YourName", "宝可梦对战模拟器", "24.0.0-15-GOLD-MASTER")
 class PokemonBattlePlugin(Star):
@@ -18,7 +28,9 @@ class PokemonBattlePlugin(Star):
     
     架构设计:
     - Main (本文件): 插件入口，负责处理AstrBot指令，并将业务逻辑委托给GameService。采用命令执行器模式
-      (`_execute_command`)来消除重复代码，保持指令处理函数整洁。
+      (`_execute_command`)来消除重复代码，保持指令处理函数整洁。服务调用在工作线程中按会话串行执行
+      (见 SessionCommandExecutor)，不会阻塞事件循环。
+      服务层、领域层与游戏数据延迟到插件注册后在后台加载 (见 `_ensure_loaded`)，不拖慢 AstrBot 的启动。
     - Service: 应用服务层，处理会话管理、业务流程编排和UI生成。是连接各层的桥梁。
     - UI: 表现层，负责生成所有用户可见的消息文本，与核心逻辑完全解耦。
     - Battle_Logic (领域层): 包含战斗、宝可梦、技能等核心领域模型和规则，与AstrBot框架无关，
@@ -27,31 +39,82 @@ class PokemonBattlePlugin(Star):
 
     def __init__(self, context: Context, config: AstrBotConfig):
         """
-        初始化插件，加载数据，并准备服务。
+        初始化插件。这里只解析配置，不加载游戏数据，以免拖慢 AstrBot 的启动：
+        服务层、领域层与游戏数据在插件注册后由后台任务加载 (见 initialize)，
+        若在此之前就收到指令，则由第一条指令触发加载。
         """
         super().__init__(context)
-        self.factory: Optional[GameDataFactory] = None
-        self.service: Optional[GameService] = None
+        self._config = config
+        self._factory: Optional["GameDataFactory"] = None
+        self._service: Optional["GameService"] = None
+        self._executor: Optional["SessionCommandExecutor"] = None
+        self._watcher: Optional["GameDataWatcher"] = None
+        # 延迟加载的状态：加载只进行一次，后台任务与指令可能同时触发，由锁保证互斥
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._load_task: Optional[asyncio.Task] = None
+        # 最近一次加载的分阶段耗时 (导入模块、读取缓存、JSON解析、数据校验、建立索引等)
+        self.startup_profiler: Optional["StartupProfiler"] = None
         # 【修复】将 npc_team_config_list 声明为实例属性，确保其生命周期与插件实例一致。
-        self.npc_team_config_list: List[Dict[str, Any]] = []
+        self.npc_team_config_list: List[Dict[str, Any]] = self._parse_npc_config(config)
 
-        try:
-            # 1. 初始化数据工厂
-            data_path = Path(__file__).parent / "data"
-            self.factory = GameDataFactory(data_path)
-            
-            # 2. 解析NPC配置并赋值给实例属性
-            self.npc_team_config_list = self._parse_npc_config(config)
-            
-            # 3. 初始化核心服务，使用实例属性进行配置
-            self.service = GameService(self.factory, self.npc_team_config_list)
-            
-            logger.info("宝可梦插件服务启动成功。")
-        except Exception as e:
-            # 如果任何步骤失败，记录详细错误并阻止插件服务启动
-            logger.error(f"宝可梦插件因初始化失败而无法启动: {e}", exc_info=True)
-            # 将service置为None，以便后续指令能够安全地失败并提示用户
-            self.service = None
+    async def initialize(self):
+        """插件注册完成后，在后台线程中加载服务与游戏数据，不阻塞其他插件的加载。"""
+        self._load_task = asyncio.create_task(asyncio.to_thread(self._ensure_loaded))
+
+    @property
+    def factory(self) -> Optional["GameDataFactory"]:
+        self._ensure_loaded(); return self._factory
+
+    @property
+    def service(self) -> Optional["GameService"]:
+        self._ensure_loaded(); return self._service
+
+    @property
+    def executor(self) -> Optional["SessionCommandExecutor"]:
+        self._ensure_loaded(); return self._executor
+
+    def _ensure_loaded(self):
+        """加载服务与游戏数据 (只进行一次)，完成后输出分阶段的启动耗时。加载失败时服务保持为 None。"""
+        if self._loaded: return
+        with self._load_lock:
+            if self._loaded: return
+            from .battle_logic.profiling import StartupProfiler
+            profiler = StartupProfiler()
+            try:
+                with profiler.phase("导入模块"):
+                    from .service import GameService
+                    from .command_executor import SessionCommandExecutor
+                    from .battle_logic.factory import GameDataFactory
+                config = self._config
+
+                # 1. 初始化数据工厂 (读取缓存、JSON解析、数据校验、建立索引等阶段由工厂自行计时)
+                data_path = Path(__file__).parent / "data"
+                self._factory = GameDataFactory(data_path, cache_dir=self._get_cache_dir(), profiler=profiler)
+
+                # 2. 初始化核心服务
+                with profiler.phase("创建服务"):
+                    session_ttl_seconds = self._parse_int_config(config, "session_idle_ttl_minutes", 30) * 60
+                    self._service = GameService(
+                        self._factory, self.npc_team_config_list,
+                        session_ttl_seconds=session_ttl_seconds,
+                        max_sessions=self._parse_int_config(config, "max_sessions", 1000),
+                        persistence=self._create_persistence(config, session_ttl_seconds),
+                        replay_dir=self._get_replay_dir(config),
+                        npc_ai=self._create_npc_ai(config),
+                    )
+                    self._executor = SessionCommandExecutor(self._parse_int_config(config, "command_workers", 4))
+                    self._watcher = self._create_data_watcher(config)
+                
+                logger.info(f"宝可梦插件服务启动成功，耗时 {profiler.report()}")
+            except Exception as e:
+                # 如果任何步骤失败，记录详细错误并阻止插件服务启动
+                logger.error(f"宝可梦插件因初始化失败而无法启动: {e}", exc_info=True)
+                # 将service置为None，以便后续指令能够安全地失败并提示用户
+                self._service = None
+            finally:
+                self.startup_profiler = profiler
+                self._loaded = True
 
     def _parse_npc_config(self, config: AstrBotConfig) -> List[Dict[str, Any]]:
         """
@@ -81,7 +144,90 @@ class PokemonBattlePlugin(Star):
             logger.info(f"宝可梦插件：成功加载 {len(npc_configs)} 名NPC宝可梦配置。")
         return npc_configs
 
-    async def _handle_service_call(self, event: AstrMessageEvent, result: ServiceResult):
+    @staticmethod
+    def _create_persistence(config: AstrBotConfig, session_ttl_seconds: int) -> Optional["WriteBehindWriter"]:
+        """
+        根据配置创建会话持久化器。会话保存在插件数据目录下的 SQLite 数据库中，
+        启动时只在后台清理过期会话，不预先加载任何会话。
+        """
+        persist = config.get("persist_sessions")
+        if isinstance(persist, bool) and not persist:
+            return None
+        try:
+            from .persistence import SqliteSessionBackend, WriteBehindWriter
+            db_path = StarTools.get_data_dir("PokemonBattle") / "sessions.db"
+            purge_before = time.time() - session_ttl_seconds if session_ttl_seconds > 0 else None
+            return WriteBehindWriter(SqliteSessionBackend(db_path), purge_before=purge_before)
+        except Exception as e:
+            logger.error(f"宝可梦插件：会话持久化初始化失败，对战进度将不会在重启后保留: {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    def _get_replay_dir(config: AstrBotConfig) -> Optional[Path]:
+        """结束的对战录像保存在插件数据目录下的 replays 子目录中，关闭 save_replays 时不保存。"""
+        save = config.get("save_replays")
+        if isinstance(save, bool) and not save:
+            return None
+        try:
+            return StarTools.get_data_dir("PokemonBattle") / "replays"
+        except Exception as e:
+            logger.error(f"宝可梦插件：无法获取录像目录，对战录像将不会被保存: {e}")
+            return None
+
+    @staticmethod
+    def _get_cache_dir() -> Optional[Path]:
+        """校验后的游戏数据缓存在插件数据目录下的 cache 子目录中，数据文件未修改时启动无需重新校验。"""
+        try:
+            return StarTools.get_data_dir("PokemonBattle") / "cache"
+        except Exception as e:
+            logger.error(f"宝可梦插件：无法获取缓存目录，每次启动都将重新校验游戏数据: {e}")
+            return None
+
+    def _create_data_watcher(self, config: AstrBotConfig) -> Optional["GameDataWatcher"]:
+        """data_reload_interval_seconds 大于 0 时，按该间隔检查数据文件，修改后自动热重载游戏数据。"""
+        interval = self._parse_int_config(config, "data_reload_interval_seconds", 2)
+        if interval <= 0:
+            return None
+        from .data_watcher import GameDataWatcher
+        watcher = GameDataWatcher(self._factory, self._publish_factory, interval)
+        watcher.start()
+        return watcher
+
+    def _publish_factory(self, factory: "GameDataFactory"):
+        """发布热重载后的数据快照：之后创建的对战使用新的工厂，进行中的对战不受影响。"""
+        self._factory = factory
+        if self._service:
+            self._service.factory = factory
+
+    @classmethod
+    def _create_npc_ai(cls, config: AstrBotConfig) -> Optional["ExpectimaxAI"]:
+        """开启 smart_npc 时，NPC 在每回合的时间预算内搜索后续回合来选择技能，否则随机出招。"""
+        smart = config.get("smart_npc")
+        if not (isinstance(smart, bool) and smart):
+            return None
+        from .battle_logic.ai import ExpectimaxAI
+        budget_ms = max(10, cls._parse_int_config(config, "npc_think_time_ms", 200))
+        logger.info(f"宝可梦插件：已启用NPC搜索AI，每回合思考时间 {budget_ms}ms。")
+        return ExpectimaxAI(time_budget=budget_ms / 1000)
+
+    @staticmethod
+    def _parse_int_config(config: AstrBotConfig, key: str, default: int) -> int:
+        """读取一个整数配置项，缺失或类型不正确时使用默认值。"""
+        value = config.get(key)
+        return value if isinstance(value, int) and not isinstance(value, bool) else default
+
+    async def terminate(self):
+        """插件卸载或 AstrBot 关闭时，等待执行中的指令结束，再写完所有尚未落盘的会话快照。从未加载过时无需处理。"""
+        if self._load_task:
+            await self._load_task
+        if self._watcher:
+            self._watcher.stop()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        if self._service:
+            self._service.close()
+
+    async def _handle_service_call(self, event: AstrMessageEvent, result: "ServiceResult"):
         """
         统一处理来自GameService的ServiceResult，并生成回复。
         """
@@ -93,7 +239,7 @@ class PokemonBattlePlugin(Star):
     async def _execute_command(
         self, 
         event: AstrMessageEvent, 
-        service_method: Callable[..., ServiceResult], 
+        method_name: str, 
         *args: Any, 
         **kwargs: Any
     ):
@@ -101,23 +247,27 @@ class PokemonBattlePlugin(Star):
         【核心重构】命令执行器，封装了所有指令的通用处理逻辑。
         
         它负责：
-        1. 检查服务是否可用，如果不可用则返回统一的错误提示。
-        2. 调用指定的service方法并传递参数。
+        1. 插件尚未加载时在后台线程中完成加载；检查服务是否可用，如果不可用则返回统一的错误提示。
+        2. 通过指令执行器调用指定的service方法并传递参数：同一会话的指令逐条执行，不同会话并行，
+           耗时的对战结算不会阻塞其他聊天。
         3. 将返回的ServiceResult通过_handle_service_call转换为最终回复。
         
         这极大地简化了每个指令处理函数的代码，遵循了DRY原则。
 
         Args:
             event: 消息事件对象。
-            service_method: 要调用的GameService中的方法。
-            *args: 传递给service_method的位置参数。
-            **kwargs: 传递给service_method的关键字参数。
+            method_name: 要调用的GameService中的方法名。
+            *args: 传递给该方法的位置参数。
+            **kwargs: 传递给该方法的关键字参数。
         """
-        if not self.service:
+        if not self._loaded:
+            await asyncio.to_thread(self._ensure_loaded)
+        if not self._service or not self._executor:
             yield event.plain_result("错误：宝可梦插件未成功初始化，请检查后台日志。")
             return
+        service_method = getattr(self._service, method_name)
 
-        result = service_method(*args, **kwargs)
+        result = await self._executor.run(event.get_session_id(), service_method, *args, **kwargs)
         
         async for msg in self._handle_service_call(event, result):
             yield msg
@@ -127,12 +277,12 @@ class PokemonBattlePlugin(Star):
     @filter.command_group("battle")
     async def battle_group(self, event: AstrMessageEvent):
         """处理无效的 /battle 子命令，提供帮助信息。"""
-        yield event.plain_result("无效的子命令。可用: start, add, setmove, ready, flee, switch, attack")
+        yield event.plain_result("无效的子命令。可用: start, add, setmove, ready, flee, switch, calc, attack")
 
     @battle_group.command("start")
     async def start_selection(self, event: AstrMessageEvent):
         """开始一个新的宝可梦队伍选择会话。"""
-        async for msg in self._execute_command(event, self.service.start_new_selection, event.get_session_id()):
+        async for msg in self._execute_command(event, "start_new_selection", event.get_session_id()):
             yield msg
     
     @battle_group.command("add")
@@ -143,7 +293,7 @@ class PokemonBattlePlugin(Star):
             yield event.plain_result("格式错误。正确用法: /battle add <名字1> [名字2] ..."); return
         
         async for msg in self._execute_command(
-            event, self.service.add_pokemon_to_team, event.get_session_id(), parts[2:]
+            event, "add_pokemon_to_team", event.get_session_id(), parts[2:]
         ):
             yield msg
 
@@ -151,7 +301,7 @@ class PokemonBattlePlugin(Star):
     async def set_move(self, event: AstrMessageEvent, p_name: str, f_move: str, l_move: str):
         """为队伍中的宝可梦更换技能。"""
         async for msg in self._execute_command(
-            event, self.service.set_pokemon_move, event.get_session_id(), p_name, f_move, l_move
+            event, "set_pokemon_move", event.get_session_id(), p_name, f_move, l_move
         ):
             yield msg
 
@@ -159,24 +309,30 @@ class PokemonBattlePlugin(Star):
     async def ready_battle(self, event: AstrMessageEvent, starter: str):
         """完成队伍选择，指定首发并开始战斗。"""
         async for msg in self._execute_command(
-            event, self.service.ready_and_start_battle, event.get_session_id(), starter
+            event, "ready_and_start_battle", event.get_session_id(), starter
         ):
             yield msg
 
     @battle_group.command("flee")
     async def flee_battle(self, event: AstrMessageEvent):
         """从战斗中逃跑。"""
-        async for msg in self._execute_command(event, self.service.flee_battle, event.get_session_id()):
+        async for msg in self._execute_command(event, "flee_battle", event.get_session_id()):
+            yield msg
+
+    @battle_group.command("calc")
+    async def calc_damage(self, event: AstrMessageEvent, move: Optional[str] = None):
+        """计算技能对NPC的伤害范围与击倒概率，不指定技能时计算全部技能。"""
+        async for msg in self._execute_command(event, "calculate_move_damage", event.get_session_id(), move):
             yield msg
 
     @filter.command("attack", args=(1,))
     async def attack(self, event: AstrMessageEvent, move: str):
         """在战斗中发动攻击。"""
-        async for msg in self._execute_command(event, self.service.execute_attack, event.get_session_id(), move):
+        async for msg in self._execute_command(event, "execute_attack", event.get_session_id(), move):
             yield msg
 
     @battle_group.command("switch")
     async def switch_pokemon(self, event: AstrMessageEvent, target: Optional[str] = None):
         """在战斗中切换宝可梦，或查看队伍状态。"""
-        async for msg in self._execute_command(event, self.service.execute_switch, event.get_session_id(), target):
+        async for msg in self._execute_command(event, "execute_switch", event.get_session_id(), target):
             yield msg
\ No newline at end of file
@@ -0,0 +1,191 @@
+# persistence.py
+"""
+会话持久化：插件重启后，进行中的对战不会丢失。
+
+- SessionBackend 定义了按会话ID读写二进制数据的最小接口，SqliteSessionBackend 是默认实现；
+- WriteBehindWriter 在后台线程中完成编码与写盘，指令处理路径只需要提交一份快照 (对战部分已是不可变的二进制数据，
+  对战录像等较大的字段可以作为延迟字段，推迟到后台线程中编码)；
+  同一会话在写盘前被多次提交时只保留最新的一份，因此写入量与指令频率无关。
+- 读取是按需的：启动时不加载任何会话，某个会话ID第一次被访问时才从后端读取。
+"""
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from astrbot.api import logger
+
+# 会话快照：纯数据字典，bytes 类型的字段 (如 battle_logic.codec 编码的对战、对战录像) 以二进制原样保存。
+# 字段的值也可以是无参可调用对象 (延迟字段)，在编码或读取快照时才求值，用于把耗时的编码推迟到后台线程中
+Snapshot = Dict[str, Any]
+
+def resolve_snapshot(snapshot: Snapshot) -> Snapshot:
+    """求出快照中的全部延迟字段，返回纯数据快照。"""
+    return {k: v() if callable(v) else v for k, v in snapshot.items()}
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    """会话快照 -> 头部长度 (u32) | 紧凑 JSON 头部 (含各二进制字段的名称与长度) | 各二进制字段。"""
+    snapshot = resolve_snapshot(snapshot)
+    header = {k: v for k, v in snapshot.items() if not isinstance(v, bytes)}
+    blobs = [(k, v) for k, v in snapshot.items() if isinstance(v, bytes)]
+    header["_blobs"] = [[k, len(v)] for k, v in blobs]
+    raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"".join([len(raw).to_bytes(4, "little"), raw, *(v for _, v in blobs)])
+
+def decode_snapshot(payload: bytes) -> Snapshot:
+    """encode_snapshot 的逆操作。数据不是该格式时抛出异常 (WriteBehindWriter.load 会丢弃这样的会话)。"""
+    size = int.from_bytes(payload[:4], "little")
+    snapshot = json.loads(payload[4:4 + size].decode("utf-8"))
+    pos = 4 + size
+    for key, length in snapshot.pop("_blobs"):
+        snapshot[key] = payload[pos:pos + length]
+        pos += length
+    return snapshot
+
+class SessionBackend(ABC):
+    """会话持久化后端。所有方法都可能被指令线程与写盘线程并发调用，实现需自行保证线程安全。"""
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[bytes]:
+        """读取会话数据，不存在时返回 None。"""
+
+    @abstractmethod
+    def save(self, session_id: str, payload: bytes): ...
+
+    @abstractmethod
+    def delete(self, session_id: str): ...
+
+    def purge_older_than(self, timestamp: float) -> int:
+        """删除最后写入时间早于 timestamp (Unix 时间) 的会话，返回删除的数量。"""
+        return 0
+
+    def close(self): ...
+
+class SqliteSessionBackend(SessionBackend):
+    """以会话ID为主键的单表 SQLite 存储，按主键读写，耗时与已存储的会话数量无关。"""
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, updated_at REAL NOT NULL, payload BLOB NOT NULL)")
+
+    def load(self, session_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id: str, payload: bytes):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (id, updated_at, payload) VALUES (?, ?, ?)", (session_id, time.time(), payload))
+
+    def delete(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_older_than(self, timestamp: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (timestamp,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_DELETED = object()
+
+class WriteBehindWriter:
+    """
+    写后 (write-behind) 持久化器。
+
+    save/delete 只把快照登记到待写表中并唤醒后台线程，立即返回；后台线程负责编码 (包括求出延迟字段) 与写入后端。
+    load 会优先读取尚未落盘的待写数据，保证读到的总是最新状态。
+
+    Args:
+        backend: 持久化后端。
+        encode / decode: 快照与写入后端的二进制数据之间的转换函数。
+        purge_before: 可选，启动后在后台线程中清理该 Unix 时间之前写入的过期会话。
+    """
+    def __init__(
+        self, backend: SessionBackend,
+        encode: Callable[[Snapshot], bytes] = encode_snapshot, decode: Callable[[bytes], Snapshot] = decode_snapshot,
+        purge_before: Optional[float] = None,
+    ):
+        self.backend = backend
+        self.encode = encode
+        self.decode = decode
+        self._pending: Dict[str, Any] = {}
+        # 后台线程正在写入的一批快照，写入完成前 load 仍从这里读取
+        self._inflight: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._purge_before = purge_before
+        self._thread = threading.Thread(target=self._run, name="pokemon-session-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, session_id: str, snapshot: Snapshot):
+        with self._lock:
+            self._pending[session_id] = snapshot
+            self._wakeup.notify_all()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._pending[session_id] = _DELETED
+            self._wakeup.notify_all()
+
+    def load(self, session_id: str) -> Optional[Snapshot]:
+        with self._lock:
+            pending = self._pending.get(session_id, self._inflight.get(session_id))
+        if pending is _DELETED: return None
+        if pending is not None: return resolve_snapshot(pending)
+        payload = self.backend.load(session_id)
+        if payload is None: return None
+        try:
+            return self.decode(payload)
+        except Exception as e:
+            logger.error(f"宝可梦插件：无法解析已保存的会话 {session_id}，已丢弃: {e}")
+            self.delete(session_id)
+            return None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交的快照写入后端，返回是否在超时前完成。"""
+        with self._lock:
+            return self._wakeup.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """写完剩余快照后停止后台线程并关闭后端。"""
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        self._thread.join(timeout)
+        self.backend.close()
+
+    def _run(self):
+        if self._purge_before is not None:
+            try:
+                purged = self.backend.purge_older_than(self._purge_before)
+                if purged: logger.info(f"宝可梦插件：清理了 {purged} 个过期的已保存会话。")
+            except Exception as e:
+                logger.error(f"宝可梦插件：清理过期会话失败: {e}", exc_info=True)
+        while True:
+            with self._lock:
+                self._wakeup.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            for session_id, snapshot in batch.items():
+                try:
+                    if snapshot is _DELETED: self.backend.delete(session_id)
+                    else: self.backend.save(session_id, self.encode(snapshot))
+                except Exception as e:
+                    logger.error(f"宝可梦插件：保存会话 {session_id} 失败: {e}", exc_info=True)
+            with self._lock:
+                self._inflight = {}
+                self._wakeup.notify_all()
\ No newline at end of file
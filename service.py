@@ -1,14 +1,22 @@
 # service.py (已应用修改)
+import functools
 import json
+import re
+import time
 from pathlib import Path
-from typing import Dict, Optional, Any, List, TYPE_CHECKING
+from typing import Callable, Dict, Optional, Any, List, TYPE_CHECKING
 from dataclasses import dataclass, field
 
 from . import ui
+from .session_store import SessionStore, SessionLocks
+from .persistence import WriteBehindWriter, Snapshot
 from .battle_logic.factory import GameDataFactory
 from .battle_logic.battle import Battle
 from .battle_logic.pokemon import Pokemon
 from .battle_logic.constants import BattleState
+from .battle_logic.codec import encode_battle, decode_battle
+from .battle_logic.replay import BattleRecorder, BattleJournal
+from .battle_logic.ai import ExpectimaxAI
 from astrbot.api import logger
 
 if TYPE_CHECKING:
@@ -28,11 +36,101 @@ class GameSession:
     def is_fighting(self) -> bool: return self.state == BattleState.FIGHTING
     def is_awaiting_switch(self) -> bool: return self.state == BattleState.AWAITING_SWITCH
 
+    def to_snapshot(self) -> Snapshot:
+        """
+        转换为可持久化的快照 (不与会话共享任何可变对象)。
+        对战直接编码：编码本身就是最廉价的完整副本 (实测比 Battle.fork 更快，分叉需要重建气场索引)；
+        录像只复制回合记录列表，其编码作为延迟字段由持久化器的后台线程完成。
+        """
+        journal = self.battle.recorder.journal.copy() if self.battle and self.battle.recorder else None
+        return {
+            "state": self.state.value,
+            "team_config": {name: {k: list(v) for k, v in moves.items()} for name, moves in self.team_config.items()},
+            "battle": encode_battle(self.battle) if self.battle else None,
+            # 延迟字段可能同时被后台线程与 WriteBehindWriter.load 求值，每次都编码一份新的副本
+            "journal": (lambda: journal.copy().to_bytes()) if journal else None,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Snapshot, factory: GameDataFactory) -> "GameSession":
+        battle = decode_battle(data["battle"], factory) if data.get("battle") else None
+        if battle and data.get("journal"):
+            BattleRecorder.attach(battle, BattleJournal.from_bytes(data["journal"]))
+        return cls(state=BattleState(data["state"]), team_config=data["team_config"], battle=battle)
+
+def _serialized(method: Callable[..., ServiceResult]) -> Callable[..., ServiceResult]:
+    """在会话锁内执行以 session_id 为第一个参数的服务方法：同一会话的指令不会交错执行。"""
+    @functools.wraps(method)
+    def wrapper(self: "GameService", session_id: str, *args: Any, **kwargs: Any) -> ServiceResult:
+        with self.session_locks.hold(session_id):
+            return method(self, session_id, *args, **kwargs)
+    return wrapper
+
 class GameService:
-    def __init__(self, factory: GameDataFactory, npc_team_config: List[Dict]):
+    """
+    应用服务。所有指令方法都可以被多个线程并发调用：
+    同一会话的指令由会话锁串行化 (会话状态与 Battle 对象只会被一个线程修改)，不同会话并行执行；
+    会话存储与持久化器自身是线程安全的。
+    """
+    def __init__(
+        self, factory: GameDataFactory, npc_team_config: List[Dict],
+        session_ttl_seconds: Optional[float] = 1800, max_sessions: Optional[int] = 1000,
+        persistence: Optional[WriteBehindWriter] = None, replay_dir: Optional[Path] = None,
+        npc_ai: Optional[ExpectimaxAI] = None,
+    ):
+        # 当前的游戏数据快照。热重载时整体替换为新的工厂 (见 data_watcher)，进行中的对战继续使用原来的工厂
         self.factory = factory
         self.npc_team_config = npc_team_config
-        self.sessions: Dict[str, GameSession] = {}
+        # 可选的会话持久化：每次指令处理后提交快照 (后台写盘)，重启后按需加载
+        self.persistence = persistence
+        # 每场对战都会录像；指定 replay_dir 时，结束的对战录像会保存到该目录，供事后用 replay.replay 复盘
+        self.replay_dir = replay_dir
+        # 可选的NPC AI，挂载到本服务创建或恢复的每一场对战上；为 None 时NPC随机出招
+        self.npc_ai = npc_ai
+        # 闲置超时与容量上限保证被遗弃的会话 (及其 Battle) 最终会被释放
+        self.sessions: SessionStore[GameSession] = SessionStore(
+            ttl_seconds=session_ttl_seconds, max_sessions=max_sessions, on_evict=self._on_session_evicted,
+            loader=self._load_session if persistence else None,
+        )
+        self.session_locks = SessionLocks()
+
+    def _on_session_evicted(self, session_id: str, session: GameSession, reason: str):
+        logger.info(f"宝可梦插件：会话 {session_id} 因{'闲置超时' if reason == 'expired' else '会话数超过上限'}被回收。")
+        # 因容量被挤出内存的会话仍保留在持久化存储中，下次访问时重新加载；超时的会话则彻底删除
+        if reason == "expired" and self.persistence:
+            self.persistence.delete(session_id)
+
+    def _load_session(self, session_id: str) -> Optional[GameSession]:
+        snapshot = self.persistence.load(session_id)
+        if snapshot is None: return None
+        try:
+            session = GameSession.from_snapshot(snapshot, self.factory)
+            if session.battle: session.battle.npc_ai = self.npc_ai
+            return session
+        except Exception as e:
+            logger.error(f"宝可梦插件：无法恢复会话 {session_id}，已丢弃: {e}", exc_info=True)
+            self.persistence.delete(session_id)
+            return None
+
+    def _save_session(self, session_id: str, session: GameSession):
+        if self.persistence: self.persistence.save(session_id, session.to_snapshot())
+
+    def _end_session(self, session_id: str):
+        self.sessions.discard(session_id)
+        if self.persistence: self.persistence.delete(session_id)
+
+    def _save_replay(self, session_id: str, battle: Battle):
+        if not self.replay_dir or not battle.recorder: return
+        try:
+            self.replay_dir.mkdir(parents=True, exist_ok=True)
+            file_name = f"{re.sub(r'[^0-9A-Za-z_-]', '_', session_id)}-{time.strftime('%Y%m%d-%H%M%S')}.pkr"
+            (self.replay_dir / file_name).write_bytes(battle.recorder.journal.to_bytes())
+        except OSError as e:
+            logger.error(f"宝可梦插件：保存会话 {session_id} 的对战录像失败: {e}")
+
+    def close(self):
+        """插件卸载时调用：等待所有会话快照写入完毕。"""
+        if self.persistence: self.persistence.close()
 
     def get_session_and_battle(self, session_id: str) -> tuple[Optional[GameSession], Optional[Battle]]:
         session = self.sessions.get(session_id)
@@ -57,13 +155,16 @@ class GameService:
             winner_name = "玩家" if result.get('winner') == 'Player' else 'NPC'
             winner_msg = f"🏆 **{winner_name} 获得了胜利！** 🏆"
             final_log = f"{turn_log}\n\n{winner_msg}"
-            if session_id in self.sessions: del self.sessions[session_id]
+            self._save_replay(session_id, battle)
+            self._end_session(session_id)
             return ServiceResult(success=True, message=final_log)
         
+        self._save_session(session_id, session)
         ui_body = ui.generate_regular_ui_body(session)
         final_message = ui.generate_final_message(ui_body, session, turn_log=turn_log)
         return ServiceResult(success=True, message=final_message)
 
+    @_serialized
     def execute_switch(self, session_id: str, target_str: Optional[str]) -> ServiceResult:
         """
         处理所有类型的切换指令。
@@ -94,6 +195,7 @@ class GameService:
             if not result_dict['success']:
                 return ServiceResult(False, result_dict['log'])
 
+            self._save_session(session_id, session)
             log = result_dict['log']
             ui_body = ui.generate_regular_ui_body(session)
             full_message = ui.generate_final_message(ui_body, session, turn_log=log)
@@ -107,6 +209,7 @@ class GameService:
         
         return ServiceResult(False, "发生未知错误，无法切换宝可梦。")
 
+    @_serialized
     def execute_attack(self, session_id: str, move_name: str) -> ServiceResult:
         session, battle = self.get_session_and_battle(session_id)
         if not session or not battle or not session.is_fighting(): return ServiceResult(False, "现在不是行动的时候。")
@@ -139,15 +242,18 @@ class GameService:
 
     # --- 以下为无需修改的辅助方法 ---
 
+    @_serialized
     def start_new_selection(self, session_id: str) -> ServiceResult:
         if session_id in self.sessions: return ServiceResult(False, "你已经在一个会话中了！使用 /battle flee 放弃当前对战。")
         self.sessions[session_id] = GameSession()
+        self._save_session(session_id, self.sessions[session_id])
         header = "⚔️ **队伍选择开始！** ⚔️"
         instructions = ["1. 使用 `/battle add [宝可梦名]` 将宝可梦加入队伍 (最多6只)。", "2. (可选) 使用 `/battle setmove <精灵名> <旧技能> <新技能>` 更换技能。", "3. 准备好后，使用 `/battle ready [首发宝可梦名]` 开始战斗！"]
         pokemon_list_msg = ui.generate_pokemon_list_msg(self.factory.get_all_pokemon_names())
         full_message = "\n\n".join([header, "\n".join(instructions), pokemon_list_msg])
         return ServiceResult(True, full_message)
 
+    @_serialized
     def add_pokemon_to_team(self, session_id: str, names_to_add: List[str]) -> ServiceResult:
         session = self.sessions.get(session_id)
         if not session or not session.is_selecting(): return ServiceResult(False, "请先使用 `/battle start` 开始选择队伍。")
@@ -158,6 +264,7 @@ class GameService:
             if not pokemon_data_model: error_log.append(f"未找到宝可梦 '{name}'"); continue
             if name in team: error_log.append(f"'{name}' 已在你的队伍中"); continue
             session.team_config[name] = { "current": pokemon_data_model.default_moves[:4], "extra": pokemon_data_model.extra_moves }; added_log.append(f"`{name}`")
+        if added_log: self._save_session(session_id, session)
         response_parts = []
         if added_log: response_parts.append(f"✅ 成功添加: {', '.join(added_log)}")
         if error_log: response_parts.append(f"❌ 出现问题: {', '.join(error_log)}")
@@ -165,6 +272,7 @@ class GameService:
         response_parts.append("队伍组建完成后，使用 `/battle ready [首发宝可梦名]` 开始战斗！")
         return ServiceResult(True, "\n".join(response_parts))
 
+    @_serialized
     def set_pokemon_move(self, session_id: str, pokemon_name: str, forget_move: str, learn_move: str) -> ServiceResult:
         session = self.sessions.get(session_id)
         if not session or not session.is_selecting(): return ServiceResult(False, "只能在队伍选择阶段更换技能。")
@@ -174,30 +282,57 @@ class GameService:
         if forget_move not in current: return ServiceResult(False, f"`{pokemon_name}` 当前不会技能 `{forget_move}`。")
         if learn_move not in extra: return ServiceResult(False, f"`{pokemon_name}` 无法学会技能 `{learn_move}`。")
         current[current.index(forget_move)], extra[extra.index(learn_move)] = learn_move, forget_move
+        self._save_session(session_id, session)
         details_msg = ui.generate_team_moves_details_msg(session.team_config)
         full_message = f"✅ 技能更换成功！\n\n你的 `{pokemon_name}` 忘记了 `{forget_move}`，学会了 `{learn_move}`！\n\n{details_msg}\n\n队伍组建完成后，使用 `/battle ready [首发宝可梦名]` 开始战斗！"
         return ServiceResult(True, full_message)
 
+    @_serialized
     def ready_and_start_battle(self, session_id: str, starter_name: str) -> ServiceResult:
         session = self.sessions.get(session_id)
         if not session or not session.is_selecting(): return ServiceResult(False, "请先使用 `/battle start`。")
         team_config = session.team_config
         if not (1 <= len(team_config) <= 6): return ServiceResult(False, "队伍数量需为1-6只！")
         if starter_name not in team_config: return ServiceResult(False, f"首发宝可梦 '{starter_name}' 必须在你的队伍中！")
-        player_team = [self.factory.create_pokemon(name, 100, data['current']) for name, data in team_config.items()]; player_team.sort(key=lambda p: p.name != starter_name)
+        # 数据热重载时 self.factory 可能被整体替换，同一场对战只使用同一份数据快照
+        factory = self.factory
+        player_team = [factory.create_pokemon(name, 100, data['current']) for name, data in team_config.items()]
+        missing = [name for name, pokemon in zip(team_config, player_team) if pokemon is None]
+        if missing: return ServiceResult(False, f"宝可梦 {', '.join(missing)} 已不存在 (游戏数据已更新)，请使用 `/battle start` 重新组队。")
+        player_team.sort(key=lambda p: p.name != starter_name)
         npc_team: List[Pokemon] = []
         for npc_config in self.npc_team_config:
-            npc_pokemon = self.factory.create_pokemon(npc_config["name"], 100, npc_config.get("moves") or None)
+            npc_pokemon = factory.create_pokemon(npc_config["name"], 100, npc_config.get("moves") or None)
             if npc_pokemon: npc_team.append(npc_pokemon)
             else: logger.warning(f"无法为 NPC 创建宝可梦 '{npc_config['name']}'。")
         if not npc_team: return ServiceResult(False, "❌ 错误：无法创建任何NPC宝可梦。\n请在插件后台配置中至少填写一名有效（有名称）的NPC宝可梦，并确保已点击保存。", log_level="error")
-        battle = Battle(player_team, npc_team, self.factory)
+        battle = Battle(player_team, npc_team, factory)
+        battle.npc_ai = self.npc_ai
+        BattleRecorder.attach(battle)
         session.battle = battle; session.state = BattleState.FIGHTING
+        self._save_session(session_id, session)
         team_numbered = "\n".join([f"  {i+1}. `{p.name}`" for i, p in enumerate(player_team)])
         log = f"⚔️ 战斗开始！ ⚔️\n\n你的队伍编号：\n{team_numbered}"; ui_body = ui.generate_regular_ui_body(session)
         full_message = ui.generate_final_message(ui_body, session, turn_log=log)
         return ServiceResult(True, full_message)
 
+    @_serialized
+    def calculate_move_damage(self, session_id: str, move_name: Optional[str] = None) -> ServiceResult:
+        """解析计算场上宝可梦对NPC使用技能的伤害分布与击倒概率，不改变对战状态。"""
+        session, battle = self.get_session_and_battle(session_id)
+        if not session or not battle or not session.is_fighting(): return ServiceResult(False, "现在不在对战中。")
+        player, npc = battle.player_active_pokemon, battle.npc_active_pokemon
+        if not player or not npc: return ServiceResult(False, "场上没有可以计算的宝可梦。")
+        if move_name:
+            move = player.get_move_by_name(move_name)
+            if not move: return ServiceResult(False, f"你的 {player.name} 不会技能 '{move_name}'！")
+            moves = [move]
+        else:
+            moves = [slot.move for slot in player.skill_slots]
+        results = [(move, battle.damage_distribution(player, npc, move)) for move in moves]
+        return ServiceResult(True, ui.format_damage_calc(player, npc, results))
+
+    @_serialized
     def flee_battle(self, session_id: str) -> ServiceResult:
-        if session_id in self.sessions: del self.sessions[session_id]; return ServiceResult(True, "你从战斗中逃跑了，对战结束！")
+        if session_id in self.sessions: self._end_session(session_id); return ServiceResult(True, "你从战斗中逃跑了，对战结束！")
         return ServiceResult(False, "你当前不在任何对战中。")
\ No newline at end of file
@@ -0,0 +1,196 @@
+# session_store.py
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, Iterator, List, Optional, TypeVar
+
+V = TypeVar("V")
+
+@dataclass
+class SessionStoreMetrics:
+    """会话存储的运行指标，可用于监控内存占用与淘汰情况。"""
+    created: int = 0          # 新建的会话数
+    removed: int = 0          # 被主动删除 (逃跑、对战结束) 的会话数
+    expired: int = 0          # 因闲置超时被淘汰的会话数
+    evicted: int = 0          # 因超过容量上限被淘汰 (LRU) 的会话数
+    loaded: int = 0           # 从持久化存储中按需加载的会话数
+    hits: int = 0
+    misses: int = 0
+
+class SessionStore(Generic[V]):
+    """
+    带有闲置超时 (TTL) 与容量上限 (LRU) 的会话存储。
+
+    会话按最近活动时间排序保存在 OrderedDict 中：每次读取或写入都会刷新活动时间并移到末尾，
+    因此最久未活动的会话总在最前面，超时清理只需从头部检查，容量淘汰也只需弹出头部。
+    对外提供与 dict 相同的 get / in / [] / del 用法，GameService 无需关心淘汰细节。
+    所有操作由一把可重入锁保护，可以被多个指令线程同时调用 (单个会话对象本身的并发访问由调用方负责)；
+    loader 可能较慢 (如读取磁盘)，在锁外调用，不会阻塞其他会话的访问。
+
+    Args:
+        ttl_seconds: 会话闲置多久后过期；为 None 或 <= 0 时不过期。
+        max_sessions: 同时存活的会话上限；为 None 或 <= 0 时不限制。
+        on_evict: 会话因超时或容量被淘汰时的回调，参数为 (会话ID, 会话, 原因 "expired"/"evicted")。
+        clock: 时间函数，默认为 time.monotonic，便于测试注入。
+        loader: 可选，内存中不存在某个会话时调用 loader(会话ID) 按需加载 (如从持久化存储)，返回 None 表示不存在。
+    """
+    def __init__(
+        self, ttl_seconds: Optional[float] = 1800, max_sessions: Optional[int] = 1000,
+        on_evict: Optional[Callable[[str, V, str], None]] = None, clock: Callable[[], float] = time.monotonic,
+        loader: Optional[Callable[[str], Optional[V]]] = None,
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.max_sessions = max_sessions if max_sessions and max_sessions > 0 else None
+        self.on_evict = on_evict
+        self.clock = clock
+        self.loader = loader
+        self.metrics = SessionStoreMetrics()
+        self._sessions: "OrderedDict[str, V]" = OrderedDict()
+        self._last_active: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def get(self, session_id: str, default: Optional[V] = None) -> Optional[V]:
+        """获取会话并刷新其活动时间；已过期的会话会被立即淘汰并视为不存在。"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                now = self.clock()
+                if self._is_expired(session_id, now):
+                    self._evict(session_id, "expired")
+                    self.metrics.misses += 1
+                    return default
+                self._touch(session_id, now)
+                self.metrics.hits += 1
+                return session
+        session = self._load(session_id)
+        with self._lock:
+            if session is None:
+                self.metrics.misses += 1
+                return default
+            self.metrics.hits += 1
+            return session
+
+    def __getitem__(self, session_id: str) -> V:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __setitem__(self, session_id: str, session: V):
+        with self._lock:
+            if session_id not in self._sessions:
+                self.metrics.created += 1
+            self._sessions[session_id] = session
+            self._touch(session_id, self.clock())
+            self.sweep()
+
+    def __delitem__(self, session_id: str):
+        if self.discard(session_id) is None:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id: object) -> bool:
+        """会话是否存在；已过期的会话会被立即淘汰并视为不存在，内存中没有时尝试通过 loader 加载。"""
+        with self._lock:
+            if session_id in self._sessions:
+                if not self._is_expired(session_id, self.clock()):
+                    return True
+                self._evict(session_id, "expired")
+                return False
+        return self._load(session_id) is not None
+
+    def discard(self, session_id: str) -> Optional[V]:
+        """从内存中移除会话 (无论是否已过期)，不调用 loader 与 on_evict。返回被移除的会话，不存在时返回 None。"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return None
+            del self._last_active[session_id]
+            self.metrics.removed += 1
+            return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._sessions))
+
+    def sweep(self) -> int:
+        """淘汰所有已过期的会话，以及超出容量上限的最久未活动会话。返回淘汰的数量。"""
+        with self._lock:
+            count = 0
+            now = self.clock()
+            while self._sessions:
+                oldest = next(iter(self._sessions))
+                if not self._is_expired(oldest, now):
+                    break
+                self._evict(oldest, "expired"); count += 1
+            while self.max_sessions is not None and len(self._sessions) > self.max_sessions:
+                self._evict(next(iter(self._sessions)), "evicted"); count += 1
+            return count
+
+    def _load(self, session_id: str) -> Optional[V]:
+        """
+        通过 loader 按需加载会话并放入内存，视为一次新的活动。调用时不能持有锁：
+        loader 在锁外执行，放入内存时重新检查，若期间其他线程已放入同一会话，则以内存中的为准。
+        """
+        if self.loader is None:
+            return None
+        session = self.loader(session_id)
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                self._touch(session_id, self.clock())
+                return existing
+            if session is None:
+                return None
+            self.metrics.loaded += 1
+            self._sessions[session_id] = session
+            self._touch(session_id, self.clock())
+            self.sweep()
+            return session
+
+    def _is_expired(self, session_id: str, now: float) -> bool:
+        return self.ttl_seconds is not None and now - self._last_active[session_id] > self.ttl_seconds
+
+    def _touch(self, session_id: str, now: float):
+        self._last_active[session_id] = now
+        self._sessions.move_to_end(session_id)
+
+    def _evict(self, session_id: str, reason: str):
+        session = self._sessions.pop(session_id)
+        del self._last_active[session_id]
+        if reason == "expired": self.metrics.expired += 1
+        else: self.metrics.evicted += 1
+        if self.on_evict:
+            self.on_evict(session_id, session, reason)
+
+class SessionLocks:
+    """
+    按会话ID分配的互斥锁：同一会话的操作互斥，不同会话互不影响。
+    锁只在有线程持有或等待时存在，最后一个使用者释放后即被丢弃，数量不会随历史会话增长。
+    """
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, List] = {}  # 会话ID -> [锁, 持有或等待的线程数]
+
+    @contextmanager
+    def hold(self, session_id: str) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.get(session_id)
+            if entry is None:
+                entry = self._locks[session_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[session_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
\ No newline at end of file
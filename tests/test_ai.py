@@ -0,0 +1,92 @@
+# tests/test_ai.py
+import random
+import time
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState, Stat
+from astrbot_plugin_hapemxg_roco1.battle_logic.ai import ExpectimaxAI, _Search, evaluate, position_key
+from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatStageComponent
+from astrbot_plugin_hapemxg_roco1.battle_logic.replay import BattleJournal, BattleRecorder, replay
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _fire_vs_grass(factory: GameDataFactory, seed: int = 1) -> Battle:
+    # 火属性的NPC只有 巨焰吞噬 能造成伤害，且对草属性效果绝佳
+    player_team = [factory.create_pokemon("测试精灵3", 100)]
+    npc_team = [factory.create_pokemon("测试精灵2", 100, ["魔法增效", "臭鸡蛋", "金属噪音", "巨焰吞噬"])]
+    return Battle(player_team, npc_team, factory, seed=seed)
+
+@pytest.mark.asyncio
+async def test_ai_picks_the_winning_move_without_touching_battle_rng(game_factory: GameDataFactory):
+    battle = _fire_vs_grass(game_factory)
+    rng_state = battle.rng.getstate()
+    move = ExpectimaxAI(time_budget=0.2).choose_move(battle)
+    assert move.name == "巨焰吞噬"
+    assert battle.rng.getstate() == rng_state, "AI 推演不应消耗对战自身的随机源"
+    assert battle.turn_count == 0 and all(p.current_hp == p.max_hp for p in battle.player_team + battle.npc_team)
+
+@pytest.mark.asyncio
+async def test_ai_respects_time_budget(game_factory: GameDataFactory):
+    battle = _fire_vs_grass(game_factory)
+    start = time.perf_counter()
+    move = ExpectimaxAI(max_depth=10, time_budget=0.05).choose_move(battle)
+    elapsed = time.perf_counter() - start
+    assert move is not None
+    # 预算用尽后只需完成当前一次模拟即返回
+    assert elapsed < 0.05 + 0.1, f"决策耗时 {elapsed * 1000:.0f}ms 超出预算"
+
+@pytest.mark.asyncio
+async def test_battle_with_ai_replays_from_journal(game_factory: GameDataFactory):
+    battle = _fire_vs_grass(game_factory, seed=5)
+    battle.npc_ai = ExpectimaxAI(time_budget=0.02)
+    recorder = BattleRecorder.attach(battle)
+    while not battle.is_over() and battle.turn_count < 30:
+        if battle.state == BattleState.AWAITING_SWITCH:
+            battle.process_faint_switch(battle.get_player_survivors()[0]); continue
+        battle.process_turn({"type": "attack", "data": battle.player_active_pokemon.get_move_by_name("破土之力")})
+
+    journal = BattleJournal.from_bytes(recorder.journal.to_bytes())
+    assert all(entry.npc_move for entry in journal.entries), "AI 选出的技能应写入录像"
+    # 重放时不挂载 AI，也不重新搜索
+    assert position_key(replay(journal, game_factory)) == position_key(battle)
+
+@pytest.mark.asyncio
+async def test_evaluate_is_unchanged_by_aura_compaction(game_factory: GameDataFactory):
+    """日志压缩把多条能力等级记录折叠为汇总记录，局面估值不应因此改变。"""
+    battle = _fire_vs_grass(game_factory)
+    npc = battle.npc_active_pokemon
+    # 较早的两次防御 +1 会被折叠为一条 change=2, count=2 的汇总记录
+    npc.aura.add_component(StatStageComponent(Stat.DEFENSE, 1))
+    npc.aura.add_component(StatStageComponent(Stat.DEFENSE, 1))
+    for _ in range(10):
+        npc.aura.add_component(StatStageComponent(Stat.ATTACK, 1))
+        npc.aura.add_component(StatStageComponent(Stat.ATTACK, -1))
+    before = evaluate(battle)
+    assert npc.aura.compact(keep_recent=4) > 0
+    assert evaluate(battle) == pytest.approx(before)
+
+@pytest.mark.asyncio
+async def test_evaluate_penalizes_only_harmful_statuses(game_factory: GameDataFactory):
+    """追击序列 (以状态组件保存) 与闪避架势对持有方有利，不应像异常状态一样被扣分。"""
+    battle = _fire_vs_grass(game_factory)
+    npc = battle.npc_active_pokemon
+    before = evaluate(battle)
+    npc.apply_effect("sequence_slot_0", source_move="测试连击1", options={"source_slot_index": 0, "sequence_id": "TestCombo1", "charges": 2, "total_charges": 2})
+    npc.apply_effect("evasion_shield")
+    assert evaluate(battle) == pytest.approx(before)
+    npc.apply_effect("poison")
+    assert evaluate(battle) < before
+
+@pytest.mark.asyncio
+async def test_search_caches_are_bounded_by_table_size(game_factory: GameDataFactory):
+    """置换表与子局面缓存的大小都不随时间预算增长。"""
+    ai = ExpectimaxAI(table_size=20)
+    search = _Search(ai, deadline=float("inf"))
+    root = _fire_vs_grass(game_factory).fork(rng=random.Random(0), log_enabled=False)
+    search.value(root, position_key(root), 2)
+    assert len(search.table) <= 20 and len(search.children) == 20
\ No newline at end of file
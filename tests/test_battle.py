@@ -1,4 +1,6 @@
 # tests/test_battle.py (已根据业务规则和测试最佳实践修正)
+import json
+import shutil
 import pytest
 import random
 from pathlib import Path
@@ -7,10 +9,13 @@ from copy import deepcopy
 from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
 from astrbot_plugin_hapemxg_roco1.battle_logic.pokemon import Pokemon, SkillSlot
 from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
-from astrbot_plugin_hapemxg_roco1.battle_logic.constants import Stat
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import Stat, BattleState
 from astrbot_plugin_hapemxg_roco1.battle_logic.data_models import MoveDataModel, EffectModel
 from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatusEffectComponent, VolatileFlagComponent, HealComponent, DamageComponent
 
+# 所有剧本使用固定的随机种子，命中、暴击、麻痹与伤害浮动的判定都可复现
+SEED = 20240601
+
 # --- Fixture 和辅助函数 (保持不变) ---
 @pytest.fixture(scope="function")
 def game_factory() -> GameDataFactory:
@@ -45,7 +50,7 @@ async def test_scenario_1_volatile_effects_cleared_on_switch(game_factory: GameD
     npc_team = [game_factory.create_pokemon("测试精灵2", 100, move_names=["冥暗诅咒"])]
     player_team[0].stats[Stat.SPEED] = 50
     npc_team[0].stats[Stat.SPEED] = 100
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     
     battle.process_turn({"type": "attack", "data": player_team[0].get_move_by_name("速度打击")})
     assert player_team[0].has_effect("curse")
@@ -61,7 +66,7 @@ async def test_scenario_2_poison_damage_at_end_of_mini_turn(game_factory: GameDa
     npc_team = [game_factory.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])]
     player_team[0].stats[Stat.SPEED] = 100
     npc_team[0].stats[Stat.SPEED] = 50
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
 
     log1 = battle.process_turn({"type": "attack", "data": battle.player_active_pokemon.get_move_by_name("臭鸡蛋")})["log"]
     
@@ -79,7 +84,7 @@ async def test_scenario_3_status_replacement_and_derivative_effect(game_factory:
     npc_team = [game_factory.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])]
     player_team[0].stats[Stat.SPEED] = 100
     npc_team[0].stats[Stat.SPEED] = 50
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     npc = battle.npc_active_pokemon
     
     npc.apply_effect("paralysis")
@@ -100,7 +105,7 @@ async def test_scenario_3_status_replacement_and_derivative_effect(game_factory:
 async def test_scenario_4_sequence_refresh_is_precise(game_factory: GameDataFactory):
     player_team = [game_factory.create_pokemon("测试精灵3", 100, move_names=["测试连击1", "猛烈撞击", "龙之连舞", "破土之力"])]
     npc_team = [game_factory.create_pokemon("测试精灵", 100)]
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     player = battle.player_active_pokemon
 
     battle.process_turn({"type": "attack", "data": player.get_move_by_name("测试连击1")})
@@ -120,7 +125,7 @@ async def test_scenario_4_sequence_refresh_is_precise(game_factory: GameDataFact
 async def test_scenario_5_sequence_execution_order_and_initial_hit(game_factory: GameDataFactory):
     player_team = [game_factory.create_pokemon("测试精灵3", 100, move_names=["测试连击1", "猛烈撞击", "龙之连舞", "破土之力"])]
     npc_team = [game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])]
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     player = battle.player_active_pokemon
 
     log1 = battle.process_turn({"type": "attack", "data": player.get_move_by_name("龙之连舞")})["log"]
@@ -137,22 +142,30 @@ async def test_scenario_5_sequence_execution_order_and_initial_hit(game_factory:
     assert_log_contains(log3, ["由 [测试连击1] 追击", "由 [龙之连舞] 追击"])
 
 @pytest.mark.asyncio
-async def test_scenario_6_pp_consumption_logic(game_factory: GameDataFactory, monkeypatch):
+async def test_scenario_6_pp_consumption_logic(game_factory: GameDataFactory, tmp_path: Path):
     player_A = game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])
     npc_A = game_factory.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])
-    battle_A = Battle([player_A], [npc_A], game_factory)
+    battle_A = Battle([player_A], [npc_A], game_factory, seed=SEED)
     initial_pp_A = npc_A.get_current_pp("巨焰吞噬")
     battle_A.process_turn({"type": "attack", "data": player_A.get_move_by_name("猛烈撞击")})
     assert npc_A.get_current_pp("巨焰吞噬") == initial_pp_A - 1
 
-    player_B = game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])
-    npc_B = game_factory.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])
-    battle_B = Battle([player_B], [npc_B], game_factory)
+    # 效果属性是只读的：复制一份测试数据，将麻痹的无法行动概率改为必定触发后创建新的工厂
+    data_path = tmp_path / "data"
+    shutil.copytree(game_factory.data_path, data_path)
+    statuses = json.loads((data_path / "status_conditions.json").read_text(encoding="utf-8"))
+    statuses["paralysis"]["immobility_chance"] = 1.0
+    (data_path / "status_conditions.json").write_text(json.dumps(statuses, ensure_ascii=False), encoding="utf-8")
+    factory_B = GameDataFactory(data_path)
+    with pytest.raises(TypeError):
+        game_factory.get_effect_properties()["paralysis"]["immobility_chance"] = 1.0
+
+    player_B = factory_B.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])
+    npc_B = factory_B.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])
+    battle_B = Battle([player_B], [npc_B], factory_B, seed=SEED)
     npc_B.apply_effect("paralysis")
     initial_pp_B = npc_B.get_current_pp("巨焰吞噬")
     
-    monkeypatch.setattr(random, "random", lambda: 0.01)
-    
     log = battle_B.process_turn({"type": "attack", "data": player_B.get_move_by_name("猛烈撞击")})["log"]
     
     assert_log_contains(log, ["全身麻痹，无法行动！"])
@@ -164,13 +177,13 @@ async def test_scenario_7_active_move_kill_prevents_follow_up(game_factory: Game
     player_team = [game_factory.create_pokemon("测试精灵4", 100, move_names=["龙之连舞", "速度打击"])]
     npc_team = [game_factory.create_pokemon("测试精灵", 100)]
     
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     player = battle.player_active_pokemon
     
     battle.process_turn({"type": "attack", "data": player.get_move_by_name("龙之连舞")})
     assert player.has_effect("sequence_slot_0")
 
-    npc_team[0].aura._components = [c for c in npc_team[0].aura._components if not isinstance(c, HealComponent)]
+    for heal in npc_team[0].aura.get_components(HealComponent): npc_team[0].aura.remove_component(heal)
     npc_team[0].aura.add_component(DamageComponent(npc_team[0].max_hp - 1))
 
     log2 = battle.process_turn({"type": "attack", "data": player.get_move_by_name("速度打击")})["log"]
@@ -209,7 +222,7 @@ async def test_scenario_8_sequence_chain_is_interrupted_on_kill(game_factory: Ga
     player.skill_slots = [SkillSlot(0, move_c)]
     
     npc_team = [game_factory.create_pokemon("测试精灵", 100)]
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
 
     # 关键修正：直接施加效果，而不是通过 process_turn
     player.apply_effect('sequence_slot_0', source_move='序列启动器A_致命', options={'total_charges': 1, 'charges': 1, 'source_slot_index': 0, 'sequence_id': 'TestCombo_Kill'})
@@ -250,7 +263,7 @@ async def test_scenario_9_immobilized_delayed_effect_prevents_action(game_factor
     npc_team = [game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])]
     player_team[0].stats[Stat.SPEED] = 100 # 确保玩家先手
     npc_team[0].stats[Stat.SPEED] = 50
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     player, npc = battle.player_active_pokemon, battle.npc_active_pokemon
 
     # --- Act & Assert: 第一回合 ---
@@ -276,7 +289,7 @@ async def test_scenario_10_pp_depleted_forces_immobilized_turn(game_factory: Gam
     player_team = [game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])]
     npc_team = [game_factory.create_pokemon("测试精灵2", 100, move_names=["巨焰吞噬"])]
     
-    battle = Battle(player_team, npc_team, game_factory)
+    battle = Battle(player_team, npc_team, game_factory, seed=SEED)
     player = battle.player_active_pokemon
     
     move_name = "猛烈撞击"
@@ -300,4 +313,45 @@ async def test_scenario_10_pp_depleted_forces_immobilized_turn(game_factory: Gam
     assert not npc.has_usable_moves()
     
     npc_action = battle._create_npc_action(npc)
-    assert npc_action["type"] == "immobilized_turn"
\ No newline at end of file
+    assert npc_action["type"] == "immobilized_turn"
+
+@pytest.mark.asyncio
+async def test_battle_is_reproducible_from_seed_and_actions(game_factory: GameDataFactory):
+    """相同的种子与行动序列得到逐字相同的对战，且对战不读写全局 random 模块的状态。"""
+    def play(seed: int) -> list[str]:
+        player_team = [game_factory.create_pokemon("测试精灵", 100), game_factory.create_pokemon("测试精灵3", 100)]
+        npc_team = [game_factory.create_pokemon("测试精灵2", 100), game_factory.create_pokemon("测试精灵4", 100)]
+        battle = Battle(player_team, npc_team, game_factory, seed=seed)
+        logs = []
+        for turn in range(20):
+            if battle.is_over(): break
+            if battle.state == BattleState.AWAITING_SWITCH:
+                logs.append(battle.process_faint_switch(battle.get_player_survivors()[0])["log"]); continue
+            player = battle.player_active_pokemon
+            usable = [s.move for s in player.skill_slots if player.get_current_pp(s.move.name) > 0]
+            intent = {"type": "attack", "data": usable[turn % len(usable)]} if usable else {"type": "force_immobilized_turn"}
+            logs.append(battle.process_turn(intent)["log"])
+        return logs
+
+    random.seed(0)
+    global_state = random.getstate()
+    assert play(SEED) == play(SEED)
+    assert random.getstate() == global_state
+
+@pytest.mark.asyncio
+async def test_sequence_is_started_on_the_acting_slot(game_factory: GameDataFactory):
+    """同一技能装在多个技能槽中时 (技能模板是共享的)，追击序列挂在实际使用的技能槽上。"""
+    player = game_factory.create_pokemon("测试精灵3", 100, move_names=["测试连击1", "破土之力", "测试连击1"])
+    npc = game_factory.create_pokemon("测试精灵4", 100, move_names=["测试连击1", "测试连击1"])
+    battle = Battle([player], [npc], game_factory, seed=SEED)
+    combo = player.skill_slots[2].move
+    assert combo is player.skill_slots[0].move
+
+    battle.process_turn({"type": "attack", "data": combo, "slot": 2}, {"type": "attack", "data": combo, "slot": 1})
+    assert player.has_effect("sequence_slot_2") and not player.has_effect("sequence_slot_0")
+    assert player.get_effect("sequence_slot_2").data["source_slot_index"] == 2
+    assert npc.has_effect("sequence_slot_1") and not npc.has_effect("sequence_slot_0")
+
+    # 未指定技能槽时使用第一个装有该技能的技能槽
+    battle.process_turn({"type": "attack", "data": combo})
+    assert player.has_effect("sequence_slot_0")
\ No newline at end of file
@@ -0,0 +1,110 @@
+# tests/test_codec.py
+"""
+Battle 二进制编码的往返测试与基准。基准以 pickle 整个对象图为对照
+(需要为 Aura 中的 weakref 注册 reducer 才能 pickle，且会连带序列化整个数据工厂)。运行 `pytest -s` 可查看报告。
+"""
+import copyreg
+import io
+import pickle
+import random
+import time
+import weakref
+import pytest
+from pathlib import Path
+from types import MappingProxyType
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState
+from astrbot_plugin_hapemxg_roco1.battle_logic.codec import CodecError, encode_battle, decode_battle
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _new_battle(factory: GameDataFactory, seed: int) -> Battle:
+    player_team = [factory.create_pokemon(n, 100) for n in ("测试精灵", "测试精灵3")]
+    npc_team = [factory.create_pokemon(n, 100) for n in ("测试精灵2", "测试精灵4")]
+    return Battle(player_team, npc_team, factory, seed=seed)
+
+def _play_turns(battle: Battle, chooser: random.Random, turns: int) -> list:
+    logs = []
+    for _ in range(turns):
+        if battle.is_over(): break
+        if battle.state == BattleState.AWAITING_SWITCH:
+            logs.append(battle.process_faint_switch(battle.get_player_survivors()[0])["log"]); continue
+        player = battle.player_active_pokemon
+        usable = [s.move.name for s in player.skill_slots if player.get_current_pp(s.move.name) > 0]
+        intent = {"type": "attack", "data": player.get_move_by_name(chooser.choice(usable))} if usable else {"type": "force_immobilized_turn"}
+        logs.append(battle.process_turn(intent)["log"])
+    return logs
+
+@pytest.mark.asyncio
+async def test_codec_round_trip_preserves_state(game_factory: GameDataFactory):
+    battle = _new_battle(game_factory, seed=5)
+    _play_turns(battle, random.Random(1), 15)
+
+    data = encode_battle(battle)
+    restored = decode_battle(data, game_factory)
+
+    assert encode_battle(restored) == data
+    assert restored.rng.getstate() == battle.rng.getstate() and restored.seed == battle.seed
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", [-5, -(2 ** 63), 2 ** 63 - 1])
+async def test_codec_round_trips_any_seed(game_factory: GameDataFactory, seed: int):
+    """Battle 接受任意整数种子 (包括负数)。"""
+    battle = _new_battle(game_factory, seed=seed)
+    _play_turns(battle, random.Random(1), 3)
+    restored = decode_battle(encode_battle(battle), game_factory)
+    assert restored.seed == seed and encode_battle(restored) == encode_battle(battle)
+
+@pytest.mark.asyncio
+async def test_decoded_battle_continues_identically(game_factory: GameDataFactory):
+    """编码包含随机数状态，恢复后的对战在相同指令下应与原对战逐字一致。"""
+    battle = _new_battle(game_factory, seed=11)
+    _play_turns(battle, random.Random(2), 5)
+    restored = decode_battle(encode_battle(battle), game_factory)
+
+    assert _play_turns(restored, random.Random(3), 10) == _play_turns(battle, random.Random(3), 10)
+    assert encode_battle(restored) == encode_battle(battle)
+
+@pytest.mark.asyncio
+async def test_codec_rejects_corrupt_data(game_factory: GameDataFactory):
+    data = encode_battle(_new_battle(game_factory, seed=1))
+    with pytest.raises(CodecError): decode_battle(b"XXX" + data[3:], game_factory)
+    with pytest.raises(CodecError): decode_battle(data[:3] + bytes([99]) + data[4:], game_factory)
+    with pytest.raises(CodecError): decode_battle(data[:len(data) // 2], game_factory)
+
+def _pickle_graph(battle: Battle) -> bytes:
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[weakref.ReferenceType] = lambda ref: (weakref.ref, (ref(),))
+    # 效果属性是只读视图 (MappingProxyType 无法序列化)，按普通字典序列化
+    pickler.dispatch_table[MappingProxyType] = lambda proxy: (dict, (dict(proxy),))
+    pickler.dump(battle)
+    return buffer.getvalue()
+
+def _per_call(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n): fn()
+    return (time.perf_counter() - start) / n
+
+@pytest.mark.asyncio
+async def test_codec_is_smaller_and_faster_than_pickle(game_factory: GameDataFactory):
+    battle = _new_battle(game_factory, seed=5)
+    _play_turns(battle, random.Random(1), 15)
+    with pytest.raises((TypeError, pickle.PicklingError)):
+        pickle.dumps(battle)
+
+    pickled = _pickle_graph(battle)
+    encoded = encode_battle(battle)
+    encoded_no_rng = encode_battle(battle, include_rng=False)
+    pickle_time = _per_call(lambda: _pickle_graph(battle), 20) + _per_call(lambda: pickle.loads(pickled), 20)
+    codec_time = _per_call(lambda: encode_battle(battle), 100) + _per_call(lambda: decode_battle(encoded, game_factory), 100)
+
+    print(f"\n[编码基准] pickle: {len(pickled)} 字节, 往返 {pickle_time * 1e6:.0f}us | "
+          f"codec: {len(encoded)} 字节 (不含随机数状态 {len(encoded_no_rng)} 字节), 往返 {codec_time * 1e6:.0f}us")
+    assert len(encoded) * 5 < len(pickled)
+    assert codec_time < pickle_time
\ No newline at end of file
@@ -0,0 +1,55 @@
+# tests/test_command_executor.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from astrbot_plugin_hapemxg_roco1.command_executor import SessionCommandExecutor
+
+@pytest.mark.asyncio
+async def test_same_session_commands_never_interleave():
+    executor = SessionCommandExecutor(max_workers=4)
+    running, overlaps, order = [0], [], []
+    guard = threading.Lock()
+
+    def command(i: int) -> int:
+        with guard:
+            running[0] += 1
+            overlaps.append(running[0])
+        time.sleep(0.005)
+        order.append(i)
+        with guard:
+            running[0] -= 1
+        return i
+
+    results = await asyncio.gather(*(executor.run("group_1", command, i) for i in range(20)))
+    executor.shutdown()
+
+    assert results == list(range(20))
+    assert max(overlaps) == 1, "同一会话的指令不应并发执行"
+    assert order == list(range(20)), "同一会话的指令应按到达顺序执行"
+    assert executor.active_sessions == 0, "执行完毕后不应残留会话锁"
+
+@pytest.mark.asyncio
+async def test_different_sessions_run_in_parallel_off_the_event_loop():
+    executor = SessionCommandExecutor(max_workers=4)
+    barrier = threading.Barrier(4, timeout=5)
+    loop_thread = threading.get_ident()
+
+    def command() -> int:
+        # 四个会话的指令必须同时处于执行中才能通过屏障
+        barrier.wait()
+        return threading.get_ident()
+
+    threads = await asyncio.gather(*(executor.run(f"group_{i}", command) for i in range(4)))
+    executor.shutdown()
+    assert loop_thread not in threads
+
+@pytest.mark.asyncio
+async def test_inline_mode_and_exceptions():
+    executor = SessionCommandExecutor(max_workers=0)
+    assert await executor.run("s", lambda x, y=0: x + y, 1, y=2) == 3
+    with pytest.raises(ValueError):
+        await executor.run("s", int, "not a number")
+    assert executor.active_sessions == 0
\ No newline at end of file
@@ -0,0 +1,92 @@
+# tests/test_damage_calc.py
+import random
+from collections import Counter
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.damage_calc import roll_distribution
+from astrbot_plugin_hapemxg_roco1.service import GameService
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _sample(battle: Battle, attacker, defender, move, trials: int) -> Counter:
+    """用引擎本身的命中与伤害判定反复结算同一次攻击，统计伤害的经验分布。"""
+    counts = Counter()
+    for _ in range(trials):
+        damage = 0
+        if battle._check_hit(attacker, defender, move):
+            damage = battle.calculate_damage(attacker, defender, move)["damage"]
+        counts[damage] += 1
+    return counts
+
+@pytest.mark.asyncio
+async def test_distribution_matches_engine_sampling(game_factory: GameDataFactory):
+    attacker = game_factory.create_pokemon("测试精灵", 30)
+    defender = game_factory.create_pokemon("测试精灵2", 30)
+    battle = Battle([attacker], [defender], game_factory, seed=11, log_enabled=False)
+    move = attacker.get_move_by_name("水波术")
+
+    dist = battle.damage_distribution(attacker, defender, move)
+    assert sum(dist.outcomes.values()) == pytest.approx(1.0)
+    assert dist.hit_chance == pytest.approx(0.8) and dist.effectiveness == 2.0 and dist.stab
+    assert dist.outcomes[0] == pytest.approx(0.2)
+    # 未暴击时伤害浮动为 ±15%，暴击伤害翻倍
+    assert dist.max_damage >= 2 * dist.min_damage
+
+    trials = 40000
+    counts = _sample(battle, attacker, defender, move, trials)
+    total_variation = 0.5 * sum(abs(dist.outcomes.get(v, 0.0) - counts[v] / trials) for v in set(counts) | set(dist.outcomes))
+    assert total_variation < 0.03, f"解析分布与引擎抽样相差过大: {total_variation:.4f}"
+    sampled_mean = sum(v * n for v, n in counts.items()) / trials
+    assert dist.expected == pytest.approx(sampled_mean, rel=0.02)
+
+@pytest.mark.asyncio
+async def test_ko_chance_evasion_and_status_moves(game_factory: GameDataFactory):
+    attacker = game_factory.create_pokemon("测试精灵", 30)
+    defender = game_factory.create_pokemon("测试精灵2", 30)
+    battle = Battle([attacker], [defender], game_factory, seed=1, log_enabled=False)
+    move = attacker.get_move_by_name("水波术")
+    rng_state = battle.rng.getstate()
+
+    dist = battle.damage_distribution(attacker, defender, move)
+    assert dist.target_hp == defender.current_hp
+    assert dist.chance_at_least(1) == pytest.approx(dist.hit_chance)
+    assert dist.chance_at_least(dist.max_damage + 1) == 0.0
+    # 残血时只要命中必定击倒
+    defender.take_damage(defender.max_hp - 1)
+    assert battle.damage_distribution(attacker, defender, move).ko_chance == pytest.approx(0.8)
+
+    defender.apply_effect("evasion_shield")
+    evaded = battle.damage_distribution(attacker, defender, move)
+    assert evaded.hit_chance == 0.0 and evaded.outcomes == {0: 1.0} and evaded.ko_chance == 0.0
+
+    status = battle.damage_distribution(attacker, defender, attacker.get_move_by_name("魔法增效"))
+    assert status.outcomes == {0: 1.0}
+    assert battle.rng.getstate() == rng_state, "解析计算不应消耗对战的随机源"
+
+    # 浮动区间内每个整数伤害的概率与区间长度成正比
+    assert roll_distribution(100.0) == pytest.approx({v: 1 / 15 for v in range(85, 100)})
+    assert roll_distribution(0.5) == {1: 1.0}
+
+@pytest.mark.asyncio
+async def test_calc_command_reports_every_move(game_factory: GameDataFactory):
+    service = GameService(game_factory, [{"name": "测试精灵2", "moves": []}], max_sessions=None)
+    assert service.start_new_selection("calc").success
+    assert service.add_pokemon_to_team("calc", ["测试精灵"]).success
+    assert service.ready_and_start_battle("calc", "测试精灵").success
+    battle = service.sessions["calc"].battle
+    turn = battle.turn_count
+
+    result = service.calculate_move_damage("calc")
+    assert result.success
+    assert "水波术: 伤害" in result.message and "击倒概率" in result.message
+    assert "魔法增效: 不造成伤害" in result.message
+    assert battle.turn_count == turn
+
+    assert service.calculate_move_damage("calc", "水波术").message.count("\n") == 1
+    assert not service.calculate_move_damage("calc", "不存在的技能").success
+    assert not service.calculate_move_damage("nobody").success
\ No newline at end of file
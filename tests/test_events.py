@@ -0,0 +1,61 @@
+# tests/test_events.py
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import Stat
+from astrbot_plugin_hapemxg_roco1.battle_logic.events import TurnStarted, MoveUsed, DamageDealt, Fainted, SentOut
+from astrbot_plugin_hapemxg_roco1.battle_logic.render import render_event, render_events
+
+SEED = 20240601
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _make_battle(factory: GameDataFactory, **kwargs) -> Battle:
+    player = factory.create_pokemon("测试精灵", 100, move_names=["水波术"])
+    npc_team = [factory.create_pokemon("测试精灵2", 5, move_names=["猛烈撞击"]), factory.create_pokemon("测试精灵2", 5, move_names=["猛烈撞击"])]
+    player.stats[Stat.SPEED] = 999
+    for npc in npc_team: npc.take_damage(npc.max_hp - 1)
+    return Battle([player], npc_team, factory, seed=SEED, **kwargs)
+
+@pytest.mark.asyncio
+async def test_turn_result_contains_typed_events_and_rendered_log(game_factory: GameDataFactory):
+    battle = _make_battle(game_factory)
+    move = battle.player_active_pokemon.get_move_by_name("水波术")
+    result = battle.process_turn({"type": "attack", "data": move})
+
+    events = result["events"]
+    assert events[0] == TurnStarted(1)
+    assert events[1] == MoveUsed("player", "测试精灵", "水波术")
+    damage = next(e for e in events if isinstance(e, DamageDealt))
+    assert damage.side == "npc" and damage.amount > 0
+    # 同一只宝可梦的倒下只记录一次，随后NPC派出下一只
+    assert [e for e in events if isinstance(e, Fainted)] == [Fainted("npc", "测试精灵2")]
+    assert SentOut("npc", "测试精灵2") in events
+
+    assert result["log"] == render_events(events)
+    assert "(玩家)测试精灵 使用了 水波术！" in result["log"]
+    assert "(NPC)测试精灵2 倒下了！" in result["log"]
+    assert "(NPC) 派出了新的宝可梦：测试精灵2！" in result["log"]
+
+@pytest.mark.asyncio
+async def test_damage_event_rendering():
+    event = DamageDealt("npc", "测试精灵2", 42, is_crit=True, effectiveness=2.0)
+    assert render_event(event) == ["  对 (NPC)测试精灵2 造成了 42 点伤害！", "  (击中了要害！ 效果绝佳！)"]
+    assert render_event(DamageDealt("player", "测试精灵", 7)) == ["  对 (玩家)测试精灵 造成了 7 点伤害！"]
+
+@pytest.mark.asyncio
+async def test_log_disabled_produces_no_events(game_factory: GameDataFactory):
+    logged, silent = _make_battle(game_factory), _make_battle(game_factory, log_enabled=False)
+    for battle in (logged, silent):
+        battle.process_turn({"type": "attack", "data": battle.player_active_pokemon.get_move_by_name("水波术")})
+
+    result = silent.process_turn({"type": "attack", "data": silent.player_active_pokemon.get_move_by_name("水波术")})
+    assert result["events"] == [] and result["log"] == ""
+    logged.process_turn({"type": "attack", "data": logged.player_active_pokemon.get_move_by_name("水波术")})
+    # 无日志模式只是不产生事件，对战结果完全相同
+    assert result["is_over"] and logged.is_over()
+    assert [p.current_hp for p in silent.player_team] == [p.current_hp for p in logged.player_team]
\ No newline at end of file
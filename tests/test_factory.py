@@ -0,0 +1,88 @@
+# tests/test_factory.py
+import pickle
+import shutil
+import pytest
+from itertools import product
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import TypeEffectiveness
+from astrbot_plugin_hapemxg_roco1.battle_logic import data_cache
+
+TEST_DATA_PATH = Path(__file__).parent / "test_data"
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(TEST_DATA_PATH)
+
+@pytest.mark.asyncio
+async def test_compiled_type_matrix_matches_chart(game_factory: GameDataFactory):
+    """预编译的倍率矩阵应与逐项查表的结果完全一致，包括双属性与未知属性。"""
+    chart = game_factory.get_type_chart()
+    types = list(game_factory._type_index) + ["未知属性"]
+    for move_type, first, second in product(types, types, types):
+        for defender_types in ([first], [first, second]):
+            expected = TypeEffectiveness.get_effectiveness(move_type, defender_types, chart)
+            assert game_factory.get_type_effectiveness(move_type, defender_types) == expected
+
+@pytest.mark.asyncio
+async def test_move_templates_are_shared_and_immutable(game_factory: GameDataFactory):
+    """技能模板按名称只构建一次，被所有宝可梦共享，且不可修改。"""
+    first = game_factory.create_pokemon("测试精灵", 100, move_names=["猛烈撞击"])
+    second = game_factory.create_pokemon("测试精灵2", 100, move_names=["猛烈撞击"])
+    move = first.get_move_by_name("猛烈撞击")
+
+    assert move is second.get_move_by_name("猛烈撞击") is game_factory.get_move_template("猛烈撞击")
+    with pytest.raises(AttributeError):
+        move.display_power = 999
+    restored = pickle.loads(pickle.dumps(move))
+    assert (restored.name, restored.display_power, restored.max_pp) == (move.name, move.display_power, move.max_pp)
+
+    first.use_move("猛烈撞击")
+    assert first.get_current_pp("猛烈撞击") == second.get_current_pp("猛烈撞击") - 1, "PP应记录在各自的Aura中"
+
+def _describe(factory: GameDataFactory):
+    """工厂加载结果中会影响对战的部分，用于比较两次加载是否一致。"""
+    moves = {}
+    for name in factory._move_db:
+        move = factory.get_move_template(name)
+        state = move.__getstate__()
+        state["pipeline"] = [(type(e).__name__, e.effect_data) for e in move.pipeline]
+        moves[name] = state
+    pokemon = {name: factory.get_pokemon_data(name).model_dump() for name in factory.get_all_pokemon_names()}
+    sequences = {k: [[e.effect_data for e in step] for step in v] for k, v in factory._follow_up_sequences.items()}
+    return moves, pokemon, sequences, factory.get_effect_properties(), factory._type_matrix
+
+@pytest.mark.asyncio
+async def test_compiled_cache_skips_validation_until_sources_change(tmp_path: Path, monkeypatch):
+    """数据文件未修改时从缓存加载 (不再校验) 且结果与完整校验一致；修改任一数据文件后自动重新校验。"""
+    data_path, cache_dir = tmp_path / "data", tmp_path / "cache"
+    shutil.copytree(TEST_DATA_PATH, data_path)
+    validated = GameDataFactory(data_path, cache_dir=cache_dir)
+    assert (cache_dir / data_cache.CACHE_FILE_NAME).exists()
+
+    calls = []
+    original = GameDataFactory._validate_data
+    monkeypatch.setattr(GameDataFactory, "_validate_data", staticmethod(lambda path: calls.append(path) or original(path)))
+    cached = GameDataFactory(data_path, cache_dir=cache_dir)
+    assert calls == [], "数据文件未修改时不应重新校验"
+    assert _describe(cached) == _describe(validated)
+    pokemon = cached.get_pokemon_data("测试精灵")
+    pokemon.default_moves.append("不存在的技能")
+    assert "不存在的技能" not in cached.get_pokemon_data("测试精灵").default_moves, "缓存数据应为只读"
+
+    chart_file = data_path / "type_chart.json"
+    chart_file.write_text(chart_file.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    GameDataFactory(data_path, cache_dir=cache_dir)
+    assert len(calls) == 1, "数据文件修改后应重新校验"
+    GameDataFactory(data_path, cache_dir=cache_dir)
+    assert len(calls) == 1, "重新校验后应写入新的缓存"
+
+@pytest.mark.asyncio
+async def test_corrupted_cache_falls_back_to_validation(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / data_cache.CACHE_FILE_NAME).write_bytes(b"not a marshal blob")
+    factory = GameDataFactory(TEST_DATA_PATH, cache_dir=cache_dir)
+    assert factory.create_pokemon("测试精灵", 100) is not None
+    assert data_cache.load(cache_dir / data_cache.CACHE_FILE_NAME, data_cache.source_digest(TEST_DATA_PATH)) is not None, "校验后应重写损坏的缓存"
\ No newline at end of file
@@ -0,0 +1,78 @@
+# tests/test_fork.py
+import time
+import random
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState
+from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatusEffectComponent
+from astrbot_plugin_hapemxg_roco1.battle_logic.aura import ComponentLifespan
+from astrbot_plugin_hapemxg_roco1.battle_logic.codec import encode_battle
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _make_battle(factory: GameDataFactory, seed: int = 3) -> Battle:
+    player_team = [factory.create_pokemon("测试精灵", 100), factory.create_pokemon("测试精灵3", 100)]
+    npc_team = [factory.create_pokemon("测试精灵2", 100, ["魔法增效", "臭鸡蛋", "金属噪音", "巨焰吞噬"])]
+    return Battle(player_team, npc_team, factory, seed=seed)
+
+def _play(battle: Battle, turns: int, chooser: random.Random):
+    for _ in range(turns):
+        if battle.is_over(): return
+        if battle.state == BattleState.AWAITING_SWITCH:
+            battle.process_faint_switch(battle.get_player_survivors()[0]); continue
+        player = battle.player_active_pokemon
+        battle.process_turn({"type": "attack", "data": chooser.choice([s.move for s in player.skill_slots])})
+
+@pytest.mark.asyncio
+async def test_fork_continues_identically_and_independently(game_factory: GameDataFactory):
+    battle = _make_battle(game_factory)
+    _play(battle, 3, random.Random(1))
+    before = encode_battle(battle)
+
+    fork = battle.fork()
+    assert encode_battle(fork) == before
+    assert fork.factory is battle.factory
+    assert fork.player_active_pokemon.skill_slots[0].move is battle.player_active_pokemon.skill_slots[0].move
+    # 在分叉上推演不影响原对战
+    _play(fork, 4, random.Random(2))
+    assert encode_battle(battle) == before
+
+    # 分叉默认复制随机源的当前状态，相同的操作得到相同的结果
+    twin = battle.fork()
+    _play(battle, 4, random.Random(2))
+    _play(twin, 4, random.Random(2))
+    assert encode_battle(twin) == encode_battle(battle)
+    assert twin.recorder is None
+
+@pytest.mark.asyncio
+async def test_fork_copies_mutable_status_data(game_factory: GameDataFactory):
+    battle = _make_battle(game_factory)
+    curse = StatusEffectComponent("curse", {"name": "诅咒"}, lifespan=ComponentLifespan.VOLATILE)
+    curse.data["duration"] = 3
+    battle.npc_active_pokemon.aura.add_component(curse)
+
+    fork = battle.fork()
+    [copy] = fork.npc_active_pokemon.aura.get_components_by_key(StatusEffectComponent, "curse")
+    assert copy is not curse and copy.data == {"duration": 3} and copy.properties is curse.properties
+    copy.data["duration"] -= 1
+    assert curse.data == {"duration": 3}, "分叉上状态的运行期数据变化不应影响原对战"
+
+    # 分叉上移除状态后，原对战的索引仍然完整
+    fork.npc_active_pokemon.aura.remove_component(copy)
+    assert not fork.npc_active_pokemon.aura.has_components(StatusEffectComponent, "curse")
+    assert battle.npc_active_pokemon.aura.get_components_by_key(StatusEffectComponent, "curse") == [curse]
+
+@pytest.mark.asyncio
+async def test_fork_throughput(game_factory: GameDataFactory):
+    battle = _make_battle(game_factory)
+    _play(battle, 3, random.Random(1))
+    count, start = 2000, time.perf_counter()
+    for _ in range(count): battle.fork()
+    rate = count / (time.perf_counter() - start)
+    print(f"\n[分叉基准] {rate:.0f} 次/秒")
+    assert rate > 1000, f"分叉速度 {rate:.0f} 次/秒 过低"
\ No newline at end of file
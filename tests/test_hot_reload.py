@@ -0,0 +1,67 @@
+# tests/test_hot_reload.py
+import json
+import os
+import shutil
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.data_watcher import GameDataWatcher
+
+TEST_DATA_PATH = Path(__file__).parent / "test_data"
+
+@pytest.fixture
+def data_path(tmp_path: Path) -> Path:
+    path = tmp_path / "data"
+    shutil.copytree(TEST_DATA_PATH, path)
+    return path
+
+def _edit_json(path: Path, edit):
+    """修改一个数据文件，并确保其修改时间发生变化。"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    edit(data)
+    stat = path.stat()
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+@pytest.mark.asyncio
+async def test_reload_revalidates_only_changed_file_and_keeps_old_snapshot(data_path: Path, monkeypatch):
+    old = GameDataFactory(data_path)
+    battle = Battle([old.create_pokemon("测试精灵3", 100)], [old.create_pokemon("测试精灵", 100, ["猛烈撞击"])], old, seed=1)
+    old_power = old.get_move_template("猛烈撞击").display_power
+    assert old.reload() is old, "数据文件未修改时不应生成新的工厂"
+
+    _edit_json(data_path / "moves.json", lambda moves: moves["猛烈撞击"]["display"].update(power=old_power + 10))
+    validated = []
+    original = GameDataFactory._validate_data
+    monkeypatch.setattr(GameDataFactory, "_validate_data", staticmethod(lambda raw: validated.append(sorted(raw)) or original(raw)))
+    assert old.changed_sources() == ["moves.json"]
+    new = old.reload()
+
+    assert validated == [["moves"]], "只应重新读取并校验被修改的文件"
+    assert new is not old and new.changed_sources() == []
+    assert new.get_move_template("猛烈撞击").display_power == old_power + 10
+    assert new._compiled["pokemon"] is old._compiled["pokemon"], "未修改的数据应直接沿用"
+    # 旧的快照与进行中的对战不受影响
+    assert old.get_move_template("猛烈撞击").display_power == old_power
+    assert battle.factory is old and battle.npc_active_pokemon.get_move_by_name("猛烈撞击").display_power == old_power
+    battle.process_turn({"type": "attack", "data": battle.player_active_pokemon.skill_slots[0].move})
+
+@pytest.mark.asyncio
+async def test_watcher_keeps_current_data_until_a_valid_edit(data_path: Path):
+    published = []
+    factory = GameDataFactory(data_path)
+    watcher = GameDataWatcher(factory, published.append)
+    assert not watcher.check()
+
+    # 校验失败：保留当前数据，同一份错误的文件不会被反复重试
+    _edit_json(data_path / "pokemon.json", lambda pokemon: pokemon["测试精灵"]["base_stats"].pop("hp"))
+    assert not watcher.check() and not watcher.check()
+    assert published == [] and watcher.factory is factory
+
+    _edit_json(data_path / "pokemon.json", lambda pokemon: pokemon["测试精灵"]["base_stats"].update(hp=1))
+    assert watcher.check()
+    assert published == [watcher.factory] and watcher.factory is not factory
+    assert watcher.factory.get_pokemon_data("测试精灵").base_stats.hp == 1
+    assert factory.get_pokemon_data("测试精灵").base_stats.hp != 1
\ No newline at end of file
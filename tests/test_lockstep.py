@@ -0,0 +1,98 @@
+# tests/test_lockstep.py
+import json
+import math
+import shutil
+import time
+import pytest
+from pathlib import Path
+
+pytest.importorskip("numpy")
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.simulation import BattleSimulator
+from astrbot_plugin_hapemxg_roco1.battle_logic.lockstep import LockstepSimulator, UnsupportedMatchupError
+
+OBJECT_BATTLES = 1500
+LOCKSTEP_BATTLES = 15000
+
+# 覆盖持续伤害与状态替换、追击序列、必中与闪避、先制技能、治疗、恐惧→畏缩、概率降能力等机制
+MATCHUPS = [
+    ([{"name": "测试精灵"}], [{"name": "测试精灵2"}]),
+    ([{"name": "测试精灵3"}], [{"name": "测试精灵4"}]),
+    ([{"name": "测试精灵3", "moves": ["光合作用", "龙威", "愤怒斩", "泥浆喷射"]}], [{"name": "测试精灵2"}]),
+]
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("player_spec,npc_spec", MATCHUPS)
+async def test_lockstep_engine_agrees_with_object_engine(game_factory: GameDataFactory, player_spec, npc_spec):
+    """【统计验证】两个引擎的胜率、回合数分布与各来源的伤害应在抽样误差范围内一致。"""
+    expected = BattleSimulator(game_factory, seed=1, level=50).run(player_spec, npc_spec, OBJECT_BATTLES)
+    actual = LockstepSimulator(game_factory, seed=1, level=50).run(player_spec, npc_spec, LOCKSTEP_BATTLES)
+    assert actual.battles == LOCKSTEP_BATTLES
+
+    def tolerance(variance: float) -> float:
+        # 4 倍标准误差 (两个样本的方差之和)
+        return 4 * math.sqrt(variance / OBJECT_BATTLES + variance / LOCKSTEP_BATTLES)
+
+    p = actual.player_win_rate
+    assert abs(expected.player_win_rate - p) <= tolerance(p * (1 - p)) + 1e-3
+    turn_variance = sum(n * (t - actual.mean_turns) ** 2 for t, n in actual.turn_counts.items()) / actual.battles
+    assert abs(expected.mean_turns - actual.mean_turns) <= tolerance(turn_variance)
+
+    for side, moves in expected.move_damage.items():
+        for source, stats in moves.items():
+            # 样本较少的来源噪声太大，不做比较
+            if stats.hits < 500: continue
+            mine = actual.move_damage[side][source]
+            assert mine.mean == pytest.approx(stats.mean, rel=0.1), f"{side} {source} 的平均伤害不一致"
+            assert mine.hits / actual.battles == pytest.approx(stats.hits / expected.battles, rel=0.15), f"{side} {source} 的命中次数不一致"
+
+@pytest.mark.asyncio
+async def test_lockstep_is_reproducible_and_fast(game_factory: GameDataFactory):
+    player_spec, npc_spec = MATCHUPS[1]
+    first = LockstepSimulator(game_factory, seed=9, batch_size=512).run(player_spec, npc_spec, 2000)
+    second = LockstepSimulator(game_factory, seed=9, batch_size=512).run(player_spec, npc_spec, 2000)
+    assert first == second
+
+    start = time.perf_counter()
+    report = LockstepSimulator(game_factory, seed=3).run(player_spec, npc_spec, 20000)
+    rate = report.battles / (time.perf_counter() - start)
+    print(f"\n[锁步模拟基准] {rate * 60 / 1e6:.1f} 百万场/分钟")
+    assert report.player_wins + report.npc_wins + report.draws == 20000
+
+@pytest.mark.asyncio
+async def test_unsupported_matchups_are_rejected(game_factory: GameDataFactory):
+    simulator = LockstepSimulator(game_factory, seed=1)
+    with pytest.raises(UnsupportedMatchupError):
+        simulator.run([{"name": "测试精灵"}, {"name": "测试精灵2"}], [{"name": "测试精灵3"}], 10)
+    with pytest.raises(ValueError):
+        simulator.run([{"name": "不存在的精灵"}], [{"name": "测试精灵3"}], 10)
+
+@pytest.mark.asyncio
+async def test_turn_scoped_statuses_and_stacked_residuals_are_rejected(tmp_path: Path):
+    """回合结束时清除的状态、同一方可能同时带有的多个回合末效果 (对象引擎按施加顺序结算) 都不被支持。"""
+    data_path = tmp_path / "data"
+    shutil.copytree(Path(__file__).parent / "test_data", data_path)
+    statuses = json.loads((data_path / "status_conditions.json").read_text(encoding="utf-8"))
+    statuses["guard"] = {"name": "守势", "category": "status", "status_type": "D", "is_volatile": False, "is_temporary": True, "stacking_behavior": "refresh"}
+    (data_path / "status_conditions.json").write_text(json.dumps(statuses, ensure_ascii=False), encoding="utf-8")
+    moves = json.loads((data_path / "moves.json").read_text(encoding="utf-8"))
+    def status_move(*applied):
+        effects = [{"handler": "apply_status", "target": target, "status": status, "chance": 100} for status, target in applied]
+        return {"display": {"power": 0, "pp": 20, "type": "一般", "category": "status"}, "on_use": {"priority": 8, "accuracy": 100, "effects": effects}}
+    moves["守势"] = status_move(("guard", "self"))
+    moves["毒火"] = status_move(("poison", "opponent"), ("burn", "opponent"))
+    (data_path / "moves.json").write_text(json.dumps(moves, ensure_ascii=False), encoding="utf-8")
+    simulator = LockstepSimulator(GameDataFactory(data_path), seed=1)
+
+    with pytest.raises(UnsupportedMatchupError, match="guard"):
+        simulator.compile([{"name": "测试精灵", "moves": ["守势", "水波术"]}], [{"name": "测试精灵2"}])
+    # 中毒与灼伤的 status_type 不同，可以同时存在
+    with pytest.raises(UnsupportedMatchupError, match="结算顺序"):
+        simulator.compile([{"name": "测试精灵", "moves": ["毒火", "水波术"]}], [{"name": "测试精灵3"}])
+    # 同一 status_type 的中毒与诅咒互相替换，不会同时存在
+    simulator.compile([{"name": "测试精灵", "moves": ["臭鸡蛋", "水波术"]}], [{"name": "测试精灵2"}])
\ No newline at end of file
@@ -16,6 +16,7 @@ def plugin_instance_integration(mocker) -> PokemonBattlePlugin:
         if key == 'npc_2_name': return '测试精灵3'
         if key == 'npc_2_moves': return []
         if key.startswith('npc_'): return None
+        if key in ('persist_sessions', 'save_replays'): return False
         return MagicMock()
 
     mock_config = mocker.Mock()
@@ -36,4 +37,18 @@ async def test_plugin_initialization_with_mock_config(plugin_instance_integratio
     assert plugin.factory is not None, "插件的 GameDataFactory 未能成功加载"
     assert len(plugin.npc_team_config_list) == 2, "插件未能正确解析模拟的NPC配置"
     assert plugin.npc_team_config_list[0]['name'] == '测试精灵2'
-    assert plugin.npc_team_config_list[1]['moves'] == []
\ No newline at end of file
+    assert plugin.npc_team_config_list[1]['moves'] == []
+
+@pytest.mark.asyncio
+async def test_plugin_defers_loading_and_reports_startup_phases(plugin_instance_integration: PokemonBattlePlugin):
+    """构造插件时不加载游戏数据；注册后由后台任务加载，并记录分阶段的启动耗时。"""
+    plugin = plugin_instance_integration
+    assert not plugin._loaded and plugin._factory is None, "构造插件时不应加载游戏数据"
+
+    await plugin.initialize()
+    await plugin._load_task
+    assert plugin._loaded and plugin.service is not None
+    phases = plugin.startup_profiler.phases
+    assert "导入模块" in phases and "建立索引" in phases
+    assert "JSON解析" in phases or "读取缓存" in phases
+    await plugin.terminate()
\ No newline at end of file
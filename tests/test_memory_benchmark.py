@@ -0,0 +1,77 @@
+# tests/test_memory_benchmark.py
+"""
+基于 tracemalloc 的内存基准：报告每个对战会话占用的字节数与每回合产生的组件数，
+并以宽松的上限守护 __slots__ 组件与日志压缩带来的内存收益。运行 `pytest -s` 可查看报告。
+"""
+import gc
+import random
+import tracemalloc
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState
+from astrbot_plugin_hapemxg_roco1.battle_logic.components import DamageComponent
+
+# 上限留有充足余量，只用于发现数量级上的回退 (如组件重新带上 __dict__)
+MAX_BYTES_PER_COMPONENT = 100
+MAX_BYTES_PER_SESSION = 96 * 1024
+MAX_RETAINED_COMPONENTS_PER_POKEMON = 48
+
+@pytest.fixture(scope="module")
+def game_factory():
+    from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _measure(build):
+    """返回 build() 的结果，以及该结果在 GC 之后仍然占用的字节数。"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+def _play_session(factory, rng: random.Random) -> Battle:
+    """模拟一个聊天会话中的完整对战 (保留日志输出)，返回结束后的 Battle。"""
+    player_team = [factory.create_pokemon(n, 100) for n in ("测试精灵", "测试精灵3")]
+    npc_team = [factory.create_pokemon(n, 100) for n in ("测试精灵2", "测试精灵4")]
+    battle = Battle(player_team, npc_team, factory, rng=rng)
+    while not battle.is_over() and battle.turn_count < 300:
+        if battle.state == BattleState.AWAITING_SWITCH:
+            battle.process_faint_switch(battle.get_player_survivors()[0]); continue
+        player = battle.player_active_pokemon
+        usable = [s.move for s in player.skill_slots if player.get_current_pp(s.move.name) > 0]
+        intent = {"type": "attack", "data": rng.choice(usable)} if usable else {"type": "force_immobilized_turn"}
+        battle.process_turn(intent)
+    return battle
+
+@pytest.mark.asyncio
+async def test_component_allocation_size():
+    n = 10000
+    components, size = _measure(lambda: [DamageComponent(10, source_move="猛烈撞击") for _ in range(n)])
+    per_component = size / n
+    print(f"\n[内存基准] 每个 DamageComponent 约 {per_component:.1f} 字节 (含列表槽位)")
+    assert per_component < MAX_BYTES_PER_COMPONENT
+    assert not hasattr(components[0], "__dict__")
+
+@pytest.mark.asyncio
+async def test_session_memory_budget(game_factory):
+    rng = random.Random(2024)
+    sessions = 20
+    battles, size = _measure(lambda: [_play_session(game_factory, rng) for _ in range(sessions)])
+
+    turns = sum(b.turn_count for b in battles)
+    pokemon = [p for b in battles for p in b.player_team + b.npc_team]
+    raw_records = sum(getattr(c, "count", 1) for p in pokemon for c in p.aura._components.values())
+    retained = max(len(p.aura._components) for p in pokemon)
+    bytes_per_session = size / sessions
+    print(f"\n[内存基准] {sessions} 个会话, 共 {turns} 回合: 每会话 {bytes_per_session / 1024:.1f} KiB, "
+          f"每回合产生 {raw_records / turns:.2f} 条组件记录, 单只宝可梦最多保留 {retained} 个组件")
+
+    assert bytes_per_session < MAX_BYTES_PER_SESSION
+    assert retained <= MAX_RETAINED_COMPONENTS_PER_POKEMON
\ No newline at end of file
@@ -0,0 +1,88 @@
+# tests/test_persistence.py
+import random
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState
+from astrbot_plugin_hapemxg_roco1.battle_logic.codec import encode_battle, decode_battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.replay import BattleRecorder, BattleJournal
+from astrbot_plugin_hapemxg_roco1.persistence import SqliteSessionBackend, WriteBehindWriter, resolve_snapshot
+from astrbot_plugin_hapemxg_roco1.service import GameService, GameSession
+
+NPC_CONFIG = [{"name": "测试精灵2", "moves": ["冥暗诅咒", "巨焰吞噬"]}, {"name": "测试精灵3", "moves": []}]
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _play_turns(battle: Battle, rng: random.Random, turns: int):
+    for _ in range(turns):
+        if battle.is_over(): break
+        if battle.state == BattleState.AWAITING_SWITCH:
+            battle.process_faint_switch(battle.get_player_survivors()[0]); continue
+        player = battle.player_active_pokemon
+        usable = [s.move for s in player.skill_slots if player.get_current_pp(s.move.name) > 0]
+        battle.process_turn({"type": "attack", "data": rng.choice(usable)} if usable else {"type": "force_immobilized_turn"})
+
+@pytest.mark.asyncio
+async def test_battle_snapshot_round_trip(game_factory: GameDataFactory):
+    rng = random.Random(3)
+    player_team = [game_factory.create_pokemon(n, 100) for n in ("测试精灵", "测试精灵3")]
+    npc_team = [game_factory.create_pokemon(n, 100) for n in ("测试精灵2", "测试精灵4")]
+    battle = Battle(player_team, npc_team, game_factory, rng=rng)
+    _play_turns(battle, rng, 12)
+
+    data = encode_battle(battle)
+    restored = decode_battle(data, game_factory)
+
+    assert encode_battle(restored) == data
+    assert restored.turn_count == battle.turn_count and restored.state == battle.state
+    for old, new in zip(battle.player_team + battle.npc_team, restored.player_team + restored.npc_team):
+        assert new.current_hp == old.current_hp
+        assert [new.get_current_pp(s.move.name) for s in new.skill_slots] == [old.get_current_pp(s.move.name) for s in old.skill_slots]
+        assert [(c.effect_id, c.properties, c.data) for c in new.get_effects_by_category("sequence")] == \
+               [(c.effect_id, c.properties, c.data) for c in old.get_effects_by_category("sequence")]
+    assert restored.player_active_pokemon is restored.player_team[battle.player_team.index(battle.player_active_pokemon)]
+
+@pytest.mark.asyncio
+async def test_sessions_survive_restart_and_load_lazily(game_factory: GameDataFactory, tmp_path: Path):
+    db_path = tmp_path / "sessions.db"
+    service = GameService(game_factory, NPC_CONFIG, persistence=WriteBehindWriter(SqliteSessionBackend(db_path)))
+    service.start_new_selection("s1")
+    service.add_pokemon_to_team("s1", ["测试精灵"])
+    service.ready_and_start_battle("s1", "测试精灵")
+    assert service.execute_attack("s1", "水波术").success
+    service.start_new_selection("s2")
+    service.start_new_selection("s3"); service.flee_battle("s3")
+    _, battle = service.get_session_and_battle("s1")
+    expected = encode_battle(battle)
+    service.close()
+
+    restarted = GameService(game_factory, NPC_CONFIG, persistence=WriteBehindWriter(SqliteSessionBackend(db_path)))
+    assert len(restarted.sessions) == 0, "启动时不应预先加载任何会话"
+    session, battle = restarted.get_session_and_battle("s1")
+    assert session.is_fighting() and encode_battle(battle) == expected
+    assert len(restarted.sessions) == 1 and restarted.sessions.metrics.loaded == 1
+    assert "s2" in restarted.sessions and "s3" not in restarted.sessions
+    assert restarted.execute_attack("s1", "水波术").success
+    restarted.close()
+
+@pytest.mark.asyncio
+async def test_session_snapshot_defers_journal_encoding_and_is_isolated_from_later_turns(game_factory: GameDataFactory):
+    rng = random.Random(5)
+    battle = Battle([game_factory.create_pokemon("测试精灵", 100)], [game_factory.create_pokemon("测试精灵2", 100)], game_factory, rng=rng)
+    recorder = BattleRecorder.attach(battle)
+    _play_turns(battle, rng, 3)
+    session = GameSession(state=BattleState.FIGHTING, battle=battle)
+    snapshot = session.to_snapshot()
+    assert callable(snapshot["journal"]), "录像的编码应推迟到后台线程中进行"
+    expected_battle, expected_journal = encode_battle(battle), recorder.journal.to_bytes()
+
+    # 快照提交后会话继续对战，后台线程编码出的仍是提交时的状态
+    _play_turns(battle, rng, 3)
+    data = resolve_snapshot(snapshot)
+    assert data["battle"] == expected_battle and data["journal"] == expected_journal
+    assert resolve_snapshot(snapshot) == data
+    assert BattleJournal.from_bytes(data["journal"]).turns == 3
\ No newline at end of file
@@ -4,7 +4,8 @@ from pathlib import Path
 from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
 from astrbot_plugin_hapemxg_roco1.battle_logic.pokemon import Pokemon
 from astrbot_plugin_hapemxg_roco1.battle_logic.constants import Stat
-from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatStageComponent
+from astrbot_plugin_hapemxg_roco1.battle_logic.aura import ComponentLifespan
+from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatStageComponent, StatusEffectComponent, VolatileFlagComponent, DamageComponent, PPConsumptionComponent, HealComponent
 
 @pytest.fixture(scope="module")
 def game_factory() -> GameDataFactory:
@@ -53,4 +54,62 @@ async def test_stat_stage_cannot_exceed_limit(game_factory: GameDataFactory):
     # 步骤4: 验证最终的能力等级总和仍然是6
     # 通过遍历Aura中所有相关的组件并求和来验证最终状态
     total_attack_stage = sum(c.change for c in p.aura.get_components(StatStageComponent) if c.stat == Stat.ATTACK)
-    assert total_attack_stage == 6, "攻击等级总和应保持在+6"
\ No newline at end of file
+    assert total_attack_stage == 6, "攻击等级总和应保持在+6"
+
+@pytest.mark.asyncio
+async def test_aura_index_stays_in_sync(game_factory: GameDataFactory):
+    """Aura 的类型/键/生命周期索引应随增删与按生命周期清理保持同步。"""
+    p = game_factory.create_pokemon(name="测试精灵", level=50)
+    curse = StatusEffectComponent("curse", {"name": "诅咒"}, lifespan=ComponentLifespan.VOLATILE)
+    flinch = VolatileFlagComponent("flinch")
+    p.aura.add_component(curse)
+    p.aura.add_component(flinch)
+    p.aura.add_component(StatStageComponent(Stat.SPEED, 1))
+
+    assert p.aura.get_components_by_key(StatusEffectComponent, "curse") == [curse]
+    assert p.aura.has_components(VolatileFlagComponent, "flinch")
+    assert p.get_modified_stat(Stat.SPEED) > p.stats[Stat.SPEED]
+
+    p.clear_turn_effects()
+    assert not p.aura.has_components(VolatileFlagComponent)
+    p.on_switch_out()
+    assert not p.has_effect("curse") and p.get_effect("curse") is None
+    assert len(p.aura.get_components(StatStageComponent)) == 1
+
+@pytest.mark.asyncio
+async def test_aura_totals_match_component_log(game_factory: GameDataFactory):
+    """累计值应与完整组件记录的求和结果一致，且移除组件时同步回退。"""
+    p = game_factory.create_pokemon(name="测试精灵", level=50)
+    move_name = p.skill_slots[0].move.name
+    p.take_damage(10); p.take_damage(7); p.heal(3)
+    p.use_move(move_name); p.use_move(move_name)
+    p.apply_stat_change(Stat.DEFENSE, 2)
+
+    assert p.current_hp == p.max_hp - 14
+    assert p.aura.get_total(DamageComponent) == sum(c.amount for c in p.aura.get_components(DamageComponent))
+    assert p.aura.get_total(PPConsumptionComponent, move_name) == 2
+    assert p.get_stat_stage(Stat.DEFENSE) == 2
+
+    p.aura.remove_component(p.aura.get_components(DamageComponent)[0])
+    assert p.current_hp == p.max_hp - 4
+
+@pytest.mark.asyncio
+async def test_aura_compaction_preserves_totals(game_factory: GameDataFactory):
+    """压缩应把旧的永久数值记录折叠为汇总记录，只保留有限的近期记录，且不改变任何读数。"""
+    p = game_factory.create_pokemon(name="测试精灵", level=50)
+    move_name = p.skill_slots[0].move.name
+    for i in range(30):
+        p.take_damage(1, source_move="A" if i % 2 else "B")
+        p.use_move(move_name)
+    hp_before, pp_before = p.current_hp, p.get_current_pp(move_name)
+
+    removed = p.aura.compact(keep_recent=4)
+
+    assert removed > 0
+    damage_records = p.aura.get_components(DamageComponent)
+    assert len(damage_records) == 4 + 2, "应保留4条近期记录，外加来源A、B各一条汇总记录"
+    assert sum(c.count for c in damage_records) == 30
+    assert len(p.aura.get_components(PPConsumptionComponent)) == 4 + 1
+    assert p.current_hp == hp_before and p.get_current_pp(move_name) == pp_before
+    assert p.aura.get_components(HealComponent)[0].amount == p.max_hp
+    assert p.aura.compact(keep_recent=4) == 0, "记录数未超过阈值时不应重复压缩"
\ No newline at end of file
@@ -0,0 +1,101 @@
+# tests/test_replay.py
+import random
+import time
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import BattleState
+from astrbot_plugin_hapemxg_roco1.battle_logic.ai import position_key
+from astrbot_plugin_hapemxg_roco1.battle_logic.codec import CodecError
+from astrbot_plugin_hapemxg_roco1.battle_logic.replay import BattleJournal, BattleRecorder, ReplayDivergence, replay
+from astrbot_plugin_hapemxg_roco1.service import GameService
+
+# 回放 200 回合对战的耗时上限 (秒)，留有充足余量
+MAX_REPLAY_SECONDS_200_TURNS = 0.5
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _record(battle: Battle, chooser: random.Random, turns: int) -> dict:
+    """录制一场对战，返回 {回合数: 该回合结束时的快照}。"""
+    states = {0: position_key(battle)}
+    while battle.turn_count < turns and not battle.is_over():
+        if battle.state == BattleState.AWAITING_SWITCH:
+            battle.process_faint_switch(battle.get_player_survivors()[-1]); continue
+        player = battle.player_active_pokemon
+        usable = [s.move for s in player.skill_slots if player.get_current_pp(s.move.name) > 0]
+        if usable and chooser.random() < 0.1 and len(battle.get_player_survivors()) > 1:
+            intent = {"type": "switch", "data": next(p for p in battle.get_player_survivors() if p is not player)}
+        else:
+            intent = {"type": "attack", "data": chooser.choice(usable)} if usable else {"type": "force_immobilized_turn"}
+        battle.process_turn(intent)
+        states[battle.turn_count] = position_key(battle)
+    return states
+
+def _new_battle(factory: GameDataFactory, seed: int, moves=None) -> Battle:
+    player_team = [factory.create_pokemon(n, 100, moves) for n in ("测试精灵", "测试精灵3")]
+    npc_team = [factory.create_pokemon(n, 100, moves) for n in ("测试精灵2", "测试精灵4")]
+    return Battle(player_team, npc_team, factory, seed=seed)
+
+@pytest.mark.asyncio
+async def test_replay_rebuilds_any_turn(game_factory: GameDataFactory):
+    battle = _new_battle(game_factory, seed=21)
+    recorder = BattleRecorder.attach(battle)
+    states = _record(battle, random.Random(4), 40)
+    data = recorder.journal.to_bytes()
+    journal = BattleJournal.from_bytes(data)
+    assert journal.to_bytes() == data
+    with pytest.raises(CodecError):
+        BattleJournal.from_bytes(data[:3] + bytes([1]) + data[4:])
+
+    for turn in sorted(states)[::3] + [battle.turn_count]:
+        replayed = replay(journal, game_factory, until_turn=turn)
+        assert replayed.turn_count == turn
+        assert position_key(replayed) == states[turn]
+    assert position_key(replay(journal, game_factory)) == position_key(battle)
+
+@pytest.mark.asyncio
+async def test_replay_detects_divergence(game_factory: GameDataFactory):
+    battle = _new_battle(game_factory, seed=8)
+    recorder = BattleRecorder.attach(battle)
+    _record(battle, random.Random(1), 5)
+    journal = BattleJournal.from_bytes(recorder.journal.to_bytes())
+    entry = next(e for e in journal.entries if e.draws)
+    entry.draws.pop()
+    with pytest.raises(ReplayDivergence):
+        replay(journal, game_factory)
+
+@pytest.mark.asyncio
+async def test_replay_of_200_turn_battle_is_fast(game_factory: GameDataFactory):
+    battle = _new_battle(game_factory, seed=2, moves=["魔法增效", "金属噪音", "护盾术"])
+    recorder = BattleRecorder.attach(battle)
+    _record(battle, random.Random(2), 200)
+    data = recorder.journal.to_bytes()
+    assert battle.turn_count == 200
+
+    start = time.perf_counter()
+    replayed = replay(BattleJournal.from_bytes(data), game_factory)
+    elapsed = time.perf_counter() - start
+    print(f"\n[录像基准] 200 回合录像 {len(data)} 字节，重放耗时 {elapsed * 1000:.1f}ms")
+    assert position_key(replayed) == position_key(battle) and replayed.turn_count == battle.turn_count
+    assert elapsed < MAX_REPLAY_SECONDS_200_TURNS
+
+@pytest.mark.asyncio
+async def test_service_saves_replay_of_finished_battle(game_factory: GameDataFactory, tmp_path: Path):
+    service = GameService(game_factory, [{"name": "测试精灵2", "moves": ["巨焰吞噬"]}], replay_dir=tmp_path)
+    service.start_new_selection("group:1")
+    service.add_pokemon_to_team("group:1", ["测试精灵"])
+    service.ready_and_start_battle("group:1", "测试精灵")
+    _, battle = service.get_session_and_battle("group:1")
+    for _ in range(50):
+        if not service.execute_attack("group:1", "水波术").success: break
+    assert battle.is_over()
+
+    replay_files = list(tmp_path.glob("group_1-*.pkr"))
+    assert len(replay_files) == 1
+    replayed = replay(BattleJournal.from_bytes(replay_files[0].read_bytes()), game_factory)
+    assert replayed.is_over() and replayed.get_winner() == battle.get_winner()
+    assert position_key(replayed) == position_key(battle)
\ No newline at end of file
@@ -57,9 +57,8 @@ async def test_hit_evasion_priority_logic(game_factory: GameDataFactory):
         display={"power": 60, "pp": 20, "type": "一般", "category": "special"},
         on_use={"accuracy": 100, "guaranteed_hit": False, "effects": [{"handler": "deal_damage", "options": {"power": 60}}]}
     )
-    # 【修复】为动态创建的技能添加伤害效果，否则 "造成了" 永远不会出现
-    guaranteed_hit_move.effects = [{"handler": "deal_damage", "options": {"power": 60}}]
-    normal_hit_move.effects = [{"handler": "deal_damage", "options": {"power": 60}}]
+    # 技能模板不可变，伤害效果已在构造时通过 on_use.effects 提供
+    assert guaranteed_hit_move.effects and normal_hit_move.effects
 
 
     # --- 场景 A: 必中技能 vs 闪避状态 ---
@@ -0,0 +1,78 @@
+# tests/test_service_concurrency.py
+import asyncio
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.ai import position_key
+from astrbot_plugin_hapemxg_roco1.battle_logic.replay import replay
+from astrbot_plugin_hapemxg_roco1.service import GameService
+
+SESSIONS = 40
+COMMANDS_PER_SESSION = 60
+WORKERS = 16
+TEAM = ["测试精灵", "测试精灵3", "初始精灵-test", "替换精灵-test"]
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+@pytest.mark.asyncio
+async def test_concurrent_commands_keep_every_session_consistent(game_factory: GameDataFactory):
+    """
+    【压力测试】数千条指令不分会话地同时涌入 GameService (直接在线程池中调用，不经过指令执行器)。
+    同一会话的 /attack 与 /battle switch 若在 process_turn 中交错，随机数消耗会被记到错误的回合上，
+    录像重放将与实际对战不一致；因此以“每场对战都能被其录像精确重放”作为一致性判据。
+    """
+    service = GameService(game_factory, [{"name": "测试精灵2", "moves": []}, {"name": "测试精灵4", "moves": []}], max_sessions=None)
+    session_ids = [f"group_{i}" for i in range(SESSIONS)]
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=WORKERS)
+
+    def setup(session_id: str):
+        assert service.start_new_selection(session_id).success
+        assert service.add_pokemon_to_team(session_id, TEAM).success
+        assert service.ready_and_start_battle(session_id, TEAM[0]).success
+        return service.sessions[session_id].battle
+
+    battles = dict(zip(session_ids, await asyncio.gather(*(loop.run_in_executor(pool, setup, sid) for sid in session_ids))))
+
+    move_names = sorted({m for name in TEAM for m in game_factory.get_pokemon_data(name).default_moves[:4]})
+    chooser = random.Random(7)
+    commands = []
+    for sid in session_ids:
+        for _ in range(COMMANDS_PER_SESSION):
+            if chooser.random() < 0.5: commands.append((service.execute_attack, sid, chooser.choice(move_names)))
+            else: commands.append((service.execute_switch, sid, str(chooser.randint(1, len(TEAM)))))
+    chooser.shuffle(commands)
+
+    # 缩短线程切换间隔，让线程在 process_turn 中途被抢占的机会大大增加
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, func, sid, arg) for func, sid, arg in commands))
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.setswitchinterval(switch_interval)
+    pool.shutdown()
+
+    assert len(results) == len(commands)
+    print(f"\n[并发基准] {len(commands)} 条指令, {SESSIONS} 个会话, {WORKERS} 个线程: "
+          f"{len(commands) / elapsed:.0f} 条指令/秒 (成功 {sum(r.success for r in results)} 条)")
+
+    for sid, battle in battles.items():
+        journal = battle.recorder.journal
+        assert journal.turns == battle.turn_count
+        assert position_key(replay(journal, game_factory)) == position_key(battle), f"会话 {sid} 的对战状态与录像不一致"
+        # 未结束的会话仍在存储中且持有同一场对战
+        session = service.sessions.get(sid)
+        if battle.is_over(): assert session is None
+        else: assert session is not None and session.battle is battle
+
+    assert len(service.session_locks) == 0, "指令执行完毕后不应残留会话锁"
\ No newline at end of file
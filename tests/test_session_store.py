@@ -0,0 +1,62 @@
+# tests/test_session_store.py
+import threading
+import pytest
+
+from astrbot_plugin_hapemxg_roco1.session_store import SessionStore
+
+class FakeClock:
+    def __init__(self): self.now = 0.0
+    def __call__(self) -> float: return self.now
+
+@pytest.mark.asyncio
+async def test_idle_sessions_expire_after_ttl():
+    clock, evicted = FakeClock(), []
+    store = SessionStore(ttl_seconds=60, max_sessions=None, clock=clock, on_evict=lambda sid, s, reason: evicted.append((sid, reason)))
+    store["a"] = "session-a"; store["b"] = "session-b"
+
+    clock.now = 50
+    assert store.get("a") == "session-a", "读取应刷新活动时间"
+    clock.now = 100
+    assert store.get("b") is None and "b" not in store
+    assert store.get("a") == "session-a"
+    assert evicted == [("b", "expired")] and store.metrics.expired == 1
+
+@pytest.mark.asyncio
+async def test_lru_cap_evicts_least_recently_active():
+    clock = FakeClock()
+    store = SessionStore(ttl_seconds=None, max_sessions=2, clock=clock)
+    store["a"] = 1; store["b"] = 2
+    store.get("a")
+    store["c"] = 3
+
+    assert list(store) == ["a", "c"]
+    assert store.metrics.evicted == 1 and store.metrics.created == 3
+    del store["a"]
+    assert len(store) == 1 and store.metrics.removed == 1
+
+@pytest.mark.asyncio
+async def test_expired_session_is_evicted_by_membership_check_and_discard():
+    clock, evicted = FakeClock(), []
+    store = SessionStore(ttl_seconds=60, max_sessions=None, clock=clock, on_evict=lambda sid, s, reason: evicted.append(sid))
+    store["a"] = 1; store["b"] = 2
+    clock.now = 100
+    assert "a" not in store
+    assert evicted == ["a"] and list(store) == ["b"], "过期会话应在检查时立即淘汰"
+    assert store.discard("b") == 2 and store.discard("b") is None
+    assert len(store) == 0 and evicted == ["a"], "discard 不受过期与否影响，也不触发 on_evict"
+
+@pytest.mark.asyncio
+async def test_loader_runs_outside_the_store_lock():
+    """一个会话的冷加载期间，其他会话的访问不应被阻塞。"""
+    results = []
+
+    def loader(session_id: str):
+        other = threading.Thread(target=lambda: results.append(store.get("hot")))
+        other.start(); other.join(timeout=2)
+        return None if other.is_alive() else f"loaded-{session_id}"
+
+    store = SessionStore(ttl_seconds=None, max_sessions=None, loader=loader)
+    store["hot"] = "hot-session"
+
+    assert store.get("cold") == "loaded-cold" and results == ["hot-session"]
+    assert store.get("cold") == "loaded-cold" and store.metrics.loaded == 1
\ No newline at end of file
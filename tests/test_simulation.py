@@ -0,0 +1,55 @@
+# tests/test_simulation.py
+import pytest
+from pathlib import Path
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic import simulation
+from astrbot_plugin_hapemxg_roco1.battle_logic.simulation import BattleSimulator, ParallelBattleSimulator, pairwise_matchups
+
+PLAYER_SPEC = [{"name": "测试精灵", "moves": ["猛烈撞击", "臭鸡蛋"]}]
+NPC_SPEC = [{"name": "测试精灵2", "moves": ["巨焰吞噬"]}, {"name": "测试精灵3", "moves": []}]
+
+TEST_DATA_PATH = Path(__file__).parent / "test_data"
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(TEST_DATA_PATH)
+
+@pytest.mark.asyncio
+async def test_simulation_report_is_consistent(game_factory: GameDataFactory):
+    report = BattleSimulator(game_factory, seed=7).run(PLAYER_SPEC, NPC_SPEC, 30)
+
+    assert report.battles == 30
+    assert report.player_wins + report.npc_wins + report.draws == 30
+    assert sum(report.turn_counts.values()) == 30 and report.mean_turns > 0
+    assert report.move_damage["player"]["猛烈撞击"].hits > 0
+    assert report.move_damage["npc"]["巨焰吞噬"].total > 0
+
+@pytest.mark.asyncio
+async def test_simulation_is_reproducible_with_seed(game_factory: GameDataFactory):
+    first = BattleSimulator(game_factory, seed=42).run(PLAYER_SPEC, NPC_SPEC, 10)
+    second = BattleSimulator(game_factory, seed=42).run(PLAYER_SPEC, NPC_SPEC, 10)
+    assert first == second
+
+@pytest.mark.asyncio
+async def test_parallel_sweep_matches_serial_run(game_factory: GameDataFactory):
+    """进程池结果合并后应与单进程顺序执行完全一致。"""
+    matchups = dict(list(pairwise_matchups(game_factory).items())[:3])
+    parallel = ParallelBattleSimulator(TEST_DATA_PATH, workers=2, seed=3, chunk_size=5).sweep(matchups, 12)
+    serial = ParallelBattleSimulator(TEST_DATA_PATH, workers=1, seed=3, chunk_size=5).sweep(matchups, 12)
+
+    assert parallel == serial
+    assert all(report.battles == 12 for report in parallel.values())
+
+@pytest.mark.asyncio
+async def test_serial_sweep_leaves_worker_global_untouched(game_factory: GameDataFactory):
+    """顺序执行复用实例自己的数据工厂，不设置工作进程用的全局变量。"""
+    simulator = ParallelBattleSimulator(TEST_DATA_PATH, workers=1, seed=3, chunk_size=5)
+    matchups = dict(list(pairwise_matchups(game_factory).items())[:1])
+    first = simulator.sweep(matchups, 6)
+    factory = simulator._factory
+    second = simulator.sweep(matchups, 6)
+
+    assert first == second
+    assert factory is not None and simulator._factory is factory
+    assert simulation._worker_factory is None
\ No newline at end of file
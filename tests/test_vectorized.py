@@ -0,0 +1,93 @@
+# tests/test_vectorized.py
+import random
+import time
+import pytest
+from pathlib import Path
+
+np = pytest.importorskip("numpy")
+
+from astrbot_plugin_hapemxg_roco1.battle_logic.factory import GameDataFactory
+from astrbot_plugin_hapemxg_roco1.battle_logic.battle import Battle
+from astrbot_plugin_hapemxg_roco1.battle_logic.components import StatStageComponent, CriticalBoostComponent
+from astrbot_plugin_hapemxg_roco1.battle_logic.constants import Stat
+from astrbot_plugin_hapemxg_roco1.battle_logic.effects import DealDamageEffect
+from astrbot_plugin_hapemxg_roco1.battle_logic.vectorized import DamageBatch
+
+@pytest.fixture(scope="module")
+def game_factory() -> GameDataFactory:
+    return GameDataFactory(Path(__file__).parent / "test_data")
+
+def _random_attacks(factory: GameDataFactory, chooser: random.Random, n: int):
+    """随机等级、能力等级与暴击强化的 (攻击方, 防御方, 造成伤害的技能) 组合。"""
+    names = factory.get_all_pokemon_names()
+    attacks = []
+    while len(attacks) < n:
+        attacker = factory.create_pokemon(chooser.choice(names), chooser.randint(1, 100))
+        defender = factory.create_pokemon(chooser.choice(names), chooser.randint(1, 100))
+        for pokemon in (attacker, defender):
+            for stat in (Stat.ATTACK, Stat.DEFENSE, Stat.SPECIAL_ATTACK, Stat.SPECIAL_DEFENSE):
+                if chooser.random() < 0.3: pokemon.aura.add_component(StatStageComponent(stat, chooser.randint(-6, 6)))
+        if chooser.random() < 0.3: attacker.aura.add_component(CriticalBoostComponent())
+        moves = [s.move for s in attacker.skill_slots if s.move.display_power]
+        if moves: attacks.append((attacker, defender, chooser.choice(moves)))
+    return attacks
+
+@pytest.mark.asyncio
+async def test_kernel_matches_scalar_damage_bit_for_bit(game_factory: GameDataFactory):
+    chooser = random.Random(21)
+    attacks = _random_attacks(game_factory, chooser, 3000)
+    battle = Battle([attacks[0][0]], [attacks[0][1]], game_factory, seed=5, log_enabled=False)
+    batch = DamageBatch.from_attacks(battle, attacks)
+
+    expected, crit_u, roll_u, crits = [], [], [], []
+    for attacker, defender, move in attacks:
+        # 记下标量路径消耗的两个随机数 (暴击判定与伤害浮动)，原样交给批量内核
+        replay = random.Random()
+        replay.setstate(battle.rng.getstate())
+        # 以技能伤害效果的威力与类别计算 (同 DealDamageEffect.execute)
+        effect = next(e for e in move.pipeline if isinstance(e, DealDamageEffect))
+        result = battle.calculate_damage(attacker, defender, move, power=effect.power, category=effect.category)
+        expected.append(result["damage"]); crits.append(result["is_crit"])
+        crit_u.append(replay.random()); roll_u.append(replay.random())
+
+    damage = batch.damage(np.array(crit_u), np.array(roll_u))
+    assert damage.dtype == np.int64
+    assert damage.tolist() == expected
+    # 样本覆盖暴击、本系加成、效果绝佳/不理想等分支
+    assert any(crits) and batch.stab.any() and not batch.stab.all()
+    assert set(batch.effectiveness.tolist()) >= {0.5, 1.0, 2.0}
+
+@pytest.mark.asyncio
+async def test_bulk_rolls_agree_with_analytic_distribution(game_factory: GameDataFactory):
+    attacker = game_factory.create_pokemon("测试精灵2", 60)
+    defender = game_factory.create_pokemon("测试精灵3", 60)
+    battle = Battle([attacker], [defender], game_factory, seed=1, log_enabled=False)
+    move = attacker.get_move_by_name("巨焰吞噬")
+    batch = DamageBatch.from_attacks(battle, [(attacker, defender, move)])
+
+    trials = 200000
+    start = time.perf_counter()
+    rolls = batch.roll(np.random.default_rng(0), trials)[:, 0]
+    elapsed = time.perf_counter() - start
+    print(f"\n[批量伤害基准] {trials / elapsed:.0f} 次/秒")
+
+    dist = battle.damage_distribution(attacker, defender, move)
+    assert rolls.min() >= dist.min_damage and rolls.max() <= dist.max_damage
+    assert rolls.mean() == pytest.approx(dist.expected, rel=0.005)
+
+@pytest.mark.asyncio
+async def test_batch_uses_damage_effect_power_and_category(game_factory: GameDataFactory):
+    """技能面板与伤害效果的威力不同时 (如连击技能的首段)，以伤害效果为准；没有伤害效果的技能伤害为 0。"""
+    attacker = game_factory.create_pokemon("测试精灵3", 60)
+    defender = game_factory.create_pokemon("测试精灵4", 60)
+    battle = Battle([attacker], [defender], game_factory, seed=1, log_enabled=False)
+    combo, noise = attacker.get_move_by_name("测试连击1"), attacker.get_move_by_name("金属噪音")
+    assert combo.display_power == 100
+    batch = DamageBatch.from_attacks(battle, [(attacker, defender, combo), (attacker, defender, noise)])
+    assert batch.power.tolist()[0] == 10 and batch.effectiveness.tolist()[1] == 0
+
+    rolls = batch.roll(np.random.default_rng(0), 20000)
+    assert not rolls[:, 1].any()
+    dist = battle.damage_distribution(attacker, defender, combo)
+    assert rolls[:, 0].min() >= dist.min_damage and rolls[:, 0].max() <= dist.max_damage
+    assert rolls[:, 0].mean() == pytest.approx(dist.expected, rel=0.01)
\ No newline at end of file
@@ -1,16 +1,18 @@
 # ui.py (已重构以完全兼容Aura/Component架构)
 
-from typing import Dict, Optional, List, Any, TYPE_CHECKING
+from typing import Dict, Optional, List, Any, Tuple, TYPE_CHECKING
 
 # 避免循环导入，仅在类型检查时导入GameSession
 if TYPE_CHECKING:
     from .service import GameSession
     from .battle_logic.battle import Battle
     from .battle_logic.pokemon import Pokemon
+    from .battle_logic.move import Move
+    from .battle_logic.damage_calc import DamageDistribution
 
 # 从正确的模块导入常量和组件
 from .battle_logic.constants import Stat, MoveCategory, STAT_NAME_MAP
-from .battle_logic.components import StatusEffectComponent, StatStageComponent
+from .battle_logic.components import StatusEffectComponent
 
 # --- UI 格式化辅助函数 ---
 
@@ -40,13 +42,8 @@ def format_stages(p: 'Pokemon') -> str:
     """
     parts = []
     
-    # 从Aura中获取所有的能力等级变化组件
-    stage_components = p.aura.get_components(StatStageComponent)
-    
-    # 汇总每个能力的总变化量
-    total_stages: Dict[Stat, int] = {}
-    for comp in stage_components:
-        total_stages[comp.stat] = total_stages.get(comp.stat, 0) + comp.change
+    # 从Aura维护的累计值中读取每个能力的总变化量
+    total_stages: Dict[Stat, int] = {stat: p.get_stat_stage(stat) for stat in STAT_NAME_MAP}
 
     for stat, value in total_stages.items():
         if value != 0 and stat in STAT_NAME_MAP:
@@ -190,6 +187,20 @@ def display_full_team_status(battle: 'Battle') -> str:
         response_parts.append("\n使用以下指令行动:\n/attack [技能名]\n/battle switch [名字/编号]\n/battle flee")
     return "\n".join(response_parts)
 
+def format_damage_calc(attacker: 'Pokemon', defender: 'Pokemon', results: List[Tuple['Move', 'DamageDistribution']]) -> str:
+    """格式化 /battle calc 的结果：results 为 [(技能, 伤害分布), ...]。"""
+    response_parts = [f"**-- 伤害计算: `{attacker.name}` → `{defender.name}` (HP {defender.current_hp}/{defender.max_hp}) --**"]
+    for move, dist in results:
+        if dist.max_damage == 0:
+            reason = "没有效果" if dist.effectiveness == 0 else "无法命中" if dist.hit_chance == 0 else "不造成伤害"
+            response_parts.append(f"- {move.name}: {reason}")
+            continue
+        response_parts.append(
+            f"- {move.name}: 伤害 {dist.min_damage}~{dist.max_damage} (期望 {dist.expected:.1f})，"
+            f"命中 {dist.hit_chance:.0%}，暴击 {dist.crit_chance:.1%}，击倒概率 {dist.ko_chance:.1%}"
+        )
+    return "\n".join(response_parts)
+
 def generate_pokemon_list_msg(pokemon_names: List[str]) -> str:
     """生成可选择的宝可梦列表消息。"""
     return "可选择的宝可梦有：\n" + "\n".join([f"  - `{name}`" for name in pokemon_names])